@@ -0,0 +1,251 @@
+"""
+Contrôle d'admission et délestage des requêtes
+- Plafond global de requêtes en cours, partagé par tous les workers : la
+  capacité restante reste disponible pour les routes prioritaires (sondes, /metrics)
+- Plafonds par route (ex: /slow=1) avec une file d'attente bornée et un délai
+  maximum ; au-delà, rejet immédiat en 503 + Retry-After
+- Créneaux partagés entre processus par verrous d'octets (fcntl.lockf) sur un
+  fichier commun : le noyau libère ceux d'un worker qui meurt, sans état à nettoyer
+"""
+import fcntl
+import os
+import tempfile
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Délai entre deux tentatives d'un créneau de route pendant l'attente
+POLL_INTERVAL = 0.01
+
+admission_queue_seconds = Histogram(
+    'admission_queue_seconds',
+    'Attente avant admission des requêtes des routes plafonnées',
+    ['route'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+admission_shed_total = Counter(
+    'admission_shed_total',
+    'Requêtes rejetées en 503 par le contrôle d\'admission',
+    ['route', 'reason']
+)
+
+# Chaque worker compte ses requêtes : somme sur les workers vivants
+admission_inflight = Gauge(
+    'admission_inflight',
+    'Requêtes admises en cours (attente comprise)',
+    multiprocess_mode='livesum'
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Requête délestée
+
+    Attributes:
+        reason (str): capacity (plafond global), queue_full (file de la route
+            pleine) ou timeout (délai d'attente dépassé)
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def parse_route_limits(text):
+    """
+    Analyse ADMISSION_ROUTE_LIMITS
+
+    Format : "route=plafond" séparés par des virgules, la route étant le
+    gabarit Flask (ex: "/slow=1,/products/<int:product_id>=8").
+
+    Returns:
+        dict: route -> plafond
+
+    Raises:
+        ValueError: Si une entrée est invalide
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        try:
+            route, limit = item.rsplit('=', 1)
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValueError(f'Plafond de route invalide: {item}')
+        limits[route.strip()] = limit
+    return limits
+
+
+def default_lock_path():
+    """Fichier de verrous partagé par les workers d'un même master"""
+    shared_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if shared_dir:
+        return os.path.join(shared_dir, 'admission.lock')
+    # Processus unique : fichier propre au processus
+    return os.path.join(tempfile.gettempdir(), f'backend-admission-{os.getpid()}.lock')
+
+
+class SlotTable:
+    """
+    Créneaux numérotés partagés entre processus : un créneau = un octet verrouillé
+
+    Les verrous fcntl appartiennent au processus : les threads d'un même
+    worker (gthread) se répartissent les créneaux via un ensemble local.
+    Le fichier est ouvert au premier usage de chaque processus, après un
+    éventuel fork.
+
+    Args:
+        path (str): Fichier de verrous (créé si absent, contenu jamais lu)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._pid = None
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def _file(self):
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+            self._held = set()
+        return self._fd
+
+    def acquire(self, start, count):
+        """
+        Prend un créneau libre parmi [start, start + count)
+
+        Returns:
+            int: Créneau obtenu, ou None s'ils sont tous pris
+        """
+        with self._lock:
+            fd = self._file()
+            for slot in range(start, start + count):
+                if slot in self._held:
+                    continue
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, slot)
+                except OSError:
+                    continue
+                self._held.add(slot)
+                return slot
+        return None
+
+    def release(self, slot):
+        """Libère un créneau pris par ce processus"""
+        with self._lock:
+            if self._pid == os.getpid() and slot in self._held:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, slot)
+                self._held.discard(slot)
+
+
+class AdmissionTicket:
+    """Créneaux tenus par une requête admise, à rendre par AdmissionController.release()"""
+
+    __slots__ = ('slots',)
+
+    def __init__(self):
+        self.slots = []
+
+
+class AdmissionController:
+    """
+    Admission des requêtes selon un plafond global et des plafonds par route
+
+    Le plafond global compte aussi les requêtes en attente d'un créneau de
+    route : avec des workers synchrones, une requête qui attend occupe son
+    worker. Les créneaux sont disposés dans le fichier de verrous dans
+    l'ordre : global, puis pour chaque route ses créneaux d'exécution et
+    ceux de sa file d'attente.
+
+    Args:
+        max_inflight (int): Plafond global (0 = illimité)
+        route_limits (dict): route -> plafond de requêtes en cours
+        queue_size (int): Requêtes en attente au maximum par route plafonnée
+        queue_timeout (float): Attente maximum d'un créneau de route (secondes)
+        lock_path (str): Fichier de verrous partagé (défaut : default_lock_path())
+    """
+
+    def __init__(self, max_inflight, route_limits, queue_size, queue_timeout, lock_path=None):
+        self.max_inflight = max_inflight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._table = SlotTable(lock_path or default_lock_path())
+        self._routes = {}
+        offset = max_inflight
+        for route, limit in route_limits.items():
+            self._routes[route] = (offset, limit, offset + limit)
+            offset += limit + queue_size
+
+    def admit(self, route):
+        """
+        Réserve les créneaux de la requête, en attendant au besoin celui de sa route
+
+        Args:
+            route (str): Gabarit de la route demandée
+
+        Returns:
+            AdmissionTicket: Créneaux tenus
+
+        Raises:
+            AdmissionRejected: Si la requête doit être délestée
+        """
+        ticket = AdmissionTicket()
+        if self.max_inflight:
+            slot = self._table.acquire(0, self.max_inflight)
+            if slot is None:
+                self._reject(ticket, route, 'capacity')
+            ticket.slots.append(slot)
+
+        limits = self._routes.get(route)
+        if limits is not None:
+            start, limit, queue_start = limits
+            started = time.perf_counter()
+            slot = self._table.acquire(start, limit)
+            if slot is None:
+                slot, reason = self._wait(start, limit, queue_start, started)
+                if slot is None:
+                    self._reject(ticket, route, reason)
+            ticket.slots.append(slot)
+            admission_queue_seconds.labels(route=route).observe(time.perf_counter() - started)
+
+        admission_inflight.inc()
+        return ticket
+
+    def _wait(self, start, limit, queue_start, started):
+        """
+        Attend un créneau de route en occupant une place de sa file
+
+        Returns:
+            tuple: (créneau, None) ou (None, raison du rejet)
+        """
+        place = self._table.acquire(queue_start, self.queue_size) if self.queue_size else None
+        if place is None:
+            return None, 'queue_full'
+        try:
+            deadline = started + self.queue_timeout
+            while time.perf_counter() < deadline:
+                time.sleep(POLL_INTERVAL)
+                slot = self._table.acquire(start, limit)
+                if slot is not None:
+                    return slot, None
+        finally:
+            self._table.release(place)
+        return None, 'timeout'
+
+    def _reject(self, ticket, route, reason):
+        for slot in ticket.slots:
+            self._table.release(slot)
+        admission_shed_total.labels(route=route, reason=reason).inc()
+        raise AdmissionRejected(reason)
+
+    def release(self, ticket):
+        """Rend les créneaux d'une requête terminée"""
+        for slot in ticket.slots:
+            self._table.release(slot)
+        ticket.slots = []
+        admission_inflight.dec()
@@ -3,106 +3,61 @@ Microservice Backend Flask avec instrumentation complète d'observabilité
 - Logs structurés JSON (python-json-logger)
 - Métriques Prometheus (prometheus-flask-exporter)
 - Tracing distribué Jaeger (jaeger-client)
+- Démarrage en phases mesurées, compatible gunicorn --preload (lifecycle.py)
 """
-import logging
-import sys
+# En premier : le temps d'import des dépendances compte dans le démarrage mesuré
+import lifecycle
+from lifecycle import startup
+
+import os
+import hmac
 import time
 import random
-from datetime import datetime
-from flask import Flask, jsonify, request
+from functools import wraps
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from pythonjsonlogger import jsonlogger
-from prometheus_flask_exporter import PrometheusMetrics
-from prometheus_client import Counter, Gauge
-from jaeger_client import Config as JaegerConfig
+from sqlalchemy import func, select
 import opentracing
 from opentracing.ext import tags as ot_tags
+from opentracing.scope_managers.contextvars import ContextVarsScopeManager
 
 from config import Config
+from observability import (
+    db_queries_total, init_jaeger_tracer,
+    product_cache_events_total, setup_logging, trace_sampling_decisions_total
+)
 from models import db, Product
+from cache import CatalogVersion, LRUCache, ProductCache
+from health import CachedCheck
+from pool_telemetry import configure_pool, instrument_engine
+from query_telemetry import SlowQueryLog, instrument_queries, known_fingerprints
+from json_provider import json_provider_class
+from http_metrics import http_request_exceptions_total, http_request_total, init_request_latency
+from bulk import BulkPayloadError, ingest, insert_returning, iter_payload
+from group_commit import GroupCommitter
+from sampling import promotion_reason
+from request_context import current_request, enter_request, exit_request
+from admission import AdmissionController, AdmissionRejected, parse_route_limits
+from replicas import READ_ENGINE_KEY, ReplicaSet, read_routing_total
+from pagination import (
+    PRODUCT_COLUMNS, STREAM_FORMATS, PaginationError, build_product_query, fetch_page,
+    fetch_products_by_ids, parse_product_ids, parse_product_query, stream_products
+)
+from search import (
+    ProductSearchIndex, SearchError, parse_search_query, register_fold_function, search_database,
+    search_requests_total
+)
+from stats import CatalogStats, stats_from_database
 
-# ============================================================================
-# CONFIGURATION DU LOGGER JSON STRUCTURÉ
-# ============================================================================
-def setup_logging():
-    """Configure le logger avec format JSON structuré"""
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Handler pour stdout
-    log_handler = logging.StreamHandler(sys.stdout)
-    
-    # Format JSON personnalisé avec les champs requis
-    class CustomJsonFormatter(jsonlogger.JsonFormatter):
-        def add_fields(self, log_record, record, message_dict):
-            super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-            log_record['timestamp'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-            log_record['level'] = record.levelname
-            log_record['service'] = 'backend'
-            
-            # Ajouter trace_id et span_id si disponibles
-            span = opentracing.tracer.active_span
-            if span and hasattr(span, 'context'):
-                try:
-                    ctx = span.context
-                    if hasattr(ctx, 'trace_id'):
-                        log_record['trace_id'] = format(ctx.trace_id, 'x')
-                    if hasattr(ctx, 'span_id'):
-                        log_record['span_id'] = format(ctx.span_id, 'x')
-                except:
-                    pass
-    
-    formatter = CustomJsonFormatter(
-        '%(timestamp)s %(level)s %(service)s %(message)s'
-    )
-    log_handler.setFormatter(formatter)
-    logger.addHandler(log_handler)
-    
-    return logger
-
-logger = setup_logging()
+startup.mark('imports')
 
 # ============================================================================
-# INITIALISATION JAEGER TRACING
+# LOGGER JSON STRUCTURÉ
 # ============================================================================
-def init_jaeger_tracer(app):
-    """
-    Initialise le tracer Jaeger pour le tracing distribué
-    
-    Args:
-        app: Instance Flask
-        
-    Returns:
-        tracer: Instance du tracer
-    """
-    jaeger_config = JaegerConfig(
-        config={
-            'sampler': {
-                'type': app.config['JAEGER_SAMPLER_TYPE'],
-                'param': app.config['JAEGER_SAMPLER_PARAM'],
-            },
-            'local_agent': {
-                'reporting_host': app.config['JAEGER_AGENT_HOST'],
-                'reporting_port': app.config['JAEGER_AGENT_PORT'],
-            },
-            'logging': True,
-        },
-        service_name=app.config['JAEGER_SERVICE_NAME'],
-        validate=True,
-    )
-    
-    tracer = jaeger_config.initialize_tracer()
-    opentracing.tracer = tracer
-    
-    logger.info(
-        'Jaeger tracer initialisé',
-        extra={
-            'jaeger_host': app.config['JAEGER_AGENT_HOST'],
-            'jaeger_port': app.config['JAEGER_AGENT_PORT']
-        }
-    )
-    
-    return tracer
+logger = setup_logging(Config)
+startup.mark('logging')
 
 # ============================================================================
 # CRÉATION DE L'APPLICATION FLASK
@@ -110,31 +65,142 @@ def init_jaeger_tracer(app):
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Sérialisation JSON des réponses (orjson si disponible)
+app.json = json_provider_class(app.config['JSON_PROVIDER'])(app)
+
 # Activer CORS pour le frontend
 CORS(app, origins=app.config['CORS_ORIGINS'])
+startup.mark('flask')
 
-# Initialiser la base de données
+# Initialiser la base de données, avec un pool de connexions instrumenté
+# (et ajusté au budget max_connections si DB_POOL_ADVISOR=apply)
+# et des requêtes SQL mesurées par empreinte (spans, requêtes lentes)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'], pool_advisor = configure_pool(app.config)
 db.init_app(app)
+with app.app_context():
+    instrument_engine(db.engine, pool_advisor)
+    slow_query_log = SlowQueryLog(
+        db.engine,
+        app.config['SLOW_QUERY_LOG_SIZE'],
+        app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000.0,
+        app.config['SLOW_QUERY_EXPLAIN_MS'] / 1000.0
+    )
+    instrument_queries(db.engine, slow_query_log)
+    # Normalisation des noms du repli SQL de la recherche (SQLite)
+    for engine in db.engines.values():
+        register_fold_function(engine)
+    # Réplicas en lecture : mêmes spans et métriques par empreinte (EXPLAIN des
+    # requêtes lentes joué sur le primaire, de même schéma)
+    replica_engines = {name: db.engines[name] for name in app.config['SQLALCHEMY_BINDS']}
+    for engine in replica_engines.values():
+        instrument_queries(engine, slow_query_log)
+replicas = ReplicaSet(
+    replica_engines, app.config['DB_REPLICA_STRATEGY'], app.config['DB_REPLICA_MAX_LAG']
+) if replica_engines else None
+startup.mark('database')
 
-# Initialiser le tracing Jaeger
-tracer = init_jaeger_tracer(app)
+# Tracer Jaeger créé dans chaque worker (init_worker_tracing) : son reporter
+# (thread et socket UDP) ne survit pas à un fork
+tracer = None
 
-# Initialiser les métriques Prometheus avec endpoint /metrics automatique
-metrics = PrometheusMetrics(app)
+# Initialiser les métriques Prometheus
+# - latence par gabarit de route (buckets par route, exemplars) et compteurs
+#   HTTP : http_metrics.py, enregistrés par les hooks de requête
+# - sous Gunicorn (gunicorn.conf.py) : mode multiprocess, /metrics servi par le
+#   master sur METRICS_PORT avec agrégation des fichiers de tous les workers
+# - en processus unique (python app.py) : endpoint /metrics de prometheus-flask-exporter
+# - METRICS_ENABLED=false : aucune métrique HTTP (mesure du coût de l'instrumentation)
+if not app.config['METRICS_ENABLED']:
+    request_latency = None
+else:
+    request_latency = init_request_latency(app.config)
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_flask_exporter import PrometheusMetrics
+        # Métriques par défaut de l'exporter (path brut) remplacées par http_metrics.py
+        PrometheusMetrics(app, export_defaults=False)
+startup.mark('metrics')
 
-# Métriques personnalisées pour la base de données
-db_queries_total = Counter(
-    'database_queries_total',
-    'Nombre total de requêtes SQL',
-    ['operation', 'table']
-)
+# Cache read-through des produits par ID
+product_cache = ProductCache(
+    max_size=app.config['PRODUCT_CACHE_SIZE'],
+    ttl=app.config['PRODUCT_CACHE_TTL'],
+    shared_url=app.config['PRODUCT_CACHE_REDIS_URL'] or None,
+    counter=product_cache_events_total
+) if app.config['PRODUCT_CACHE_ENABLED'] else None
+
+
+def load_catalog_version():
+    """
+    Lit max(id), max(created_at) et count(*) : deux lectures d'index et un
+    parcours de l'index de clé primaire, au plus une fois par CATALOG_VERSION_TTL
+
+    Toujours sur le primaire, même pendant une requête routée vers une réplique :
+    la version est partagée par tout le worker (clé du cache de listes, ETag,
+    304) et ne doit pas masquer l'écriture d'un client en read-your-writes.
+    """
+    max_id, max_created_at, count = db.session.execute(
+        select(func.max(Product.id), func.max(Product.created_at), func.count(Product.id)),
+        bind_arguments={'bind': db.engine}
+    ).one()
+    return max_id, max_created_at, count
+
+
+# Version du catalogue (ETag / Last-Modified) et pages sérialisées de GET /products
+catalog_version = CatalogVersion(load_catalog_version, app.config['CATALOG_VERSION_TTL'])
+product_list_cache = LRUCache(
+    app.config['PRODUCTS_LIST_CACHE_SIZE'],
+    app.config['PRODUCT_CACHE_TTL'],
+    on_evict=lambda n: product_cache_events_total.labels(event='eviction', tier='list').inc(n)
+) if app.config['PRODUCTS_LIST_CACHE_SIZE'] else None
+startup.mark('caches')
+
+
+def load_products_after(after_id):
+    """Produits d'ID > after_id, lus par lots depuis un curseur serveur"""
+    return db.session.execute(
+        select(*PRODUCT_COLUMNS).where(Product.id > after_id).order_by(Product.id)
+        .execution_options(yield_per=app.config['PRODUCTS_STREAM_BATCH_SIZE'])
+    )
+
+
+# Index de recherche en mémoire (repli SQL tant qu'il n'est pas prêt)
+search_index = ProductSearchIndex(
+    load_products_after, app.config['SEARCH_INDEX_MAX_PRODUCTS']
+) if app.config['SEARCH_INDEX_ENABLED'] else None
 
-db_connection_pool = Gauge(
-    'database_connection_pool',
-    'État du pool de connexions PostgreSQL',
-    ['status']
+
+def load_prices_after(after_id):
+    """(id, category, price) des produits d'ID > after_id"""
+    return db.session.execute(
+        select(Product.id, Product.category, Product.price).where(Product.id > after_id)
+        .order_by(Product.id).execution_options(yield_per=app.config['PRODUCTS_STREAM_BATCH_SIZE'])
+    )
+
+
+def catalog_size():
+    """(max(id), count(*)) de la version courante du catalogue"""
+    state = catalog_version.current()
+    return state.max_id, state.count
+
+
+# Agrégats par catégorie de GET /products/stats, tenus à jour en arrière-plan
+catalog_stats = CatalogStats(
+    load_prices_after,
+    [category.strip() for category in app.config['CATALOG_METRICS_CATEGORIES'].split(',') if category.strip()],
+    version=catalog_size
 )
 
+# Préchargé : index et agrégats construits une fois par le master et partagés
+# en copie sur écriture par les workers, qui n'ont plus qu'à les rattraper
+if lifecycle.PRELOADED:
+    with app.app_context():
+        if search_index is not None:
+            search_index.catch_up()
+        catalog_stats.catch_up()
+        # Connexions ouvertes par le master : inutiles aux workers
+        db.engine.dispose()
+    startup.mark('catalog_preload')
+
 logger.info(
     'Application Flask initialisée',
     extra={
@@ -143,31 +209,170 @@ logger.info(
     }
 )
 
+# Profilage par échantillonnage, activé à la demande (module importé seulement dans ce cas)
+if app.config['PROFILING_ENABLED']:
+    from profiling import SamplingProfiler
+    profiler = SamplingProfiler(
+        app.config['PROFILING_INTERVAL_MS'] / 1000.0,
+        app.config['PROFILING_MAX_OVERHEAD'],
+        app.config['PROFILING_MAX_CONCURRENT']
+    )
+else:
+    profiler = None
+
+# Contrôle d'admission partagé par les workers (créneaux verrouillés dans un fichier commun)
+admission = AdmissionController(
+    app.config['ADMISSION_MAX_INFLIGHT'],
+    parse_route_limits(app.config['ADMISSION_ROUTE_LIMITS']),
+    app.config['ADMISSION_QUEUE_SIZE'],
+    app.config['ADMISSION_QUEUE_TIMEOUT_MS'] / 1000.0
+) if app.config['ADMISSION_ENABLED'] else None
+
+
+def insert_product_rows(rows):
+    """INSERT multi-lignes d'un lot de créations regroupées, en une transaction"""
+    try:
+        ids = insert_returning(db.session, rows, ordered=True)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return ids
+
+
+# Commit groupé des POST /products concurrents d'un même worker (threads gthread)
+group_committer = GroupCommitter(
+    insert_product_rows,
+    app.config['GROUP_COMMIT_WINDOW_MS'] / 1000.0,
+    app.config['GROUP_COMMIT_MAX_ROWS']
+) if app.config['GROUP_COMMIT_ENABLED'] else None
+
+# ============================================================================
+# INITIALISATION PAR WORKER (après le fork en mode préchargé)
+# ============================================================================
+@lifecycle.after_fork('database')
+def init_worker_database():
+    """Oublie les connexions héritées du master sans les fermer (elles lui appartiennent)"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+@lifecycle.after_fork('tracing')
+def init_worker_tracing():
+    """Crée le tracer Jaeger du worker (span actif suivi par contextvar, comme le contexte de requête)"""
+    global tracer
+    tracer = init_jaeger_tracer(app.config, scope_manager=ContextVarsScopeManager())
+
+@lifecycle.after_fork('background')
+def init_worker_background():
+    """
+    Démarre les threads d'arrière-plan : index de recherche, agrégats du
+    catalogue et vérification des réplicas
+
+    Préchargés, ils ne font que rattraper les produits créés depuis, et les
+    gauges sont republiées : celles du master ne sont pas visibles des workers.
+    """
+    if search_index is not None:
+        search_index.build_async(app.app_context)
+    if catalog_stats.ready:
+        catalog_stats.publish()
+    catalog_stats.start_refresher(app.config['CATALOG_STATS_REFRESH_INTERVAL'], app.app_context)
+    if replicas is not None:
+        replicas.start_checker(app.config['DB_REPLICA_CHECK_INTERVAL'])
+
+# Sans préchargement, le worker est déjà le processus courant
+if not lifecycle.PRELOADED:
+    lifecycle.start_worker()
+
 # ============================================================================
 # MIDDLEWARE POUR LOGGING ET TRACING
 # ============================================================================
-@app.before_request
-def before_request_logging():
-    """Log avant chaque requête et crée un span"""
-    # Extraire le contexte de trace parent si présent
-    try:
-        parent_span_ctx = tracer.extract(opentracing.Format.HTTP_HEADERS, request.headers)
-    except:
-        parent_span_ctx = None
-    
-    # Créer un nouveau span pour cette requête
-    span = tracer.start_span(
-        f"{request.method} {request.path}",
-        child_of=parent_span_ctx
-    )
+def tag_request_span(span):
+    """Ajoute les tags HTTP standards au span de la requête"""
     span.set_tag(ot_tags.SPAN_KIND, ot_tags.SPAN_KIND_RPC_SERVER)
     span.set_tag(ot_tags.HTTP_METHOD, request.method)
     span.set_tag(ot_tags.HTTP_URL, request.url)
     span.set_tag('http.path', request.path)
+
+# Routes servies sans span ni log par requête (sondes, scrapes Prometheus)
+FAST_PATH_ROUTES = frozenset(
+    route.strip() for route in app.config['FAST_PATH_ROUTES'].split(',') if route.strip()
+)
+
+# Routes jamais délestées par le contrôle d'admission
+PRIORITY_ROUTES = frozenset(
+    route.strip() for route in app.config['ADMISSION_PRIORITY_ROUTES'].split(',') if route.strip()
+)
+
+def shed_response(route, reason):
+    """Réponse 503 d'une requête délestée, sans span : la surcharge ne remplit pas Jaeger"""
+    logger.warning(
+        f'Requête délestée: {request.method} {request.path}',
+        extra={'route': route, 'reason': reason}
+    )
+    response = jsonify({
+        'error': 'Service surchargé, réessayer plus tard',
+        'reason': reason
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(app.config['ADMISSION_RETRY_AFTER'])
+    return response
+
+@app.before_request
+def start_request_timer():
+    """Début de la requête mesurée par flask_http_request_duration_seconds (sondes et délestages compris)"""
+    if request_latency is not None:
+        g.request_started = time.perf_counter()
+
+@app.before_request
+def before_request_logging():
+    """Log avant chaque requête, crée le span et ouvre le contexte de requête"""
+    if request.path in FAST_PATH_ROUTES:
+        return
+    
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
     
-    # Stocker le span dans g pour y accéder plus tard
-    from flask import g
-    g.span = span
+    # Délester tôt, avant tout travail (span, profilage), quand la capacité est épuisée
+    ticket = None
+    if admission is not None and request.path not in PRIORITY_ROUTES:
+        try:
+            ticket = admission.admit(route)
+        except AdmissionRejected as e:
+            return shed_response(route, e.reason)
+    
+    # Jusqu'au rattachement au contexte de requête, le ticket n'est rendu par
+    # aucun teardown : libéré ici si la suite échoue
+    try:
+        # Profiler une fraction des requêtes, ou celles qui le demandent par en-tête
+        if profiler is not None and (
+            request.headers.get(app.config['PROFILING_HEADER'])
+            or random.random() < app.config['PROFILING_SAMPLE_RATE']
+        ):
+            profiler.start(route)
+        
+        # Extraire le contexte de trace parent si présent
+        try:
+            parent_span_ctx = tracer.extract(opentracing.Format.HTTP_HEADERS, request.headers)
+        except:
+            parent_span_ctx = None
+        
+        # Créer un nouveau span pour cette requête (décision d'échantillonnage prise ici)
+        span = tracer.start_span(
+            f"{request.method} {request.path}",
+            child_of=parent_span_ctx
+        )
+        # Un span non échantillonné ignore ses tags : inutile de les calculer
+        if span.is_sampled():
+            tag_request_span(span)
+        
+        # Span actif jusqu'à la fin de la requête : les spans des handlers et des
+        # requêtes SQL en sont les enfants, les logs portent ses IDs de trace
+        context = enter_request(tracer, span, request.method, request.path, route)
+    except Exception:
+        if ticket is not None:
+            admission.release(ticket)
+        raise
+    context.admission = ticket
     
     logger.info(
         f'Requête reçue: {request.method} {request.path}',
@@ -178,95 +383,323 @@ def before_request_logging():
         }
     )
 
+@app.after_request
+def record_request_metrics(response):
+    """
+    Latence et compteur HTTP par gabarit de route
+
+    Enregistré avant after_request_logging, donc exécuté après lui (ordre
+    inverse de Flask) : la décision d'échantillonnage, promotion comprise, est
+    prise et seule une trace conservée par Jaeger devient exemplar.
+    """
+    if request_latency is None or 'request_started' not in g:
+        return response
+    context = current_request()
+    if context is not None:
+        route = context.route
+        trace_id = context.trace_id if context.span.is_sampled() else None
+    else:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        trace_id = None
+    request_latency.observe(
+        request.method, route, response.status_code, time.perf_counter() - g.request_started, trace_id
+    )
+    http_request_total.labels(method=request.method, status=response.status_code).inc()
+    return response
+
 @app.after_request
 def after_request_logging(response):
-    """Log après chaque requête et ferme le span"""
-    from flask import g
-    if hasattr(g, 'span'):
-        g.span.set_tag(ot_tags.HTTP_STATUS_CODE, response.status_code)
-        if response.status_code >= 400:
-            g.span.set_tag(ot_tags.ERROR, True)
-        g.span.finish()
+    """Log après chaque requête et termine le span"""
+    context = current_request()
+    if context is None:
+        return response
+    
+    span = context.span
+    
+    # Conserver les requêtes en erreur ou lentes même si non échantillonnées
+    reason = promotion_reason(
+        span,
+        response.status_code,
+        context.elapsed(),
+        app.config['TRACE_SLOW_THRESHOLD_MS'] / 1000.0,
+        app.config['TRACE_SAMPLE_ERRORS']
+    )
+    if reason is not None:
+        span.set_tag(ot_tags.SAMPLING_PRIORITY, 1)
+        span.set_tag('sampling.promoted', reason)
+        tag_request_span(span)
+        decision = f'promoted_{reason}'
+    else:
+        decision = 'sampled' if span.is_sampled() else 'dropped'
+    trace_sampling_decisions_total.labels(decision=decision, route=context.route).inc()
+    
+    span.set_tag(ot_tags.HTTP_STATUS_CODE, response.status_code)
+    if response.status_code >= 400:
+        span.set_tag(ot_tags.ERROR, True)
+    span.finish()
     
     logger.info(
-        f'Requête complétée: {request.method} {request.path}',
+        f'Requête complétée: {context.method} {context.path}',
         extra={
-            'method': request.method,
-            'path': request.path,
+            'method': context.method,
+            'path': context.path,
             'status': response.status_code
         }
     )
     return response
 
+# Méthodes servies par une réplique, et cookie de la fenêtre read-your-writes
+READ_METHODS = frozenset(('GET', 'HEAD'))
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+READ_YOUR_WRITES_COOKIE = 'read_primary_until'
+
+@app.before_request
+def route_reads_to_replica():
+    """
+    Aiguille les SELECT d'une route en lecture seule vers une réplique saine
+
+    Un client qui vient d'écrire (cookie read_primary_until encore valide)
+    reste sur le primaire et relit donc ses propres écritures.
+    """
+    context = current_request()
+    if replicas is None or context is None or request.method not in READ_METHODS:
+        return
+    
+    try:
+        primary_until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        primary_until = 0
+    if primary_until > time.time():
+        read_routing_total.labels(decision='primary_read_your_writes').inc()
+        return
+    
+    choice = replicas.choose()
+    if choice is None:
+        read_routing_total.labels(decision='primary_no_replica').inc()
+        return
+    name, engine = choice
+    db.session.info[READ_ENGINE_KEY] = engine
+    read_routing_total.labels(decision='replica').inc()
+    context.span.set_tag('db.replica', name)
+
+@app.after_request
+def mark_client_write(response):
+    """Ouvre la fenêtre read-your-writes du client après une écriture réussie"""
+    if replicas is not None and request.method in WRITE_METHODS and response.status_code < 400:
+        window = app.config['DB_READ_YOUR_WRITES_SECONDS']
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, f'{time.time() + window:.3f}',
+            max_age=max(int(window), 1), httponly=True, samesite='Lax'
+        )
+    return response
+
+@app.teardown_request
+def close_request_context(error):
+    """
+    Fin du profilage, libération des créneaux d'admission et fermeture du
+    contexte de requête, après la dernière frame de réponse (streaming compris)
+    """
+    if profiler is not None:
+        profiler.stop()
+    if error is not None and request_latency is not None:
+        http_request_exceptions_total.labels(method=request.method, status=500).inc()
+    context = current_request()
+    if context is not None:
+        if context.admission is not None:
+            admission.release(context.admission)
+        exit_request(context)
+
 # ============================================================================
 # ROUTES API
 # ============================================================================
 
-@app.route('/health', methods=['GET'])
-def health_check():
+def check_database():
     """
-    Healthcheck avec vérification de la connexion base de données
+    Vérifie la connexion à la base de données (SELECT 1)
     
     Returns:
-        JSON: Statut du service et de la base de données
+        tuple: (bool, str) - (connectée, message d'erreur)
     """
-    logger.info('Healthcheck appelé')
-    
+    try:
+        # Sur le fast path (sondes sans span de requête), pas de span : un span
+        # racine par rafraîchissement recréerait une trace par sonde
+        if opentracing.tracer.active_span is None:
+            db.session.execute(db.text('SELECT 1'))
+        else:
+            with opentracing.tracer.start_active_span('db_health_check'):
+                db.session.execute(db.text('SELECT 1'))
+        
+        logger.info('Base de données accessible')
+        return True, None
+    except Exception as e:
+        logger.error(f'Erreur connexion base de données: {str(e)}')
+        return False, str(e)
+
+# Résultat de la vérification base de données réutilisé par /health
+database_check = CachedCheck(check_database, app.config['HEALTH_CACHE_TTL'])
+
+def health_response(force):
+    """Construit la réponse de healthcheck à partir de la vérification DB"""
+    result = database_check.get(force=force)
     health_status = {
-        'status': 'UP',
+        'status': 'UP' if result['ok'] else 'DEGRADED',
         'service': 'backend',
+        'database': 'connected' if result['ok'] else 'disconnected',
+        'database_checked_at': result['checked_at'],
+        'cached': result['cached'],
         'timestamp': datetime.utcnow().isoformat()
     }
+    return jsonify(health_status), 200 if result['ok'] else 503
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """
+    Healthcheck (liveness) avec vérification de la connexion base de données
     
-    # Vérifier la connexion à la base de données
-    try:
-        with opentracing.tracer.start_active_span('db_health_check'):
-            db.session.execute(db.text('SELECT 1'))
-            health_status['database'] = 'connected'
-            
-            # Métriques du pool de connexions (compatible SQLAlchemy 2.0)
-            try:
-                pool = db.engine.pool
-                db_connection_pool.labels(status='size').set(pool.size())
-                # checkedout() pour SQLAlchemy 2.0
-                if hasattr(pool, 'checkedout'):
-                    db_connection_pool.labels(status='checked_out').set(pool.checkedout())
-            except:
-                pass
-            
-            logger.info('Base de données accessible')
-    except Exception as e:
-        health_status['database'] = 'disconnected'
-        health_status['status'] = 'DEGRADED'
-        logger.error(f'Erreur connexion base de données: {str(e)}')
-        return jsonify(health_status), 503
+    Le résultat de la vérification est réutilisé pendant HEALTH_CACHE_TTL
+    secondes : les sondes fréquentes ne consomment ni connexion du pool ni span.
+    
+    Returns:
+        JSON: Statut du service et de la base de données
+    """
+    return health_response(force=False)
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness : vérification complète de la base de données à chaque appel
     
-    return jsonify(health_status), 200
+    Returns:
+        JSON: Statut du service et de la base de données
+    """
+    logger.info('Readiness appelé')
+    return health_response(force=True)
+
+# ============================================================================
+# REQUÊTES CONDITIONNELLES DU CATALOGUE
+# ============================================================================
+def cache_headers(response, state):
+    """Ajoute ETag, Last-Modified et Cache-Control à une réponse du catalogue"""
+    response.set_etag(state.etag)
+    if state.last_modified is not None:
+        response.last_modified = state.last_modified.replace(tzinfo=timezone.utc)
+    max_age = app.config['PRODUCTS_HTTP_MAX_AGE']
+    response.headers['Cache-Control'] = f'public, max-age={max_age}' if max_age else 'no-cache'
+    return response
+
+
+def not_modified(state):
+    """
+    Réponse 304 si le client possède déjà cette version du catalogue
+    
+    Résolu à partir de la version en mémoire : ni requête SQL ni sérialisation.
+    
+    Returns:
+        Response: 304 avec les en-têtes de cache, ou None
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(state.etag)
+    elif request.if_modified_since and state.last_modified is not None:
+        last_modified = state.last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return cache_headers(app.response_class(status=304), state)
 
 @app.route('/products', methods=['GET'])
 def get_products():
     """
-    Récupère tous les produits depuis PostgreSQL
+    Récupère les produits depuis PostgreSQL par pages (pagination keyset)
+    
+    Query params:
+        limit (int): Taille de page (défaut PRODUCTS_PAGE_SIZE)
+        after (int): Curseur - dernier ID de la page précédente
+        category (str): Filtre sur la catégorie
+        created_after / created_before (ISO 8601): Filtre sur created_at
+        stream (str): 'ndjson' ou 'json' pour un export complet en streaming
+        ids (str): '1,2,3' pour une lecture groupée par IDs (autres paramètres ignorés)
     
     Returns:
-        JSON: Liste des produits
+        JSON: Liste des produits (en-têtes X-Next-Cursor / Link si page suivante)
     """
-    logger.info('Récupération de tous les produits')
+    if 'ids' in request.args:
+        return get_products_by_ids(request.args['ids'])
+    
+    logger.info('Récupération des produits')
     
     try:
+        params = parse_product_query(
+            request.args,
+            app.config['PRODUCTS_PAGE_SIZE'],
+            app.config['PRODUCTS_MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        logger.warning(f'Paramètres de pagination invalides: {str(e)}')
+        return jsonify({
+            'error': 'Paramètre invalide',
+            'message': str(e)
+        }), 400
+    
+    try:
+        state = catalog_version.current()
+        response = not_modified(state)
+        if response is not None:
+            return response
+        
+        query = build_product_query(params)
+        
+        if params['stream']:
+            logger.info(
+                f'Export des produits en streaming ({params["stream"]})',
+                extra={'format': params['stream']}
+            )
+            return cache_headers(Response(
+                stream_with_context(stream_products(
+                    db.session,
+                    query,
+                    params['stream'],
+                    app.config['PRODUCTS_STREAM_BATCH_SIZE'],
+                    params['limit'],
+                    dumps=app.json.dumps
+                )),
+                mimetype=STREAM_FORMATS[params['stream']]
+            ), state)
+        
         with opentracing.tracer.start_active_span('db_query_products') as scope:
-            scope.span.set_tag('db.type', 'sql')
-            scope.span.set_tag('db.statement', 'SELECT * FROM products')
+            scope.span.set_tag('pagination.limit', params['limit'])
+            scope.span.set_tag('pagination.after', params['after'] or 0)
             
-            products = Product.query.all()
-            db_queries_total.labels(operation='SELECT', table='products').inc()
+            # Page déjà sérialisée pour cette version du catalogue, cette source de
+            # lecture (une page lue sur une réplique en retard ne sert pas aux
+            # lectures sur le primaire) et ces paramètres
+            replica_read = db.session.info.get(READ_ENGINE_KEY) is not None
+            cache_key = (state.etag, replica_read, *params.items())
+            page = product_list_cache.get(cache_key) if product_list_cache is not None else None
+            scope.span.set_tag('cache.hit', page is not None)
+            if product_list_cache is not None:
+                product_cache_events_total.labels(event='hit' if page else 'miss', tier='list').inc()
+            if page is None:
+                products, next_cursor = fetch_page(db.session, query, params['limit'])
+                page = (jsonify(products).get_data(), len(products), next_cursor)
+                if product_list_cache is not None:
+                    product_list_cache.set(cache_key, page)
+            body, count, next_cursor = page
             
             logger.info(
-                f'{len(products)} produits récupérés',
-                extra={'count': len(products)}
+                f'{count} produits récupérés',
+                extra={'count': count, 'next_cursor': next_cursor}
             )
             
-            return jsonify([product.to_dict() for product in products]), 200
+            response = app.response_class(body, mimetype=app.json.mimetype)
+            if next_cursor is not None:
+                response.headers['X-Next-Cursor'] = str(next_cursor)
+                next_args = request.args.to_dict()
+                next_args['after'] = next_cursor
+                next_args['limit'] = params['limit']
+                response.headers['Link'] = f'<{request.base_url}?{urlencode(next_args)}>; rel="next"'
+            return cache_headers(response, state), 200
             
     except Exception as e:
         logger.error(
@@ -278,6 +711,192 @@ def get_products():
             'message': str(e)
         }), 500
 
+@app.route('/products/batch-get', methods=['POST'])
+def batch_get_products():
+    """
+    Lecture groupée par IDs, équivalente à GET /products?ids=
+    
+    Request Body:
+        {"ids": [1, 2, 3]}
+    
+    Returns:
+        JSON: Produits dans l'ordre demandé et IDs introuvables
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'ids' not in data:
+        return jsonify({'error': 'Données invalides', 'message': "Champ 'ids' manquant"}), 400
+    return get_products_by_ids(data['ids'])
+
+def get_products_by_ids(raw_ids):
+    """
+    Résout plusieurs IDs : cache produits d'abord, une seule requête SQL pour le reste
+    
+    Args:
+        raw_ids: '1,2,3' ou liste d'entiers
+    
+    Returns:
+        JSON: {"products": [...] dans l'ordre demandé (sans doublons), "missing": [...]}
+    """
+    try:
+        ids = parse_product_ids(raw_ids, app.config['PRODUCTS_BATCH_MAX_IDS'])
+    except PaginationError as e:
+        logger.warning(f'IDs invalides: {str(e)}')
+        return jsonify({
+            'error': 'Paramètre invalide',
+            'message': str(e)
+        }), 400
+    
+    try:
+        with opentracing.tracer.start_active_span('db_query_products_by_ids') as scope:
+            scope.span.set_tag('batch.size', len(ids))
+            
+            found = product_cache.get_many(ids) if product_cache is not None else {}
+            scope.span.set_tag('cache.hits', len(found))
+            misses = [product_id for product_id in ids if product_id not in found]
+            if misses:
+                loaded = fetch_products_by_ids(db.session, misses)
+                if product_cache is not None:
+                    product_cache.set_many(loaded)
+                found.update(loaded)
+            
+            missing = [product_id for product_id in ids if product_id not in found]
+            scope.span.set_tag('batch.missing', len(missing))
+            
+            logger.info(
+                f'{len(ids) - len(missing)}/{len(ids)} produits récupérés par ID',
+                extra={'count': len(ids), 'missing': len(missing), 'cache_hits': len(ids) - len(misses)}
+            )
+            return jsonify({
+                'products': [found[product_id] for product_id in ids if product_id in found],
+                'missing': missing
+            }), 200
+            
+    except Exception as e:
+        logger.error(
+            f'Erreur lors de la récupération des produits par ID: {str(e)}',
+            exc_info=True
+        )
+        return jsonify({
+            'error': 'Erreur serveur',
+            'message': str(e)
+        }), 500
+
+@app.route('/products/search', methods=['GET'])
+def search_products():
+    """
+    Recherche plein texte et à facettes dans le catalogue
+    
+    Query params:
+        q (str): Mots recherchés dans le nom (le dernier en préfixe)
+        category (str): Filtre sur la catégorie
+        min_price / max_price (float): Plage de prix (bornes incluses)
+        sort (str): relevance, price_asc, price_desc, name ou newest
+        limit / offset (int): Page de résultats
+    
+    Returns:
+        JSON: Total, page de produits et comptes par catégorie et plage de prix
+    """
+    try:
+        params = parse_search_query(
+            request.args,
+            app.config['PRODUCTS_PAGE_SIZE'],
+            app.config['PRODUCTS_MAX_PAGE_SIZE']
+        )
+    except SearchError as e:
+        logger.warning(f'Paramètres de recherche invalides: {str(e)}')
+        return jsonify({
+            'error': 'Paramètre invalide',
+            'message': str(e)
+        }), 400
+    
+    try:
+        state = catalog_version.current()
+        response = not_modified(state)
+        if response is not None:
+            return response
+        
+        with opentracing.tracer.start_active_span('search_products') as scope:
+            scope.span.set_tag('search.query', params['q'])
+            ready = search_index is not None and search_index.refresh(state.max_id, state.count, app.app_context)
+            if ready:
+                result = search_index.search(params)
+            else:
+                result = search_database(db.session, params)
+            source = 'index' if ready else 'database'
+            scope.span.set_tag('search.source', source)
+            scope.span.set_tag('search.total', result['total'])
+            search_requests_total.labels(source=source).inc()
+            
+            logger.info(
+                f'Recherche "{params["q"]}": {result["total"]} produits',
+                extra={'query': params['q'], 'total': result['total'], 'source': source}
+            )
+            
+            return cache_headers(jsonify({
+                'query': params['q'],
+                'sort': params['sort'],
+                'limit': params['limit'],
+                'offset': params['offset'],
+                'source': source,
+                **result
+            }), state), 200
+            
+    except Exception as e:
+        logger.error(
+            f'Erreur lors de la recherche de produits: {str(e)}',
+            exc_info=True
+        )
+        return jsonify({
+            'error': 'Erreur serveur',
+            'message': str(e)
+        }), 500
+
+@app.route('/products/stats', methods=['GET'])
+def get_products_stats():
+    """
+    Statistiques de prix du catalogue, globales et par catégorie
+    
+    Servies depuis les agrégats en mémoire (rattrapés jusqu'à la version
+    courante du catalogue) ; calculées en SQL tant qu'ils ne sont pas prêts.
+    
+    Returns:
+        JSON: count, min, max, avg, p50, p95 globaux et par catégorie
+    """
+    try:
+        state = catalog_version.current()
+        response = not_modified(state)
+        if response is not None:
+            return response
+        
+        with opentracing.tracer.start_active_span('catalog_stats') as scope:
+            if catalog_stats.ready and catalog_stats.catch_up(state.max_id, state.count):
+                source = 'memory'
+                categories, overall = catalog_stats.snapshot(), catalog_stats.overall()
+            else:
+                source = 'database'
+                categories, overall = stats_from_database(db.session)
+            scope.span.set_tag('stats.source', source)
+            
+            logger.info(
+                f'Statistiques du catalogue: {len(categories)} catégories',
+                extra={'categories': len(categories), 'source': source}
+            )
+            return cache_headers(jsonify({
+                'source': source,
+                'catalog': overall,
+                'categories': categories
+            }), state), 200
+            
+    except Exception as e:
+        logger.error(
+            f'Erreur lors du calcul des statistiques: {str(e)}',
+            exc_info=True
+        )
+        return jsonify({
+            'error': 'Erreur serveur',
+            'message': str(e)
+        }), 500
+
 @app.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """
@@ -291,14 +910,26 @@ def get_product(product_id):
     """
     logger.info(f'Récupération du produit ID={product_id}')
     
+    def load_product():
+        product = db.session.get(Product, product_id)
+        return product.to_dict() if product is not None else None
+    
     try:
+        state = catalog_version.current()
+        response = not_modified(state)
+        if response is not None:
+            return response
+        
         with opentracing.tracer.start_active_span('db_query_product_by_id') as scope:
-            scope.span.set_tag('db.type', 'sql')
-            scope.span.set_tag('db.statement', f'SELECT * FROM products WHERE id = {product_id}')
             scope.span.set_tag('product.id', product_id)
             
-            product = Product.query.get(product_id)
-            db_queries_total.labels(operation='SELECT', table='products').inc()
+            # Lecture read-through : cache d'abord, PostgreSQL en cas de miss
+            product = product_cache.get(product_id) if product_cache is not None else None
+            scope.span.set_tag('cache.hit', product is not None)
+            if product is None:
+                product = load_product()
+                if product is not None and product_cache is not None:
+                    product_cache.set(product_id, product)
             
             if product is None:
                 logger.warning(f'Produit ID={product_id} non trouvé')
@@ -307,8 +938,8 @@ def get_product(product_id):
                     'product_id': product_id
                 }), 404
             
-            logger.info(f'Produit ID={product_id} trouvé: {product.name}')
-            return jsonify(product.to_dict()), 200
+            logger.info(f'Produit ID={product_id} trouvé: {product["name"]}')
+            return cache_headers(jsonify(product), state), 200
             
     except Exception as e:
         logger.error(
@@ -357,22 +988,39 @@ def create_product():
         
         # Enregistrer en base de données
         with opentracing.tracer.start_active_span('db_insert_product') as scope:
-            scope.span.set_tag('db.type', 'sql')
-            scope.span.set_tag('db.statement', 'INSERT INTO products')
+            if group_committer is not None:
+                # Même transaction que les créations concurrentes du worker
+                row = {
+                    'name': product.name,
+                    'price': product.price,
+                    'category': product.category,
+                    'created_at': datetime.utcnow()
+                }
+                product_id, batch_size = group_committer.submit(row)
+                values = {'id': product_id, **row}
+                scope.span.set_tag('group_commit.batch_size', batch_size)
+            else:
+                db.session.add(product)
+                db.session.flush()
+                # Lues avant le commit, qui expire l'instance : sinon chaque
+                # attribut relu déclencherait un SELECT de rafraîchissement
+                values = {column.key: getattr(product, column.key) for column in PRODUCT_COLUMNS}
+                db.session.commit()
             
-            db.session.add(product)
-            db.session.commit()
-            db_queries_total.labels(operation='INSERT', table='products').inc()
+            if search_index is not None:
+                search_index.add(values)
+            catalog_stats.add(values['id'], values['category'], values['price'])
+            catalog_version.bump()
             
             logger.info(
-                f'Produit créé avec succès: ID={product.id}',
+                f'Produit créé avec succès: ID={values["id"]}',
                 extra={
-                    'product_id': product.id,
-                    'product_name': product.name
+                    'product_id': values['id'],
+                    'product_name': values['name']
                 }
             )
             
-            return jsonify(product.to_dict()), 201
+            return jsonify(Product(**values).to_dict()), 201
             
     except Exception as e:
         db.session.rollback()
@@ -385,6 +1033,71 @@ def create_product():
             'message': str(e)
         }), 500
 
+@app.route('/products/bulk', methods=['POST'])
+def create_products_bulk():
+    """
+    Crée des produits en masse, par lots transactionnels
+    
+    Request Body:
+        Tableau JSON de produits, ou flux NDJSON
+        (Content-Type: application/x-ndjson) avec un produit par ligne
+        
+    Returns:
+        JSON: Nombre de produits insérés, IDs (lots INSERT) et erreurs par ligne
+    """
+    logger.info('Ingestion en masse de produits')
+    
+    try:
+        items = iter_payload(request)
+    except BulkPayloadError as e:
+        return jsonify({'error': 'Données invalides', 'message': str(e)}), 400
+    
+    def record_batch(method, size):
+        # COPY passe par le curseur psycopg2 brut, hors des événements SQLAlchemy
+        if method == 'COPY':
+            db_queries_total.labels(operation=method, table='products').inc()
+    
+    copy_threshold = app.config['BULK_COPY_THRESHOLD'] or None
+    
+    with opentracing.tracer.start_active_span('db_bulk_insert_products') as scope:
+        scope.span.set_tag('bulk.batch_size', app.config['BULK_BATCH_SIZE'])
+        
+        summary = ingest(
+            db.session,
+            items,
+            batch_size=app.config['BULK_BATCH_SIZE'],
+            copy_threshold=copy_threshold,
+            on_batch=record_batch
+        )
+        
+        scope.span.set_tag('bulk.inserted', summary['inserted'])
+        scope.span.set_tag('bulk.failed', summary['failed'])
+        scope.span.set_tag('bulk.batches', summary['batches'])
+        if summary['failed']:
+            scope.span.set_tag(ot_tags.ERROR, True)
+    
+    if summary['inserted']:
+        catalog_version.bump()
+    
+    logger.info(
+        f'Ingestion en masse terminée: {summary["inserted"]} insérés, {summary["failed"]} en erreur',
+        extra={
+            'inserted': summary['inserted'],
+            'failed': summary['failed'],
+            'batches': summary['batches']
+        }
+    )
+    
+    if summary['inserted'] == 0 and summary['failed'] == 0:
+        return jsonify({'error': 'Données invalides', 'message': 'Aucun produit fourni'}), 400
+    if summary['failed'] == 0:
+        status = 201
+    elif summary['inserted'] == 0:
+        status = 400
+    else:
+        status = 207
+    return jsonify(summary), status
+
 @app.route('/slow', methods=['GET'])
 def slow_endpoint():
     """
@@ -449,6 +1162,86 @@ def error_endpoint():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+# ============================================================================
+# ADMINISTRATION
+# ============================================================================
+def admin_required(view):
+    """Réserve une route au porteur de ADMIN_TOKEN (en-tête X-Admin-Token)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        if not token:
+            return jsonify({'error': 'Administration désactivée (ADMIN_TOKEN non défini)'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            logger.warning(f'Accès admin refusé: {request.path}')
+            return jsonify({'error': 'Jeton d\'administration invalide'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/slow-queries', methods=['GET'])
+@admin_required
+def slow_queries():
+    """
+    Requêtes SQL lentes récentes de ce worker, avec leur plan EXPLAIN si capturé
+
+    Returns:
+        JSON: Seuils, requêtes lentes (plus récentes d'abord) et empreintes connues
+    """
+    return jsonify({
+        'threshold_ms': app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'explain_threshold_ms': app.config['SLOW_QUERY_EXPLAIN_MS'],
+        'pid': os.getpid(),
+        'queries': slow_query_log.entries(),
+        'fingerprints': known_fingerprints()
+    }), 200
+
+@app.route('/admin/profiles', methods=['GET'])
+@admin_required
+def profiles():
+    """
+    Résumé du profilage de ce worker : requêtes profilées et échantillons par route
+    
+    Returns:
+        JSON: Paramètres du profileur et compteurs par route
+    """
+    if profiler is None:
+        return jsonify({'error': 'Profilage désactivé (PROFILING_ENABLED)'}), 404
+    return jsonify({
+        'pid': os.getpid(),
+        'sample_rate': app.config['PROFILING_SAMPLE_RATE'],
+        'interval_ms': round(profiler.current_interval * 1000, 3),
+        'routes': profiler.summary()
+    }), 200
+
+@app.route('/admin/profiles/flamegraph', methods=['GET'])
+@admin_required
+def profiles_flamegraph():
+    """
+    Piles agrégées au format collapsed, entrée de flamegraph.pl ou speedscope
+    
+    Query params:
+        route (str): Règle de route (ex: /products/<int:product_id>), toutes par défaut
+    
+    Returns:
+        text/plain: Une ligne « frame;frame;... nombre » par pile
+    """
+    if profiler is None:
+        return jsonify({'error': 'Profilage désactivé (PROFILING_ENABLED)'}), 404
+    return Response(
+        profiler.collapsed(request.args.get('route')),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename=profile-{os.getpid()}.folded'}
+    )
+
+@app.route('/admin/profiles', methods=['DELETE'])
+@admin_required
+def reset_profiles():
+    """Efface les piles accumulées par ce worker"""
+    if profiler is None:
+        return jsonify({'error': 'Profilage désactivé (PROFILING_ENABLED)'}), 404
+    profiler.reset()
+    return '', 204
+
 # ============================================================================
 # GESTION DES ERREURS GLOBALE
 # ============================================================================
@@ -0,0 +1,509 @@
+"""
+Mode de service asynchrone (ASGI) du backend
+- Mêmes routes que app.py : /products, /products/{id}, /health, /health/ready, /slow, /error
+- Starlette + SQLAlchemy asyncio (driver asyncpg) : une requête lente ou en
+  attente de PostgreSQL ne bloque plus un worker entier
+- Mêmes logs JSON, métriques Prometheus et propagation du contexte de trace
+
+Démarrage :
+    gunicorn --config gunicorn.conf.py --worker-class uvicorn.workers.UvicornWorker asgi:app
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime
+from urllib.parse import urlencode
+
+import opentracing
+from opentracing.ext import tags as ot_tags
+from opentracing.scope_managers.contextvars import ContextVarsScopeManager
+from prometheus_client import REGISTRY
+from prometheus_client.exposition import choose_encoder
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from cache import ProductCache
+from config import Config
+from health import AsyncCachedCheck
+from http_metrics import flask_route_template, http_request_total, init_request_latency
+from models import Product
+from observability import (
+    init_jaeger_tracer, product_cache_events_total, setup_logging, trace_sampling_decisions_total
+)
+from pool_telemetry import InstrumentedAsyncQueuePool, configure_pool, instrument_engine
+from query_telemetry import instrument_queries
+from pagination import (
+    STREAM_FORMATS, PaginationError, build_product_select, parse_product_query
+)
+from request_context import enter_request, exit_request
+from sampling import promotion_reason
+
+# ============================================================================
+# CONFIGURATION ET INSTRUMENTATION
+# ============================================================================
+settings = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+logger = setup_logging(Config)
+
+# Le scope manager contextvars suit le span actif à travers les await
+tracer = init_jaeger_tracer(settings, scope_manager=ContextVarsScopeManager())
+
+# Mêmes métriques HTTP que le serveur WSGI (buckets par route, exemplars)
+request_latency = init_request_latency(settings)
+
+engine_options, pool_advisor = configure_pool(settings, poolclass=InstrumentedAsyncQueuePool)
+engine = create_async_engine(
+    settings['ASYNC_DATABASE_URL'],
+    echo=settings['SQLALCHEMY_ECHO'],
+    **engine_options
+)
+instrument_engine(engine.sync_engine, pool_advisor)
+# Durées et spans par requête SQL ; le journal des requêtes lentes (EXPLAIN sur
+# une connexion synchrone) n'est tenu qu'en mode WSGI
+instrument_queries(engine.sync_engine)
+# expire_on_commit=False : les attributs restent lisibles après commit sans I/O implicite
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+product_cache = ProductCache(
+    max_size=settings['PRODUCT_CACHE_SIZE'],
+    ttl=settings['PRODUCT_CACHE_TTL'],
+    shared_url=settings['PRODUCT_CACHE_REDIS_URL'] or None,
+    counter=product_cache_events_total
+) if settings['PRODUCT_CACHE_ENABLED'] else None
+
+FAST_PATH_ROUTES = frozenset(
+    route.strip() for route in settings['FAST_PATH_ROUTES'].split(',') if route.strip()
+)
+
+
+def error_response(error, message, status):
+    return JSONResponse({'error': error, 'message': message}, status_code=status)
+
+# ============================================================================
+# MIDDLEWARE POUR LOGGING, TRACING ET MÉTRIQUES
+# ============================================================================
+def tag_request_span(span, request):
+    """Ajoute les tags HTTP standards au span de la requête"""
+    span.set_tag(ot_tags.SPAN_KIND, ot_tags.SPAN_KIND_RPC_SERVER)
+    span.set_tag(ot_tags.HTTP_METHOD, request.method)
+    span.set_tag(ot_tags.HTTP_URL, str(request.url))
+    span.set_tag('http.path', request.url.path)
+
+
+class ObservabilityMiddleware:
+    """
+    Middleware ASGI équivalent des hooks before/after_request de app.py
+
+    Le span de la requête est activé dans le scope manager : les spans
+    créés par les handlers en sont les enfants. Le contexte de requête
+    (request_context.py) porte ses IDs de trace jusqu'aux logs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in FAST_PATH_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        method, path = request.method, request.url.path
+        try:
+            parent_span_ctx = tracer.extract(opentracing.Format.HTTP_HEADERS, request.headers)
+        except Exception:
+            parent_span_ctx = None
+
+        span = tracer.start_span(f'{method} {path}', child_of=parent_span_ctx)
+        if span.is_sampled():
+            tag_request_span(span, request)
+        # Route connue seulement après le routage de Starlette
+        context = enter_request(tracer, span, method, path, 'unmatched')
+
+        logger.info(
+            f'Requête reçue: {method} {path}',
+            extra={
+                'method': method,
+                'path': path,
+                'remote_addr': request.client.host if request.client else None
+            }
+        )
+
+        status = {'code': 500}
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = context.elapsed()
+            status_code = status['code']
+            endpoint = scope.get('endpoint')
+            route = context.route = ROUTE_TEMPLATES.get(endpoint, 'unmatched')
+
+            reason = promotion_reason(
+                span, status_code, duration,
+                settings['TRACE_SLOW_THRESHOLD_MS'] / 1000.0,
+                settings['TRACE_SAMPLE_ERRORS']
+            )
+            if reason is not None:
+                span.set_tag(ot_tags.SAMPLING_PRIORITY, 1)
+                span.set_tag('sampling.promoted', reason)
+                tag_request_span(span, request)
+                decision = f'promoted_{reason}'
+            else:
+                decision = 'sampled' if span.is_sampled() else 'dropped'
+            trace_sampling_decisions_total.labels(decision=decision, route=route).inc()
+
+            span.set_tag(ot_tags.HTTP_STATUS_CODE, status_code)
+            if status_code >= 400:
+                span.set_tag(ot_tags.ERROR, True)
+            span.finish()
+
+            request_latency.observe(
+                method, route, status_code, duration, context.trace_id if span.is_sampled() else None
+            )
+            http_request_total.labels(method=method, status=status_code).inc()
+
+            logger.info(
+                f'Requête complétée: {method} {path}',
+                extra={'method': method, 'path': path, 'status': status_code}
+            )
+            exit_request(context)
+
+# ============================================================================
+# ROUTES API
+# ============================================================================
+async def check_database():
+    """
+    Vérifie la connexion à la base de données (SELECT 1)
+
+    Returns:
+        tuple: (bool, str) - (connectée, message d'erreur)
+    """
+    async def select_one():
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+
+    try:
+        # Sur le fast path (sondes sans span de requête), pas de span : un span
+        # racine par rafraîchissement recréerait une trace par sonde
+        if opentracing.tracer.active_span is None:
+            await select_one()
+        else:
+            with opentracing.tracer.start_active_span('db_health_check'):
+                await select_one()
+
+        logger.info('Base de données accessible')
+        return True, None
+    except Exception as e:
+        logger.error(f'Erreur connexion base de données: {str(e)}')
+        return False, str(e)
+
+
+database_check = AsyncCachedCheck(check_database, settings['HEALTH_CACHE_TTL'])
+
+
+async def health_response(force):
+    """Construit la réponse de healthcheck à partir de la vérification DB"""
+    result = await database_check.get(force=force)
+    health_status = {
+        'status': 'UP' if result['ok'] else 'DEGRADED',
+        'service': 'backend',
+        'database': 'connected' if result['ok'] else 'disconnected',
+        'database_checked_at': result['checked_at'],
+        'cached': result['cached'],
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    return JSONResponse(health_status, status_code=200 if result['ok'] else 503)
+
+
+async def health_check(request):
+    """Healthcheck (liveness), résultat DB réutilisé pendant HEALTH_CACHE_TTL secondes"""
+    return await health_response(force=False)
+
+
+async def readiness_check(request):
+    """Readiness : vérification complète de la base de données à chaque appel"""
+    logger.info('Readiness appelé')
+    return await health_response(force=True)
+
+
+async def stream_products(query, fmt, batch_size, limit):
+    """Générateur asynchrone NDJSON / tableau JSON depuis un curseur serveur"""
+    if limit is not None:
+        query = query.limit(limit)
+    async with Session() as session:
+        rows = await session.stream_scalars(query.execution_options(yield_per=batch_size))
+        if fmt == 'ndjson':
+            async for product in rows:
+                yield json.dumps(product.to_dict()) + '\n'
+            return
+        yield '['
+        separator = ''
+        async for product in rows:
+            yield separator + json.dumps(product.to_dict())
+            separator = ','
+        yield ']'
+
+
+async def get_products(request):
+    """Récupère les produits par pages (pagination keyset), ou en streaming"""
+    logger.info('Récupération des produits')
+
+    try:
+        params = parse_product_query(
+            request.query_params,
+            settings['PRODUCTS_PAGE_SIZE'],
+            settings['PRODUCTS_MAX_PAGE_SIZE']
+        )
+    except PaginationError as e:
+        logger.warning(f'Paramètres de pagination invalides: {str(e)}')
+        return error_response('Paramètre invalide', str(e), 400)
+
+    query = build_product_select(params)
+    try:
+        if params['stream']:
+            logger.info(
+                f'Export des produits en streaming ({params["stream"]})',
+                extra={'format': params['stream']}
+            )
+            return StreamingResponse(
+                stream_products(
+                    query, params['stream'],
+                    settings['PRODUCTS_STREAM_BATCH_SIZE'], params['limit']
+                ),
+                media_type=STREAM_FORMATS[params['stream']]
+            )
+
+        with opentracing.tracer.start_active_span('db_query_products') as scope:
+            scope.span.set_tag('pagination.limit', params['limit'])
+            scope.span.set_tag('pagination.after', params['after'] or 0)
+
+            async with Session() as session:
+                products = (await session.scalars(query.limit(params['limit'] + 1))).all()
+
+            next_cursor = None
+            if len(products) > params['limit']:
+                products = products[:params['limit']]
+                next_cursor = products[-1].id
+
+            logger.info(
+                f'{len(products)} produits récupérés',
+                extra={'count': len(products), 'next_cursor': next_cursor}
+            )
+
+            response = JSONResponse([product.to_dict() for product in products])
+            if next_cursor is not None:
+                response.headers['X-Next-Cursor'] = str(next_cursor)
+                next_args = dict(request.query_params)
+                next_args['after'] = next_cursor
+                next_args['limit'] = params['limit']
+                base_url = str(request.url.replace(query=''))
+                response.headers['Link'] = f'<{base_url}?{urlencode(next_args)}>; rel="next"'
+            return response
+
+    except Exception as e:
+        logger.error(f'Erreur lors de la récupération des produits: {str(e)}', exc_info=True)
+        return error_response('Erreur serveur', str(e), 500)
+
+
+async def get_product(request):
+    """Récupère un produit spécifique par son ID (cache read-through)"""
+    product_id = request.path_params['product_id']
+    logger.info(f'Récupération du produit ID={product_id}')
+
+    try:
+        with opentracing.tracer.start_active_span('db_query_product_by_id') as scope:
+            scope.span.set_tag('product.id', product_id)
+
+            product = product_cache.get(product_id) if product_cache is not None else None
+            scope.span.set_tag('cache.hit', product is not None)
+            if product is None:
+                async with Session() as session:
+                    row = await session.get(Product, product_id)
+                product = row.to_dict() if row is not None else None
+                if product is not None and product_cache is not None:
+                    product_cache.set(product_id, product)
+
+            if product is None:
+                logger.warning(f'Produit ID={product_id} non trouvé')
+                return JSONResponse(
+                    {'error': 'Produit non trouvé', 'product_id': product_id},
+                    status_code=404
+                )
+
+            logger.info(f'Produit ID={product_id} trouvé: {product["name"]}')
+            return JSONResponse(product)
+
+    except Exception as e:
+        logger.error(
+            f'Erreur lors de la récupération du produit ID={product_id}: {str(e)}',
+            exc_info=True
+        )
+        return error_response('Erreur serveur', str(e), 500)
+
+
+async def create_product(request):
+    """Crée un nouveau produit dans la base de données"""
+    logger.info('Création d\'un nouveau produit')
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data:
+        return JSONResponse({'error': 'Données JSON manquantes'}, status_code=400)
+
+    try:
+        product = Product.from_dict(data)
+
+        is_valid, validation_message = product.validate()
+        if not is_valid:
+            logger.warning(f'Validation échouée: {validation_message}')
+            return error_response('Validation échouée', validation_message, 400)
+
+        with opentracing.tracer.start_active_span('db_insert_product'):
+            async with Session() as session:
+                session.add(product)
+                await session.commit()
+
+            logger.info(
+                f'Produit créé avec succès: ID={product.id}',
+                extra={'product_id': product.id, 'product_name': product.name}
+            )
+            return JSONResponse(product.to_dict(), status_code=201)
+
+    except Exception as e:
+        logger.error(f'Erreur lors de la création du produit: {str(e)}', exc_info=True)
+        return error_response('Erreur serveur', str(e), 500)
+
+
+async def slow_endpoint(request):
+    """Simule une latence sans bloquer la boucle d'événements"""
+    delay = settings['SLOW_ENDPOINT_DELAY']
+    logger.info(f'Endpoint lent appelé - simulation de {delay}s de latence')
+
+    with opentracing.tracer.start_active_span('simulate_slow_operation') as scope:
+        scope.span.set_tag('delay.seconds', delay)
+        await asyncio.sleep(delay)
+
+    logger.info(f'Latence de {delay}s terminée')
+
+    return JSONResponse({
+        'message': f'Réponse après {delay} secondes de latence',
+        'delay_seconds': delay,
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
+async def error_endpoint(request):
+    """Génère intentionnellement une erreur aléatoire"""
+    logger.warning('Endpoint d\'erreur appelé - génération d\'une exception')
+
+    errors = [
+        ('Division par zéro', lambda: 1 / 0),
+        ('Index hors limites', lambda: [][999]),
+        ('Clé inexistante', lambda: {}['key_inexistante']),
+        ('Type invalide', lambda: int('not_a_number')),
+    ]
+
+    error_name, error_func = random.choice(errors)
+
+    try:
+        span = opentracing.tracer.active_span
+        if span:
+            span.set_tag(ot_tags.ERROR, True)
+            span.log_kv({'event': 'error', 'error.kind': error_name})
+
+        error_func()
+
+    except Exception as e:
+        logger.error(
+            f'Exception générée intentionnellement: {error_name}',
+            exc_info=True,
+            extra={'error_type': error_name}
+        )
+
+        return JSONResponse({
+            'error': 'Erreur interne du serveur',
+            'type': error_name,
+            'message': str(e),
+            'timestamp': datetime.utcnow().isoformat()
+        }, status_code=500)
+
+
+async def metrics_endpoint(request):
+    """Métriques Prometheus en processus unique (sous Gunicorn : port dédié)"""
+    encoder, content_type = choose_encoder(request.headers.get('accept'))
+    return Response(encoder(REGISTRY), media_type=content_type)
+
+# ============================================================================
+# GESTION DES ERREURS GLOBALE
+# ============================================================================
+async def not_found(request, exc):
+    """Gestion des erreurs 404"""
+    logger.warning(f'Route non trouvée: {request.url.path}')
+    return JSONResponse({'error': 'Route non trouvée', 'path': request.url.path}, status_code=404)
+
+
+async def internal_error(request, exc):
+    """Gestion des erreurs 500"""
+    logger.error(f'Erreur interne: {str(exc)}', exc_info=True)
+    return error_response('Erreur interne du serveur', str(exc), 500)
+
+# ============================================================================
+# CRÉATION DE L'APPLICATION ASGI
+# ============================================================================
+routes = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/health/ready', readiness_check, methods=['GET']),
+    Route('/products', get_products, methods=['GET']),
+    Route('/products', create_product, methods=['POST']),
+    Route('/products/{product_id:int}', get_product, methods=['GET']),
+    Route('/slow', slow_endpoint, methods=['GET']),
+    Route('/error', error_endpoint, methods=['GET']),
+]
+# Sous Gunicorn, /metrics est servi par le master sur METRICS_PORT (gunicorn.conf.py)
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    routes.append(Route('/metrics', metrics_endpoint, methods=['GET']))
+
+# Gabarits de chemins utilisés comme labels (cardinalité bornée), au format Flask
+ROUTE_TEMPLATES = {route.endpoint: flask_route_template(route.path) for route in routes}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=settings['CORS_ORIGINS'].split(',')),
+        Middleware(ObservabilityMiddleware),
+    ],
+    exception_handlers={404: not_found, 500: internal_error},
+    lifespan=lifespan,
+)
+
+logger.info(
+    'Application ASGI initialisée',
+    extra={
+        'port': settings['PORT'],
+        'database': settings['DATABASE_URL'].split('@')[-1] if '@' in settings['DATABASE_URL'] else 'N/A'
+    }
+)
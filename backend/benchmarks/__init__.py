@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks du backend (non embarqués dans l'image Docker)
+
+Lancer depuis le dossier backend/ : python -m benchmarks.<module>
+"""
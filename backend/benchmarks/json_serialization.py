@@ -0,0 +1,81 @@
+"""
+Benchmark de la sérialisation JSON de GET /products
+
+Compare, pour des réponses de 1k / 10k / 100k produits lus dans une base
+SQLite en mémoire :
+- instances ORM + to_dict() (ancien chemin) ou colonnes seules (fetch_page)
+- fournisseur JSON Flask par défaut ou orjson
+
+Usage (depuis backend/) :
+    python -m benchmarks.json_serialization [--sizes 1000,10000,100000] [--repeat 3]
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from bulk import ingest
+from json_provider import OrjsonProvider, ProductJSONProvider
+from models import Product, db
+from pagination import build_product_query, fetch_page
+
+PARAMS = {'after': None, 'category': None, 'created_after': None, 'created_before': None}
+
+
+def orm_payload(size):
+    """Ancien chemin : une instance ORM hydratée puis un dict par ligne"""
+    products = Product.query.order_by(Product.id).limit(size).all()
+    return [product.to_dict() for product in products]
+
+
+def column_payload(size):
+    """Chemin colonnes : tuples nommés convertis en dict, dates laissées au fournisseur"""
+    return fetch_page(db.session, build_product_query(PARAMS), size)[0]
+
+
+def bench(app, build_payload, size, repeat):
+    """Meilleur temps (ms) de requête + sérialisation + construction de la réponse"""
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        response = app.json.response(build_payload(size))
+        response.get_data()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    paths = {'ORM + to_dict': orm_payload, 'colonnes': column_payload}
+    providers = {'default': ProductJSONProvider, 'orjson': OrjsonProvider}
+
+    with app.app_context():
+        db.create_all()
+        ingest(db.session, (
+            (index, {'name': f'Produit {index}', 'price': 10 + index % 90, 'category': f'Catégorie {index % 10}'}, None)
+            for index in range(max(sizes))
+        ), batch_size=5000)
+
+        print(f'{"lignes":>8}  {"chemin":<16}{"fournisseur":<13}{"ms":>10}{"gain":>8}')
+        for size in sizes:
+            baseline = None
+            for path_name, build_payload in paths.items():
+                for provider_name, provider_class in providers.items():
+                    app.json = provider_class(app)
+                    elapsed = bench(app, build_payload, size, args.repeat)
+                    baseline = baseline or elapsed
+                    print(f'{size:>8}  {path_name:<16}{provider_name:<13}{elapsed:>10.1f}{baseline / elapsed:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+Banc de charge des endpoints du backend Flask
+
+Chaque mesure s'exécute dans un processus dédié qui importe app.py sur une
+base jetable (SQLite par défaut, ou --database-url vers un PostgreSQL local)
+avec l'agent Jaeger remplacé par un puits UDP local. Les requêtes passent par
+le client de test Flask depuis plusieurs threads : on mesure le coût de
+l'application et de son instrumentation, sans réseau HTTP.
+
+Rapport : p50 / p95 / p99, req/s et mémoire allouée par requête (tracemalloc).
+--compare relance le même scénario tracing, métriques et logs désactivés tour
+à tour pour chiffrer le surcoût de l'instrumentation.
+
+Usage (depuis backend/) :
+    python -m benchmarks.load [--requests 2000] [--concurrency 8]
+        [--mix list=40,get=40,create=15,error=5] [--compare]
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Endpoint -> (méthode, statut attendu)
+ENDPOINTS = {
+    'list': ('GET', 200),
+    'get': ('GET', 200),
+    'create': ('POST', 201),
+    'slow': ('GET', 200),
+    'error': ('GET', 500),
+}
+
+DEFAULT_MIX = 'list=40,get=40,create=15,error=5'
+
+# Variantes de --compare : surcharges d'environnement appliquées au processus mesuré
+TRACING_OFF = {
+    'JAEGER_SAMPLER_TYPE': 'const',
+    'JAEGER_SAMPLER_PARAM': '0',
+    'TRACE_SAMPLING_RULES': '',
+    'TRACE_SAMPLE_ERRORS': 'false',
+    'TRACE_SLOW_THRESHOLD_MS': '0',
+}
+METRICS_OFF = {'METRICS_ENABLED': 'false'}
+LOGGING_OFF = {'LOG_LEVEL': 'CRITICAL'}
+
+VARIANTS = {
+    'instrumenté': {},
+    'sans tracing': TRACING_OFF,
+    'sans métriques': METRICS_OFF,
+    'sans logs': LOGGING_OFF,
+    'sans instrumentation': {**TRACING_OFF, **METRICS_OFF, **LOGGING_OFF},
+}
+
+
+def parse_mix(text):
+    """
+    Analyse --mix : "endpoint=poids" séparés par des virgules
+
+    Raises:
+        ValueError: Endpoint inconnu ou poids invalide
+    """
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f'Endpoint inconnu: {name} (attendus : {", ".join(ENDPOINTS)})')
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('Le mix doit contenir au moins un endpoint de poids positif')
+    return mix
+
+
+def percentile(sorted_values, q):
+    """Percentile par rang le plus proche sur une liste triée"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+class UDPSink:
+    """
+    Remplace l'agent Jaeger : reçoit et compte les datagrammes de spans
+
+    Args:
+        host (str): Adresse d'écoute (port choisi par le système)
+    """
+
+    def __init__(self, host='127.0.0.1'):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, 0))
+        self._sock.settimeout(0.2)
+        self.address = self._sock.getsockname()
+        self.packets = 0
+        self.bytes = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='jaeger-sink', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                data = self._sock.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.packets += 1
+            self.bytes += len(data)
+
+    def reset(self):
+        self.packets = self.bytes = 0
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join(timeout=1)
+        self._sock.close()
+
+# ============================================================================
+# PROCESSUS MESURÉ
+# ============================================================================
+def send(client, name, rnd, product_count):
+    """Exécute une requête de l'endpoint name et retourne le statut HTTP"""
+    if name == 'list':
+        response = client.get('/products?limit=20')
+    elif name == 'get':
+        response = client.get(f'/products/{rnd.randint(1, product_count)}')
+    elif name == 'create':
+        response = client.post('/products', json={
+            'name': f'Produit benchmark {rnd.randint(1, 10 ** 9)}',
+            'price': round(rnd.uniform(1, 500), 2),
+            'category': 'Benchmark',
+        })
+    else:
+        response = client.get(f'/{name}')
+    response.close()
+    return response.status_code
+
+
+def measure_allocations(app, names, samples, product_count):
+    """Pic de mémoire allouée par requête (octets), endpoint par endpoint"""
+    client = app.test_client()
+    rnd = random.Random(0)
+    result = {}
+    tracemalloc.start()
+    try:
+        for name in names:
+            peaks = []
+            for _ in range(samples):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                send(client, name, rnd, product_count)
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            result[name] = sum(peaks) / len(peaks)
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_worker(options, output):
+    """Importe app.py, prépare la base, lance la charge puis écrit le résultat JSON"""
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app, db
+    from bulk import ingest
+
+    with app.app_context():
+        db.create_all()
+        ingest(db.session, (
+            (index, {'name': f'Produit {index}', 'price': 10 + index % 90, 'category': f'Catégorie {index % 10}'}, None)
+            for index in range(options['seed'])
+        ), batch_size=app.config['BULK_BATCH_SIZE'])
+
+    mix = options['mix']
+    rnd = random.Random(options['random_seed'])
+    plan = rnd.choices(list(mix), weights=list(mix.values()), k=options['requests'])
+    product_count = options['seed']
+
+    warmup_client = app.test_client()
+    for name in itertools.islice(itertools.cycle(mix), options['warmup']):
+        send(warmup_client, name, rnd, product_count)
+
+    cursor = itertools.count()
+    samples = {name: [] for name in mix}
+    unexpected = {name: 0 for name in mix}
+
+    def worker(seed):
+        client = app.test_client()
+        local_rnd = random.Random(seed)
+        while True:
+            index = next(cursor)
+            if index >= len(plan):
+                return
+            name = plan[index]
+            started = time.perf_counter()
+            status = send(client, name, local_rnd, product_count)
+            samples[name].append(time.perf_counter() - started)
+            if status != ENDPOINTS[name][1]:
+                unexpected[name] += 1
+
+    threads = [
+        threading.Thread(target=worker, args=(options['random_seed'] + i,))
+        for i in range(options['concurrency'])
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'elapsed_s': elapsed,
+        'rps': len(plan) / elapsed,
+        'total': summarize(itertools.chain.from_iterable(samples.values())),
+        'endpoints': {
+            name: dict(summarize(values), unexpected=unexpected[name])
+            for name, values in samples.items()
+        },
+    }
+    if options['alloc_samples']:
+        allocations = measure_allocations(app, list(mix), options['alloc_samples'], product_count)
+        for name, value in allocations.items():
+            result['endpoints'][name]['alloc_kib'] = value / 1024
+        result['total']['alloc_kib'] = sum(
+            allocations[name] * weight for name, weight in mix.items()
+        ) / sum(mix.values()) / 1024
+
+    with open(output, 'w') as f:
+        json.dump(result, f)
+    # Laisser le reporter Jaeger vider sa file (flush toutes les secondes) avant la sortie
+    time.sleep(1.5)
+
+# ============================================================================
+# ORCHESTRATION ET RAPPORT
+# ============================================================================
+def run_variant(options, overrides, sink, database_url):
+    """Lance un processus mesuré avec les surcharges d'environnement données"""
+    env = dict(os.environ)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    env.update({
+        'DATABASE_URL': database_url,
+        'JAEGER_AGENT_HOST': sink.address[0],
+        'JAEGER_AGENT_PORT': str(sink.address[1]),
+        'SLOW_ENDPOINT_DELAY': str(options['slow_delay']),
+        'LOGSTASH_HOST': '',
+        'PRODUCT_CACHE_REDIS_URL': '',
+        # Le délestage transformerait la file de /slow en 503 « inattendus »
+        'ADMISSION_ENABLED': 'false',
+        'BENCHMARK_OPTIONS': json.dumps(options),
+    })
+    env.update(overrides)
+
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    try:
+        # stdout (logs JSON de l'application) est écarté, stderr reste visible
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.load', '--worker', output],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, check=True
+        )
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+def print_report(label, result, sink_packets, sink_bytes):
+    print(f'\n== {label} : {result["rps"]:.0f} req/s, {result["total"]["count"]} requêtes en {result["elapsed_s"]:.2f}s'
+          f' ; spans UDP : {sink_packets} paquets, {sink_bytes / 1024:.0f} KiB')
+    print(f'{"endpoint":<10}{"n":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"KiB/req":>10}{"inattendus":>12}')
+    rows = list(result['endpoints'].items()) + [('total', result['total'])]
+    for name, stats in rows:
+        alloc = f'{stats["alloc_kib"]:.1f}' if 'alloc_kib' in stats else '-'
+        print(f'{name:<10}{stats["count"]:>7}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}'
+              f'{stats["p99_ms"]:>10.2f}{alloc:>10}{stats.get("unexpected", ""):>12}')
+
+
+def print_comparison(results):
+    baseline = results['sans instrumentation']
+    print('\n== Surcoût de l\'instrumentation (par rapport à "sans instrumentation")')
+    print(f'{"variante":<24}{"req/s":>10}{"Δ req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"Δ p99":>10}')
+    for label, result in results.items():
+        rps_delta = (result['rps'] / baseline['rps'] - 1) * 100
+        p99_delta = (result['total']['p99_ms'] / baseline['total']['p99_ms'] - 1) * 100
+        print(f'{label:<24}{result["rps"]:>10.0f}{rps_delta:>9.1f}%{result["total"]["p50_ms"]:>10.2f}'
+              f'{result["total"]["p99_ms"]:>10.2f}{p99_delta:>9.1f}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f'Poids par endpoint ({", ".join(ENDPOINTS)}), défaut : {DEFAULT_MIX}')
+    parser.add_argument('--seed', type=int, default=1000, help='Nombre de produits initiaux')
+    parser.add_argument('--slow-delay', type=float, default=0.05,
+                        help='SLOW_ENDPOINT_DELAY utilisé par /slow (secondes)')
+    parser.add_argument('--alloc-samples', type=int, default=50,
+                        help='Requêtes par endpoint pour la mesure des allocations (0 = désactivée)')
+    parser.add_argument('--database-url', help='Base PostgreSQL jetable (défaut : SQLite temporaire)')
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--compare', action='store_true',
+                        help='Compare tracing, métriques et logs activés / désactivés')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(os.environ['BENCHMARK_OPTIONS']), args.worker)
+        return
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    options = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'warmup': args.warmup,
+        'mix': mix,
+        'seed': args.seed,
+        'slow_delay': args.slow_delay,
+        'alloc_samples': args.alloc_samples,
+        'random_seed': args.random_seed,
+    }
+    variants = VARIANTS if args.compare else {'instrumenté': {}}
+
+    sink = UDPSink()
+    results = {}
+    try:
+        for label, overrides in variants.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                database_url = args.database_url or f'sqlite:///{os.path.join(tmp, "benchmark.db")}'
+                sink.reset()
+                results[label] = run_variant(options, overrides, sink, database_url)
+                print_report(label, results[label], sink.packets, sink.bytes)
+    finally:
+        sink.close()
+
+    if args.compare:
+        print_comparison(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark des formatters de logs JSON
+
+Compare CustomJsonFormatter (historique) et FastJsonFormatter (json / orjson)
+sur des logs simples, avec champs extra, et dans un contexte de requête tracée.
+
+Usage (depuis backend/) :
+    python -m benchmarks.log_formatter [--records 50000]
+"""
+import argparse
+import logging
+import timeit
+
+import opentracing
+from jaeger_client import Tracer
+from jaeger_client.reporter import NullReporter
+from jaeger_client.sampler import ConstSampler
+
+from log_format import CustomJsonFormatter, FastJsonFormatter
+from request_context import enter_request, exit_request
+
+
+def make_record(extra=None):
+    record = logging.LogRecord(
+        'benchmark', logging.INFO, __file__, 1,
+        'Récupération du produit ID=%s', (42,), None
+    )
+    for key, value in (extra or {}).items():
+        setattr(record, key, value)
+    return record
+
+
+def bench(formatter, record, number):
+    """Retourne le coût moyen d'un format() en microsecondes"""
+    seconds = timeit.timeit(lambda: formatter.format(record), number=number)
+    return seconds / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=50000)
+    args = parser.parse_args()
+
+    formatters = {
+        'standard (python-json-logger)': CustomJsonFormatter(
+            '%(timestamp)s %(level)s %(service)s %(message)s'
+        ),
+        'fast (json)': FastJsonFormatter(serializer='json'),
+        'fast (orjson)': FastJsonFormatter(serializer='orjson'),
+    }
+    scenarios = {
+        'message simple': make_record(),
+        'champs extra': make_record({'method': 'GET', 'path': '/products', 'status': 200}),
+    }
+
+    opentracing.tracer = Tracer('benchmark', reporter=NullReporter(), sampler=ConstSampler(True))
+
+    print(f'{"formatter":<32}{"scénario":<20}{"µs/log":>10}')
+    for scenario, record in scenarios.items():
+        for name, formatter in formatters.items():
+            print(f'{name:<32}{scenario:<20}{bench(formatter, record, args.records):>10.2f}')
+
+    record = scenarios['champs extra']
+    span = opentracing.tracer.start_span('GET /products')
+    context = enter_request(opentracing.tracer, span, 'GET', '/products', '/products')
+    for name, formatter in formatters.items():
+        print(f'{name:<32}{"requête tracée":<20}{bench(formatter, record, args.records):>10.2f}')
+    exit_request(context)
+    span.finish()
+
+
+if __name__ == '__main__':
+    main()
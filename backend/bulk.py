@@ -0,0 +1,187 @@
+"""
+Ingestion en masse des produits (POST /products/bulk et init_db.py)
+- Entrée tableau JSON ou flux NDJSON (une ligne JSON par produit)
+- Validation ligne par ligne avec Product.validate()
+- Insertion par lots : INSERT multi-lignes ... RETURNING id, ou COPY (psycopg2)
+- Rapport d'erreurs par ligne au lieu d'abandonner au premier enregistrement invalide
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import Product
+
+# Colonnes écrites par l'ingestion en masse (id et created_at générés)
+BULK_COLUMNS = ('name', 'price', 'category', 'created_at')
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonlines', 'application/jsonl')
+
+
+class BulkPayloadError(ValueError):
+    """Corps de requête illisible dans son ensemble (réponse 400)"""
+
+
+def iter_payload(req):
+    """
+    Itère sur les produits envoyés dans la requête
+
+    Le NDJSON est lu ligne par ligne depuis le flux d'entrée sans charger
+    tout le corps en mémoire ; un tableau JSON est décodé en une fois.
+
+    Args:
+        req: Objet request Flask
+
+    Yields:
+        tuple: (index, données ou None, message d'erreur ou None)
+
+    Raises:
+        BulkPayloadError: Si le corps n'est ni un tableau JSON ni du NDJSON
+    """
+    if req.mimetype in NDJSON_MIMETYPES:
+        return _iter_ndjson(req.stream)
+
+    data = req.get_json(silent=True)
+    if not isinstance(data, list):
+        raise BulkPayloadError('Le corps doit être un tableau JSON ou un flux NDJSON')
+    return ((index, item, None) for index, item in enumerate(data))
+
+
+def _iter_ndjson(stream):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line), None
+        except ValueError as e:
+            yield index, None, f'JSON invalide: {str(e)}'
+        index += 1
+
+
+def validate_row(data):
+    """
+    Valide une ligne et la convertit en paramètres d'insertion
+
+    Returns:
+        tuple: (dict des colonnes ou None, message d'erreur ou None)
+    """
+    if not isinstance(data, dict):
+        return None, 'Chaque produit doit être un objet JSON'
+    product = Product.from_dict(data)
+    try:
+        is_valid, message = product.validate()
+    except (TypeError, AttributeError):
+        return None, 'Types de champs invalides (nom et catégorie texte, prix numérique)'
+    if not is_valid:
+        return None, message
+    return {
+        'name': product.name,
+        'price': product.price,
+        'category': product.category,
+        'created_at': datetime.utcnow(),
+    }, None
+
+
+def insert_returning(session, rows, ordered=False):
+    """
+    Insère un lot en INSERT multi-lignes et retourne les IDs générés
+
+    SQLAlchemy 2.0 regroupe les paramètres en INSERT ... VALUES (...), (...)
+    RETURNING id (insertmanyvalues) au lieu d'un aller-retour par ligne.
+    Avec ordered, les IDs sont garantis dans l'ordre des lignes.
+    """
+    statement = insert(Product).returning(Product.id, sort_by_parameter_order=ordered)
+    result = session.execute(statement, rows)
+    return [row[0] for row in result]
+
+
+def copy_rows(session, rows):
+    """
+    Insère un lot via COPY FROM STDIN (PostgreSQL / psycopg2 uniquement)
+
+    COPY est le chemin le plus rapide pour les gros volumes mais ne
+    retourne pas les IDs générés.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in BULK_COLUMNS])
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {Product.__tablename__} ({', '.join(BULK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def ingest(session, items, batch_size, copy_threshold=None, on_batch=None):
+    """
+    Valide et insère les produits par lots, un commit par lot
+
+    Un lot rejeté par la base est annulé et ses lignes sont signalées en
+    erreur ; les lots précédents et suivants ne sont pas affectés.
+
+    Args:
+        session: Session SQLAlchemy
+        items: Itérable de (index, données, erreur) produit par iter_payload
+        batch_size (int): Nombre de lignes par transaction
+        copy_threshold (int): Taille de lot à partir de laquelle COPY est
+            utilisé sur PostgreSQL (None pour toujours utiliser INSERT)
+        on_batch (callable): Appelé avec (méthode, taille) après chaque lot
+
+    Returns:
+        dict: inserted, failed, batches, ids, errors
+    """
+    use_copy = (
+        copy_threshold is not None
+        and session.get_bind().dialect.name == 'postgresql'
+    )
+    summary = {'inserted': 0, 'failed': 0, 'batches': 0, 'ids': [], 'errors': []}
+    batch, batch_indexes = [], []
+
+    def flush():
+        method = 'COPY' if use_copy and len(batch) >= copy_threshold else 'INSERT'
+        try:
+            if method == 'COPY':
+                copy_rows(session, batch)
+            else:
+                summary['ids'].extend(insert_returning(session, batch))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            summary['failed'] += len(batch)
+            summary['errors'].extend(
+                {'index': index, 'message': f'Erreur base de données: {str(e)}'}
+                for index in batch_indexes
+            )
+        else:
+            summary['inserted'] += len(batch)
+            if on_batch is not None:
+                on_batch(method, len(batch))
+        summary['batches'] += 1
+        batch.clear()
+        batch_indexes.clear()
+
+    for index, data, error in items:
+        if error is None:
+            row, error = validate_row(data)
+        if error is not None:
+            summary['failed'] += 1
+            summary['errors'].append({'index': index, 'message': error})
+            continue
+        batch.append(row)
+        batch_indexes.append(index)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return summary
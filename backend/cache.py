@@ -0,0 +1,279 @@
+"""
+Cache read-through des produits pour GET /products/<id>
+- Niveau local : LRU borné en taille avec expiration (TTL), propre à chaque worker
+- Niveau partagé optionnel : Redis commun aux workers gunicorn
+- Compteurs hit / miss / eviction exportés vers Prometheus
+- Version du catalogue pour les ETag / Last-Modified et le cache des pages de GET /products
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe borné en nombre d'entrées, avec TTL
+
+    Les valeurs expirées sont supprimées paresseusement lors de la lecture.
+    """
+
+    def __init__(self, max_size, ttl, on_evict=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retourne la valeur associée à key ou None si absente / expirée"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Ajoute ou remplace une entrée, évince la plus ancienne si plein"""
+        evicted = 0
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted and self._on_evict:
+            self._on_evict(evicted)
+
+    def delete(self, key):
+        """Supprime une entrée si elle existe"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisTier:
+    """Niveau de cache partagé entre workers, stocké dans Redis en JSON"""
+
+    def __init__(self, url, ttl, prefix='product:'):
+        import redis  # dépendance optionnelle
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(f'{self.prefix}{key}')
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self._client.set(f'{self.prefix}{key}', json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def get_many(self, keys):
+        """Lit plusieurs clés en un seul MGET"""
+        raws = self._client.mget([f'{self.prefix}{key}' for key in keys])
+        return {key: json.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+
+    def set_many(self, values):
+        """Écrit plusieurs clés en un seul aller-retour (pipeline)"""
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(f'{self.prefix}{key}', json.dumps(value), ex=max(1, int(self.ttl)))
+        pipeline.execute()
+
+
+class ProductCache:
+    """
+    Cache read-through à deux niveaux pour les produits sérialisés
+
+    Les valeurs stockées sont les dictionnaires de Product.to_dict() afin de
+    ne jamais conserver d'instances ORM détachées de leur session.
+
+    Aucune invalidation : l'API ne modifie ni ne supprime de produit, et les
+    absences ne sont pas mises en cache (un produit créé est lu en base dès
+    la première requête). Une modification faite directement en base reste
+    servie, par chaque worker et par Redis, jusqu'à l'expiration (ttl).
+
+    Args:
+        max_size (int): Nombre maximum d'entrées du niveau local
+        ttl (float): Durée de vie d'une entrée en secondes
+        shared_url (str): URL Redis du niveau partagé (optionnel)
+        counter: Counter Prometheus avec les labels event et tier (optionnel)
+    """
+
+    def __init__(self, max_size, ttl, shared_url=None, counter=None):
+        self._counter = counter
+        self.local = LRUCache(
+            max_size, ttl,
+            on_evict=lambda n: self._record('eviction', 'local', n)
+        )
+        self.shared = None
+        if shared_url:
+            try:
+                self.shared = RedisTier(shared_url, ttl)
+            except ImportError:
+                logger.warning('Module redis absent - cache partagé désactivé')
+
+    def _record(self, event, tier, amount=1):
+        if self._counter is not None:
+            self._counter.labels(event=event, tier=tier).inc(amount)
+
+    def get(self, product_id):
+        """Cherche le produit dans le niveau local puis le niveau partagé"""
+        value = self.local.get(product_id)
+        if value is not None:
+            self._record('hit', 'local')
+            return value
+        self._record('miss', 'local')
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(product_id)
+            except Exception as e:
+                logger.warning(f'Cache partagé indisponible: {str(e)}')
+                value = None
+            if value is not None:
+                self._record('hit', 'shared')
+                self.local.set(product_id, value)
+                return value
+            self._record('miss', 'shared')
+        return None
+
+    def set(self, product_id, value):
+        """Stocke le produit sérialisé dans tous les niveaux"""
+        self.local.set(product_id, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(product_id, value)
+            except Exception as e:
+                logger.warning(f'Cache partagé indisponible: {str(e)}')
+
+    def get_many(self, product_ids):
+        """
+        Cherche plusieurs produits : niveau local, puis un seul MGET sur le niveau partagé
+
+        Returns:
+            dict: product_id -> produit, pour les IDs trouvés
+        """
+        found = {}
+        missing = []
+        for product_id in product_ids:
+            value = self.local.get(product_id)
+            if value is not None:
+                found[product_id] = value
+            else:
+                missing.append(product_id)
+        self._record('hit', 'local', len(found))
+        self._record('miss', 'local', len(missing))
+
+        if self.shared is not None and missing:
+            try:
+                values = self.shared.get_many(missing)
+            except Exception as e:
+                logger.warning(f'Cache partagé indisponible: {str(e)}')
+                values = {}
+            for product_id, value in values.items():
+                found[product_id] = value
+                self.local.set(product_id, value)
+            self._record('hit', 'shared', len(values))
+            self._record('miss', 'shared', len(missing) - len(values))
+        return found
+
+    def set_many(self, products):
+        """Stocke plusieurs produits sérialisés (dict product_id -> produit) dans tous les niveaux"""
+        for product_id, value in products.items():
+            self.local.set(product_id, value)
+        if self.shared is not None and products:
+            try:
+                self.shared.set_many(products)
+            except Exception as e:
+                logger.warning(f'Cache partagé indisponible: {str(e)}')
+
+
+# Version du catalogue : etag (sans guillemets), last_modified (datetime UTC ou None),
+# max_id (plus grand ID de la table, 0 si vide) et count (nombre de produits)
+CatalogState = namedtuple('CatalogState', ['etag', 'last_modified', 'max_id', 'count'])
+
+
+class CatalogVersion:
+    """
+    Version courante du catalogue produits, gardée en mémoire
+
+    La version est relue en base (loader) au plus toutes les ttl secondes,
+    ou dès la requête suivante après bump() : entre deux relectures, les
+    requêtes conditionnelles sont résolues sans toucher à la table. Les
+    écritures faites par un autre worker sont visibles après au plus ttl
+    secondes.
+
+    L'ETag combine max(id) et count(*) : les IDs sont attribués avant le
+    commit, une transaction peut donc valider un ID inférieur au max(id) déjà
+    lu (ingestion, commit groupé, autre worker) sans le changer. Le nombre de
+    produits change, lui, à chaque insertion ou suppression validée.
+    max(created_at) n'avance pas non plus dans ce cas : Last-Modified prend
+    alors l'heure à laquelle le changement a été observé.
+
+    Args:
+        loader (callable): Retourne (max(id), max(created_at), count(*)) de la table products
+        ttl (float): Durée de validité de la version en mémoire (secondes)
+    """
+
+    def __init__(self, loader, ttl):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def current(self):
+        """Retourne le CatalogState courant, relu en base si expiré"""
+        state = self._state
+        if state is not None and self._expires_at > time.monotonic():
+            return state
+        with self._lock:
+            if self._state is None or self._expires_at <= time.monotonic():
+                generation = self._generation
+                max_id, max_created_at, count = self._loader()
+                self._state = self._next_state(self._state, max_id or 0, max_created_at, count or 0)
+                # Un bump() pendant la lecture rend ce résultat aussitôt périmé
+                if generation == self._generation:
+                    self._expires_at = time.monotonic() + self.ttl
+            return self._state
+
+    @staticmethod
+    def _next_state(previous, max_id, max_created_at, count):
+        etag = f'catalog-{max_id}-{count}'
+        if previous is None:
+            return CatalogState(etag, max_created_at, max_id, count)
+        if previous.etag == etag:
+            return previous
+        last_modified = max_created_at
+        if previous.last_modified is not None and (
+            last_modified is None or last_modified <= previous.last_modified
+        ):
+            # Changement sans created_at plus récent (commit d'un ID inférieur, suppression)
+            last_modified = datetime.utcnow().replace(microsecond=0)
+            if last_modified <= previous.last_modified:
+                last_modified = previous.last_modified + timedelta(seconds=1)
+        return CatalogState(etag, last_modified, max_id, count)
+
+    def bump(self):
+        """Force la relecture de la version après une écriture locale"""
+        self._generation += 1
+        self._expires_at = 0.0
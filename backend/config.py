@@ -22,9 +22,21 @@ class Config:
         'postgresql://postgres:postgres@db:5432/products_db'
     )
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
+    # Réplicas en lecture (séparées par des virgules), déclarées comme binds replica_0, replica_1...
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{index}': url for index, url in enumerate(DATABASE_REPLICA_URLS)}
+    DB_REPLICA_STRATEGY = os.environ.get('DB_REPLICA_STRATEGY', 'round_robin')  # round_robin ou least_connections
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 10))  # Réplique écartée au-delà (secondes, 0 = jamais)
+    DB_REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', 5))
+    DB_READ_YOUR_WRITES_SECONDS = float(os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5))  # Lectures sur le primaire après une écriture
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.environ.get('SQL_ECHO', 'False').lower() == 'true'
-    
+    # Mode ASGI (asgi.py) : même base via le driver asyncio asyncpg
+    ASYNC_DATABASE_URL = os.environ.get(
+        'ASYNC_DATABASE_URL',
+        DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://', 1)
+    )
+
     # Configuration du pool de connexions PostgreSQL
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
@@ -32,16 +44,149 @@ class Config:
         'pool_pre_ping': True,  # Vérifie la connexion avant utilisation
         'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
     }
+    # Budget de connexions PostgreSQL partagé par les pools de tous les workers
+    WORKERS = int(os.environ.get('GUNICORN_WORKERS', 1))
+    THREADS = int(os.environ.get('GUNICORN_THREADS', 1))
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))  # max_connections de PostgreSQL
+    DB_RESERVED_CONNECTIONS = int(os.environ.get('DB_RESERVED_CONNECTIONS', 10))  # psql, exporters, init_db...
+    # Conseiller de taille de pool : off, advise (métriques + logs) ou apply (plafonne au budget)
+    DB_POOL_ADVISOR = os.environ.get('DB_POOL_ADVISOR', 'advise')
+    DB_POOL_ADVISOR_INTERVAL = float(os.environ.get('DB_POOL_ADVISOR_INTERVAL', 60))
     
     # Configuration Jaeger
     JAEGER_AGENT_HOST = os.environ.get('JAEGER_AGENT_HOST', 'jaeger')
     JAEGER_AGENT_PORT = int(os.environ.get('JAEGER_AGENT_PORT', 6831))
     JAEGER_SERVICE_NAME = os.environ.get('JAEGER_SERVICE_NAME', 'backend-service')
-    JAEGER_SAMPLER_TYPE = os.environ.get('JAEGER_SAMPLER_TYPE', 'const')
-    JAEGER_SAMPLER_PARAM = int(os.environ.get('JAEGER_SAMPLER_PARAM', 1))
+    # Sampler hors règles : 5 % des traces (erreurs et requêtes lentes conservées en plus)
+    JAEGER_SAMPLER_TYPE = os.environ.get('JAEGER_SAMPLER_TYPE', 'probabilistic')
+    JAEGER_SAMPLER_PARAM = float(os.environ.get('JAEGER_SAMPLER_PARAM', 0.05))
+    # Reporter de spans : tampon borné (spans abandonnés au-delà), lots UDP, plafonds par span
+    JAEGER_REPORTER_QUEUE_SIZE = int(os.environ.get('JAEGER_REPORTER_QUEUE_SIZE', 1000))
+    JAEGER_REPORTER_BATCH_SIZE = int(os.environ.get('JAEGER_REPORTER_BATCH_SIZE', 50))
+    JAEGER_REPORTER_FLUSH_INTERVAL = float(os.environ.get('JAEGER_REPORTER_FLUSH_INTERVAL', 1.0))
+    JAEGER_MAX_PACKET_SIZE = int(os.environ.get('JAEGER_MAX_PACKET_SIZE', 65000))  # Limite UDP de jaeger-agent
+    JAEGER_MAX_TAG_VALUE_LENGTH = int(os.environ.get('JAEGER_MAX_TAG_VALUE_LENGTH', 1024))
+    JAEGER_MAX_SPAN_TAGS = int(os.environ.get('JAEGER_MAX_SPAN_TAGS', 64))
+    JAEGER_MAX_SPAN_LOGS = int(os.environ.get('JAEGER_MAX_SPAN_LOGS', 32))
+    
+    # Échantillonnage par endpoint : "chemin=type:param,..." (vide = sampler Jaeger seul)
+    # Les routes de FAST_PATH_ROUTES n'ouvrent pas de span : inutile d'y mettre une règle
+    TRACE_SAMPLING_RULES = os.environ.get(
+        'TRACE_SAMPLING_RULES',
+        '/slow=ratelimiting:1,/products/bulk=ratelimiting:1'
+    )
+    # Toujours conserver les réponses 5xx et les requêtes plus lentes que le seuil
+    TRACE_SAMPLE_ERRORS = os.environ.get('TRACE_SAMPLE_ERRORS', 'True').lower() == 'true'
+    TRACE_SLOW_THRESHOLD_MS = float(os.environ.get('TRACE_SLOW_THRESHOLD_MS', 1000))  # 0 = désactivé
+    
+    # Niveau du logger racine (WARNING ou plus pour couper les logs par requête)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Formatter des logs JSON : fast (timestamp en cache, orjson possible) ou standard
+    LOG_FORMATTER = os.environ.get('LOG_FORMATTER', 'fast')
+    LOG_JSON_SERIALIZER = os.environ.get('LOG_JSON_SERIALIZER', 'json')  # json ou orjson
+    
+    # Pipeline de logs asynchrone (QueueHandler / QueueListener)
+    LOG_ASYNC_ENABLED = os.environ.get('LOG_ASYNC_ENABLED', 'True').lower() == 'true'
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_QUEUE_POLICY = os.environ.get('LOG_QUEUE_POLICY', 'drop')  # drop ou block
+    
+    # Expédition directe vers Logstash (entrée tcp / json_lines), désactivée si vide
+    LOGSTASH_HOST = os.environ.get('LOGSTASH_HOST', '')
+    LOGSTASH_PORT = int(os.environ.get('LOGSTASH_PORT', 5000))
+    LOGSTASH_BATCH_SIZE = int(os.environ.get('LOGSTASH_BATCH_SIZE', 200))
+    LOGSTASH_FLUSH_INTERVAL = float(os.environ.get('LOGSTASH_FLUSH_INTERVAL', 1.0))
+    LOGSTASH_BUFFER_SIZE = int(os.environ.get('LOGSTASH_BUFFER_SIZE', 10000))
+    
+    # Routes sans span ni log par requête, séparées par des virgules
+    FAST_PATH_ROUTES = os.environ.get('FAST_PATH_ROUTES', '/health,/health/ready,/metrics')
+    # Durée de réutilisation du résultat de la vérification DB par /health (secondes)
+    HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 10))
+    
+    # Métriques HTTP par requête (http_metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Buckets de latence (secondes) : par défaut, puis par gabarit de route (route=bornes;...)
+    HTTP_LATENCY_BUCKETS = os.environ.get(
+        'HTTP_LATENCY_BUCKETS', '0.005,0.01,0.025,0.05,0.075,0.1,0.25,0.5,0.75,1,2.5,5,7.5,10'
+    )
+    HTTP_ROUTE_LATENCY_BUCKETS = os.environ.get(
+        'HTTP_ROUTE_LATENCY_BUCKETS',
+        '/slow=1,2.5,4,4.5,5,5.5,6,7.5,10,15;'
+        '/products/<int:product_id>=0.001,0.0025,0.005,0.01,0.015,0.02,0.03,0.05,0.1,0.25'
+    )
+    # trace_id des requêtes échantillonnées en exemplar (format OpenMetrics)
+    HTTP_EXEMPLARS_ENABLED = os.environ.get('HTTP_EXEMPLARS_ENABLED', 'True').lower() == 'true'
+    
+    # Sérialisation JSON des réponses : orjson (repli sur default si absent) ou default
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
     
     # Configuration CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
     
     # Simulation de latence pour endpoint /slow
-    SLOW_ENDPOINT_DELAY = int(os.environ.get('SLOW_ENDPOINT_DELAY', 5))
+    SLOW_ENDPOINT_DELAY = float(os.environ.get('SLOW_ENDPOINT_DELAY', 5))
+    
+    # Pagination keyset et streaming de GET /products
+    PRODUCTS_PAGE_SIZE = int(os.environ.get('PRODUCTS_PAGE_SIZE', 100))
+    PRODUCTS_MAX_PAGE_SIZE = int(os.environ.get('PRODUCTS_MAX_PAGE_SIZE', 1000))
+    PRODUCTS_STREAM_BATCH_SIZE = int(os.environ.get('PRODUCTS_STREAM_BATCH_SIZE', 500))
+    # Lecture groupée GET /products?ids= et POST /products/batch-get
+    PRODUCTS_BATCH_MAX_IDS = int(os.environ.get('PRODUCTS_BATCH_MAX_IDS', 500))
+    
+    # Cache read-through de GET /products/<id> (LRU + TTL, Redis partagé optionnel)
+    PRODUCT_CACHE_ENABLED = os.environ.get('PRODUCT_CACHE_ENABLED', 'True').lower() == 'true'
+    PRODUCT_CACHE_SIZE = int(os.environ.get('PRODUCT_CACHE_SIZE', 1024))
+    PRODUCT_CACHE_TTL = float(os.environ.get('PRODUCT_CACHE_TTL', 60))
+    PRODUCT_CACHE_REDIS_URL = os.environ.get('PRODUCT_CACHE_REDIS_URL', '')
+    
+    # Ingestion en masse POST /products/bulk
+    BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))
+    BULK_COPY_THRESHOLD = int(os.environ.get('BULK_COPY_THRESHOLD', 1000))  # 0 = toujours INSERT
+    
+    # Commit groupé de POST /products : créations concurrentes d'un worker en un INSERT multi-lignes
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', 'False').lower() == 'true'
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 2))  # Latence ajoutée au plus
+    GROUP_COMMIT_MAX_ROWS = int(os.environ.get('GROUP_COMMIT_MAX_ROWS', 64))  # Lot plein : insertion sans attendre
+    
+    # Requêtes conditionnelles (ETag / Last-Modified) et cache des pages de GET /products
+    CATALOG_VERSION_TTL = float(os.environ.get('CATALOG_VERSION_TTL', 5))  # Relecture de la version en base (secondes)
+    PRODUCTS_HTTP_MAX_AGE = int(os.environ.get('PRODUCTS_HTTP_MAX_AGE', 0))  # 0 = no-cache (revalidation par ETag)
+    PRODUCTS_LIST_CACHE_SIZE = int(os.environ.get('PRODUCTS_LIST_CACHE_SIZE', 256))  # 0 = désactivé
+    
+    # Recherche GET /products/search : index en mémoire par worker, repli SQL si désactivé ou froid
+    SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', 'True').lower() == 'true'
+    SEARCH_INDEX_MAX_PRODUCTS = int(os.environ.get('SEARCH_INDEX_MAX_PRODUCTS', 200000))
+    
+    # Agrégats GET /products/stats et gauges catalog_* : rattrapage périodique (secondes, 0 = au démarrage seulement)
+    CATALOG_STATS_REFRESH_INTERVAL = float(os.environ.get('CATALOG_STATS_REFRESH_INTERVAL', 30))
+    # Catégories des gauges catalog_* (label borné), les autres regroupées sous category="other"
+    CATALOG_METRICS_CATEGORIES = os.environ.get(
+        'CATALOG_METRICS_CATEGORIES',
+        'Ordinateurs,Smartphones,Audio,Tablettes,Montres,Accessoires,Écrans'
+    )
+    
+    # Télémétrie SQL : requêtes lentes conservées en mémoire, plan EXPLAIN au-delà du second seuil
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_EXPLAIN_MS = float(os.environ.get('SLOW_QUERY_EXPLAIN_MS', 500))  # 0 = pas d'EXPLAIN
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 100))
+    
+    # Contrôle d'admission : délestage en 503 + Retry-After plutôt qu'une file sans fin devant les workers
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'False').lower() == 'true'
+    # Requêtes en cours tous workers confondus (0 = illimité) ; par défaut un thread reste libre pour les sondes
+    ADMISSION_MAX_INFLIGHT = int(os.environ.get('ADMISSION_MAX_INFLIGHT', max(WORKERS * THREADS - 1, 0)))
+    ADMISSION_ROUTE_LIMITS = os.environ.get('ADMISSION_ROUTE_LIMITS', '')  # route=plafond, tous workers confondus (ex: /slow=1)
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 4))  # Attentes par route plafonnée
+    ADMISSION_QUEUE_TIMEOUT_MS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', 1000))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 2))  # En-tête Retry-After (secondes)
+    ADMISSION_PRIORITY_ROUTES = os.environ.get('ADMISSION_PRIORITY_ROUTES', '/health,/health/ready,/metrics')
+    
+    # Jeton des endpoints /admin (en-tête X-Admin-Token), endpoints désactivés si vide
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+    
+    # Profilage par échantillonnage des requêtes (flamegraphs via /admin/profiles)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.01))  # Part des requêtes profilées
+    PROFILING_HEADER = os.environ.get('PROFILING_HEADER', 'X-Profile')  # Force le profilage d'une requête
+    PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', 5))
+    PROFILING_MAX_OVERHEAD = float(os.environ.get('PROFILING_MAX_OVERHEAD', 0.02))  # Part max du temps à échantillonner
+    PROFILING_MAX_CONCURRENT = int(os.environ.get('PROFILING_MAX_CONCURRENT', 4))
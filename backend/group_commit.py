@@ -0,0 +1,133 @@
+"""
+Commit groupé des créations unitaires de produits (POST /products)
+- Les créations concurrentes d'un worker (threads gthread) arrivées dans une
+  courte fenêtre partent en un seul INSERT multi-lignes et un seul COMMIT :
+  une transaction et un flush du WAL pour tout le lot
+- Le premier arrivé (meneur) attend la fenêtre ou le lot plein, insère le lot
+  puis rend à chaque appelant son propre ID
+- Un lot en échec est rejoué ligne par ligne : seule la ligne fautive échoue
+- Taille des lots et latence ajoutée exportées pour régler la fenêtre
+"""
+import threading
+import time
+
+from prometheus_client import Histogram
+
+group_commit_batch_size = Histogram(
+    'group_commit_batch_size',
+    'Créations unitaires regroupées par transaction',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+group_commit_wait_seconds = Histogram(
+    'group_commit_wait_seconds',
+    'Latence ajoutée par le regroupement (arrivée -> début de l\'INSERT du lot)',
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+
+class _Pending:
+    """Création en attente de son lot"""
+
+    __slots__ = ('row', 'id', 'error', 'done', 'batch_size', 'started')
+
+    def __init__(self, row):
+        self.row = row
+        self.id = None
+        self.error = None
+        self.done = False
+        self.batch_size = 0
+        self.started = time.perf_counter()
+
+
+class GroupCommitter:
+    """
+    Regroupe les créations concurrentes d'un processus en transactions communes
+
+    insert_rows est appelé par le thread meneur, dans son propre contexte de
+    requête : il insère les lignes, valide la transaction et retourne les IDs
+    dans l'ordre des lignes (ou annule et lève une exception).
+
+    Args:
+        insert_rows (callable): lignes -> liste des IDs, en une transaction
+        window (float): Attente maximum du meneur avant d'insérer (secondes)
+        max_rows (int): Taille de lot déclenchant l'insertion sans attendre
+    """
+
+    def __init__(self, insert_rows, window, max_rows):
+        self.insert_rows = insert_rows
+        self.window = window
+        self.max_rows = max(1, max_rows)
+        self._cond = threading.Condition()
+        self._batch = []
+
+    def submit(self, row):
+        """
+        Insère une ligne validée avec les créations concurrentes
+
+        Args:
+            row (dict): Colonnes du produit (cf. bulk.validate_row)
+
+        Returns:
+            tuple: (ID du produit, taille du lot)
+
+        Raises:
+            Exception: Erreur d'insertion de cette ligne
+        """
+        pending = _Pending(row)
+        with self._cond:
+            batch = self._batch
+            batch.append(pending)
+            leader = len(batch) == 1
+            if len(batch) >= self.max_rows:
+                # Lot plein et fermé : l'arrivée suivante mène un nouveau lot
+                self._batch = []
+                self._cond.notify_all()
+            if leader:
+                deadline = pending.started + self.window
+                while batch is self._batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._batch = []
+                        break
+                    self._cond.wait(remaining)
+            else:
+                while not pending.done:
+                    self._cond.wait()
+
+        if leader:
+            try:
+                self._run(batch)
+            finally:
+                with self._cond:
+                    for item in batch:
+                        item.done = True
+                    self._cond.notify_all()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.id, pending.batch_size
+
+    def _run(self, batch):
+        """Insère le lot d'un meneur, puis ligne par ligne s'il échoue"""
+        flushed = time.perf_counter()
+        group_commit_batch_size.observe(len(batch))
+        for item in batch:
+            group_commit_wait_seconds.observe(flushed - item.started)
+        try:
+            ids = self.insert_rows([item.row for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                return
+            ids = None
+        if ids is not None:
+            for item, product_id in zip(batch, ids):
+                item.id, item.batch_size = product_id, len(batch)
+            return
+        for item in batch:
+            try:
+                item.id = self.insert_rows([item.row])[0]
+                item.batch_size = 1
+            except Exception as e:
+                item.error = e
@@ -0,0 +1,85 @@
+"""
+Configuration Gunicorn du backend
+- Métriques Prometheus en mode multiprocess (fichiers mmap partagés entre workers)
+- Endpoint /metrics servi par le master sur un port dédié (METRICS_PORT),
+  indépendant des workers occupés par des requêtes lentes comme /slow, avec
+  les exemplars (trace_id) écrits par les workers (http_metrics.py)
+- Préchargement optionnel (GUNICORN_PRELOAD) : l'application est importée une
+  fois par le master, les workers forkés partagent ses pages en copie sur écriture
+"""
+import gc
+import os
+import shutil
+
+# Doit être défini avant le premier import de prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+from prometheus_client import CollectorRegistry, start_http_server  # noqa: E402
+from prometheus_flask_exporter.multiprocess import GunicornPrometheusMetrics  # noqa: E402
+
+from http_metrics import MultiProcessExemplarCollector, remove_exemplars  # noqa: E402
+
+# ============================================================================
+# SERVEUR
+# ============================================================================
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# Visible par les workers : budget de connexions par pool (pool_telemetry)
+os.environ['GUNICORN_WORKERS'] = str(workers)
+# Threads par worker (> 1 : workers gthread) ; visible par app.py (admission)
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+os.environ['GUNICORN_THREADS'] = str(threads)
+# Import de l'application par le master ; visible par app.py (lifecycle.PRELOADED)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+os.environ['GUNICORN_PRELOAD'] = 'true' if preload_app else 'false'
+# Timeout de 120s pour l'endpoint /slow
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+metrics_port = int(os.environ.get('METRICS_PORT', 9200))
+multiproc_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+# Préchargement : l'application (et ses métriques) est importée avant on_starting
+os.makedirs(multiproc_dir, exist_ok=True)
+
+# ============================================================================
+# HOOKS
+# ============================================================================
+def on_starting(server):
+    """Vide le répertoire multiprocess : les fichiers d'un run précédent fausseraient les compteurs"""
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Démarre le serveur /metrics du master, qui agrège les fichiers de tous les
+    workers (format OpenMetrics avec exemplars si le client le demande)
+    """
+    registry = CollectorRegistry()
+    MultiProcessExemplarCollector(multiproc_dir, registry)
+    start_http_server(metrics_port, registry=registry)
+    server.log.info(f'Métriques Prometheus exposées sur le port {metrics_port}')
+
+
+def pre_fork(server, worker):
+    """
+    Gèle les objets du master préchargé : le ramasse-miettes des workers ne les
+    parcourt plus, et n'en touche donc pas les pages partagées
+    """
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Initialisation propre au worker (tracer, threads, pool) de l'application préchargée"""
+    if preload_app:
+        import lifecycle
+        lifecycle.start_worker()
+
+
+def child_exit(server, worker):
+    """Marque le worker comme mort pour les gauges en mode live*, oublie ses exemplars"""
+    GunicornPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
+    remove_exemplars(multiproc_dir, worker.pid)
@@ -0,0 +1,95 @@
+"""
+Résultat de healthcheck mis en cache
+- /health (liveness) réutilise le dernier résultat de la vérification base de
+  données pendant HEALTH_CACHE_TTL secondes
+- /health/ready (readiness) force toujours une vérification complète
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+
+class CachedCheck:
+    """
+    Mémorise le résultat d'une vérification pendant ttl secondes
+
+    Un seul thread exécute la vérification à la fois ; les autres attendent
+    puis réutilisent le résultat qu'il vient de produire.
+
+    Args:
+        check (callable): Retourne (ok, message d'erreur ou None)
+        ttl (float): Durée de validité d'un résultat en secondes
+    """
+
+    def __init__(self, check, ttl):
+        self._check = check
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires_at = 0.0
+
+    def _cached(self, since):
+        """Résultat en cache s'il est encore valide à l'instant since"""
+        if self._result is not None and self._expires_at > since:
+            return dict(self._result, cached=True)
+        return None
+
+    def _store(self, ok, error):
+        self._result = {
+            'ok': ok,
+            'error': error,
+            'checked_at': datetime.utcnow().isoformat(),
+        }
+        self._expires_at = time.monotonic() + self.ttl
+        return dict(self._result, cached=False)
+
+    def get(self, force=False):
+        """
+        Retourne le résultat courant, en relançant la vérification si expiré
+
+        Args:
+            force (bool): Ignorer le cache (readiness)
+
+        Returns:
+            dict: ok, error, checked_at (ISO 8601), cached
+        """
+        started = time.monotonic()
+        if not force:
+            cached = self._cached(started)
+            if cached is not None:
+                return cached
+
+        with self._lock:
+            # Un autre thread a rafraîchi le résultat pendant l'attente du verrou
+            cached = None if force else self._cached(started)
+            if cached is not None:
+                return cached
+            return self._store(*self._check())
+
+
+class AsyncCachedCheck(CachedCheck):
+    """
+    Variante asyncio de CachedCheck (serveur ASGI)
+
+    Args:
+        check (coroutine function): Retourne (ok, message d'erreur ou None)
+        ttl (float): Durée de validité d'un résultat en secondes
+    """
+
+    def __init__(self, check, ttl):
+        super().__init__(check, ttl)
+        self._lock = asyncio.Lock()
+
+    async def get(self, force=False):
+        started = time.monotonic()
+        if not force:
+            cached = self._cached(started)
+            if cached is not None:
+                return cached
+
+        async with self._lock:
+            cached = None if force else self._cached(started)
+            if cached is not None:
+                return cached
+            return self._store(*await self._check())
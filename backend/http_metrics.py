@@ -0,0 +1,311 @@
+"""
+Métriques HTTP partagées par les serveurs WSGI (app.py) et ASGI (asgi.py)
+- Mêmes noms que prometheus-flask-exporter (flask_http_request_*) pour garder
+  dashboards et alertes
+- Label path = gabarit de route (/products/<int:product_id>), jamais le chemin
+  brut : une série par route et non par ID
+- Buckets de latence par route (HTTP_ROUTE_LATENCY_BUCKETS), alignés sur les
+  SLO de chaque route, dans une seule famille de métriques
+- Exemplars OpenMetrics : trace_id Jaeger des requêtes échantillonnées attaché
+  aux observations, y compris sous Gunicorn multiprocess (ExemplarStore)
+"""
+import bisect
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.samples import Exemplar
+from prometheus_client.utils import floatToGoString
+
+DURATION_METRIC = 'flask_http_request_duration_seconds'
+
+STARLETTE_PARAM = re.compile(r'\{(\w+)(?::(\w+))?\}')
+
+# Période d'écriture des exemplars de chaque worker (secondes)
+EXEMPLAR_DUMP_INTERVAL = 5.0
+
+http_request_total = Counter(
+    'flask_http_request_total',
+    'Total number of HTTP requests',
+    ['method', 'status']
+)
+
+http_request_exceptions_total = Counter(
+    'flask_http_request_exceptions_total',
+    'Total number of HTTP requests which resulted in an exception',
+    ['method', 'status']
+)
+
+
+def parse_buckets(text):
+    """
+    Analyse une liste de bornes séparées par des virgules (ex: "0.005,0.01,0.025")
+
+    Returns:
+        tuple: Bornes croissantes (+Inf ajouté par prometheus_client)
+
+    Raises:
+        ValueError: Si une borne est invalide ou la liste vide
+    """
+    try:
+        bounds = sorted({float(bound) for bound in text.split(',') if bound.strip()})
+    except ValueError:
+        bounds = None
+    if not bounds or bounds[-1] == float('inf'):
+        raise ValueError(f'Buckets invalides: {text}')
+    return tuple(bounds)
+
+
+def parse_route_buckets(text):
+    """
+    Analyse HTTP_ROUTE_LATENCY_BUCKETS
+
+    Format : "route=bornes" séparés par des points-virgules, la route étant le
+    gabarit Flask (ex: "/slow=1,2.5,5,7.5;/products/<int:product_id>=0.005,0.01,0.02").
+
+    Returns:
+        dict: route -> tuple des bornes
+
+    Raises:
+        ValueError: Si une entrée est invalide
+    """
+    routes = {}
+    for item in filter(None, (part.strip() for part in text.split(';'))):
+        route, sep, bounds = item.rpartition('=')
+        if not sep or not route.strip():
+            raise ValueError(f'Buckets de route invalides: {item}')
+        routes[route.strip()] = parse_buckets(bounds)
+    return routes
+
+
+def flask_route_template(path):
+    """
+    Gabarit de route Starlette au format Flask (/products/{product_id:int} ->
+    /products/<int:product_id>) : mêmes séries et mêmes buckets qu'en WSGI
+    """
+    return STARLETTE_PARAM.sub(
+        lambda match: f'<{match[2]}:{match[1]}>' if match[2] else f'<{match[1]}>', path
+    )
+
+
+def exemplar_path(directory, pid):
+    """Fichier des exemplars d'un worker dans le répertoire multiprocess"""
+    return os.path.join(directory, f'exemplars_{pid}.json')
+
+
+def remove_exemplars(directory, pid):
+    """Supprime les exemplars d'un worker mort (hook child_exit)"""
+    try:
+        os.remove(exemplar_path(directory, pid))
+    except FileNotFoundError:
+        pass
+
+
+class ExemplarStore:
+    """
+    Dernier exemplar de chaque bucket d'un worker, pour le mode multiprocess
+
+    prometheus_client ignore les exemplars des métriques multiprocess : chaque
+    worker garde ici le dernier par bucket (nombre borné par les gabarits de
+    route) et l'écrit périodiquement dans exemplars_<pid>.json, relu par le
+    /metrics du master (MultiProcessExemplarCollector). Le thread d'écriture
+    démarre au premier exemplar de chaque processus, après un éventuel fork.
+
+    Args:
+        directory (str): Répertoire multiprocess (PROMETHEUS_MULTIPROC_DIR)
+        interval (float): Période d'écriture (secondes)
+    """
+
+    def __init__(self, directory, interval=EXEMPLAR_DUMP_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._exemplars = {}
+        self._dirty = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def record(self, key, trace_id, value):
+        """
+        Args:
+            key (tuple): (nom de l'échantillon _bucket, labels triés par nom)
+            trace_id (str): ID de trace hexadécimal
+            value (float): Valeur observée
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._exemplars = {}
+                threading.Thread(target=self._run, name='exemplar-writer', daemon=True).start()
+            self._exemplars[key] = (trace_id, value, time.time())
+            self._dirty = True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.dump()
+
+    def dump(self):
+        """Écrit les exemplars s'ils ont changé (remplacement atomique du fichier)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [
+                [name, dict(labels), trace_id, value, timestamp]
+                for (name, labels), (trace_id, value, timestamp) in self._exemplars.items()
+            ]
+            self._dirty = False
+        path = exemplar_path(self.directory, os.getpid())
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(entries, f)
+        os.replace(f'{path}.tmp', path)
+
+
+def load_exemplars(directory):
+    """
+    Exemplars de tous les workers, le plus récent par bucket
+
+    Returns:
+        dict: (nom de l'échantillon, labels triés) -> Exemplar
+    """
+    latest = {}
+    for path in glob.glob(os.path.join(directory, 'exemplars_*.json')):
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            # Worker arrêté entre le glob et la lecture
+            continue
+        for name, labels, trace_id, value, timestamp in entries:
+            key = (name, tuple(sorted(labels.items())))
+            if key not in latest or latest[key].timestamp < timestamp:
+                latest[key] = Exemplar({'trace_id': trace_id}, value, timestamp)
+    return latest
+
+
+class MultiProcessExemplarCollector:
+    """
+    MultiProcessCollector qui rattache aux buckets les exemplars des workers
+
+    Exposés seulement au format OpenMetrics (Prometheus avec
+    --enable-feature=exemplar-storage le demande par l'en-tête Accept).
+
+    Args:
+        directory (str): Répertoire multiprocess
+        registry: Registre où s'enregistrer (None : aucun)
+    """
+
+    def __init__(self, directory, registry=REGISTRY):
+        self.directory = directory
+        self._collector = MultiProcessCollector(None, directory)
+        if registry is not None:
+            registry.register(self)
+
+    def collect(self):
+        exemplars = load_exemplars(self.directory)
+        for metric in self._collector.collect():
+            if exemplars and metric.type == 'histogram':
+                metric.samples = [
+                    sample._replace(exemplar=exemplars.get(
+                        (sample.name, tuple(sorted(sample.labels.items()))), sample.exemplar
+                    ))
+                    for sample in metric.samples
+                ]
+            yield metric
+
+
+class HTTPLatencyHistogram:
+    """
+    flask_http_request_duration_seconds{method, path, status} avec des buckets par route
+
+    Un Histogram par jeu de bornes, hors registre ; collect() les expose en une
+    seule famille (Prometheus accepte des buckets différents d'une série à
+    l'autre). En multiprocess, leurs fichiers mmap portent le même nom de
+    métrique et sont fusionnés de la même façon par le master.
+
+    Args:
+        buckets (tuple): Bornes des routes sans configuration propre
+        route_buckets (dict): gabarit de route -> bornes
+        registry: Registre où s'enregistrer (None : aucun)
+        exemplars (bool): Rattacher les trace_id en exemplars
+        exemplar_store (ExemplarStore): Copie des exemplars en multiprocess (None : aucune)
+    """
+
+    def __init__(self, buckets, route_buckets, registry=REGISTRY, exemplars=True, exemplar_store=None):
+        self.exemplars = exemplars
+        self.exemplar_store = exemplar_store
+        profiles = {}
+        for bounds in (tuple(buckets), *route_buckets.values()):
+            if bounds not in profiles:
+                profiles[bounds] = (self._histogram(bounds), bounds)
+        self._default = profiles[tuple(buckets)]
+        self._routes = {route: profiles[bounds] for route, bounds in route_buckets.items()}
+        self._histograms = [histogram for histogram, _ in profiles.values()]
+        if registry is not None:
+            registry.register(self)
+
+    @staticmethod
+    def _histogram(bounds):
+        return Histogram(
+            DURATION_METRIC,
+            'Flask HTTP request duration in seconds',
+            ['method', 'path', 'status'],
+            buckets=bounds,
+            registry=None
+        )
+
+    def collect(self):
+        merged = None
+        for histogram in self._histograms:
+            for family in histogram.collect():
+                if merged is None:
+                    merged = family
+                else:
+                    merged.samples.extend(family.samples)
+        return [merged]
+
+    def observe(self, method, route, status, seconds, trace_id=None):
+        """
+        Args:
+            method (str): Méthode HTTP
+            route (str): Gabarit de route ('unmatched' si aucune ne correspond)
+            status (int): Code de réponse
+            seconds (float): Durée de la requête
+            trace_id (str): Trace à rattacher en exemplar (requête échantillonnée), ou None
+        """
+        histogram, bounds = self._routes.get(route, self._default)
+        child = histogram.labels(method=method, path=route, status=status)
+        if trace_id is None or not self.exemplars:
+            child.observe(seconds)
+            return
+        child.observe(seconds, {'trace_id': trace_id})
+        if self.exemplar_store is not None:
+            index = bisect.bisect_left(bounds, seconds)
+            le = floatToGoString(bounds[index]) if index < len(bounds) else '+Inf'
+            labels = (('le', le), ('method', method), ('path', route), ('status', str(status)))
+            self.exemplar_store.record((f'{DURATION_METRIC}_bucket', labels), trace_id, seconds)
+
+
+def init_request_latency(config):
+    """
+    Crée l'histogramme de latence HTTP configuré
+
+    Args:
+        config (dict): Configuration (app.config ou équivalent)
+
+    Returns:
+        HTTPLatencyHistogram: Histogramme enregistré dans le registre par défaut
+    """
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    exemplar_store = ExemplarStore(multiproc_dir) \
+        if multiproc_dir and config['HTTP_EXEMPLARS_ENABLED'] else None
+    return HTTPLatencyHistogram(
+        parse_buckets(config['HTTP_LATENCY_BUCKETS']),
+        parse_route_buckets(config['HTTP_ROUTE_LATENCY_BUCKETS']),
+        exemplars=config['HTTP_EXEMPLARS_ENABLED'],
+        exemplar_store=exemplar_store
+    )
@@ -5,6 +5,7 @@ Crée les tables et insère 10 produits exemples
 import sys
 from app import app, db, logger
 from models import Product
+from bulk import ingest
 from datetime import datetime
 
 def init_database():
@@ -81,23 +82,25 @@ def init_database():
             logger.info(f'Insertion de {len(sample_products)} produits exemples...')
             print(f'📦 Insertion de {len(sample_products)} produits...')
             
-            # Insérer chaque produit
+            # Insérer les produits par lots via le chemin d'ingestion en masse
+            summary = ingest(
+                db.session,
+                ((i, data, None) for i, data in enumerate(sample_products)),
+                batch_size=app.config['BULK_BATCH_SIZE'],
+                copy_threshold=app.config['BULK_COPY_THRESHOLD'] or None
+            )
+            
+            for error in summary['errors']:
+                product_data = sample_products[error['index']]
+                logger.error(f'Validation échouée pour {product_data.get("name")}: {error["message"]}')
+                print(f'❌ Erreur: {error["message"]}')
+            
+            failed_indexes = {error['index'] for error in summary['errors']}
             for i, product_data in enumerate(sample_products, 1):
-                product = Product.from_dict(product_data)
-                
-                # Valider avant insertion
-                is_valid, message = product.validate()
-                if not is_valid:
-                    logger.error(f'Validation échouée pour {product_data["name"]}: {message}')
-                    print(f'❌ Erreur: {message}')
+                if i - 1 in failed_indexes:
                     continue
-                
-                db.session.add(product)
                 print(f'   {i}. {product_data["name"]} - {product_data["price"]}€')
             
-            # Commit de toutes les insertions
-            db.session.commit()
-            
             # Vérifier le nombre de produits insérés
             total_products = Product.query.count()
             logger.info(f'Base de données initialisée avec {total_products} produits')
@@ -0,0 +1,83 @@
+"""
+Fournisseurs JSON des réponses Flask
+- default : json de la bibliothèque standard (comportement Flask), dates en ISO 8601
+- orjson : sérialisation native en bytes, dates ISO 8601 sans passage par isoformat()
+
+Les deux produisent la même représentation des dates que Product.to_dict() :
+les lignes de colonnes (pagination.fetch_page) peuvent donc garder leurs
+datetime tels quels.
+"""
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+JSON_PROVIDERS = ('default', 'orjson')
+
+
+def _default(o):
+    """Dates en ISO 8601 (Flask les formate par défaut en date HTTP)"""
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class ProductJSONProvider(DefaultJSONProvider):
+    """Fournisseur Flask par défaut, avec les dates au format de l'API"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(ProductJSONProvider):
+    """
+    Fournisseur JSON basé sur orjson
+
+    response() écrit directement les bytes produits par orjson dans la
+    réponse, sans chaîne intermédiaire. Les clés restent triées
+    (sort_keys) pour garder une sortie identique au fournisseur par défaut.
+    """
+
+    def __init__(self, app):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+
+    def _options(self):
+        return self._orjson.OPT_NON_STR_KEYS | (self._orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+
+    def dumps(self, obj, **kwargs):
+        return self._orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._options() | self._orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= self._orjson.OPT_INDENT_2
+        return self._app.response_class(
+            self._orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
+
+
+def json_provider_class(name):
+    """
+    Retourne la classe de fournisseur JSON à installer sur l'application
+
+    Args:
+        name (str): 'default' ou 'orjson' (repli sur default si orjson est absent)
+
+    Raises:
+        ValueError: Si le nom est inconnu
+    """
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Fournisseur JSON inconnu: {name} (attendus : {", ".join(JSON_PROVIDERS)})')
+    if name == 'orjson':
+        try:
+            import orjson  # noqa: F401
+            return OrjsonProvider
+        except ImportError:
+            pass
+    return ProductJSONProvider
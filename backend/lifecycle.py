@@ -0,0 +1,108 @@
+"""
+Démarrage du backend en deux temps, compatible avec gunicorn --preload
+- Initialisation partagée (imports, configuration, données en lecture seule) :
+  faite une seule fois dans le master en mode préchargé, puis partagée par
+  les workers en copie sur écriture
+- Initialisation par worker (after_fork) : tracer, threads, sockets et
+  connexions, qui ne survivent pas à un fork
+- Durée de chaque phase du démarrage exportée en métrique et journalisée
+"""
+import logging
+import os
+import time
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+# Fixé par gunicorn.conf.py (GUNICORN_PRELOAD) : l'application est importée par
+# le master, l'initialisation par worker attend le hook post_fork
+PRELOADED = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+# Même valeur pour tous les workers d'un master préchargé : max sur les workers
+backend_startup_seconds = Gauge(
+    'backend_startup_seconds',
+    'Durée des phases du démarrage (total : somme des phases)',
+    ['phase'],
+    multiprocess_mode='max'
+)
+
+
+class StartupTimer:
+    """
+    Chronomètre des phases du démarrage
+
+    mark(phase) attribue à la phase le temps écoulé depuis la marque précédente :
+    les sections d'initialisation se mesurent sans être réindentées.
+    """
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.phases = {}
+
+    def restart(self):
+        """Repart de maintenant (début de l'initialisation d'un worker forké)"""
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Termine la phase en cours"""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def publish(self):
+        """Exporte les durées en gauges et les journalise"""
+        total = sum(self.phases.values())
+        for phase, seconds in self.phases.items():
+            backend_startup_seconds.labels(phase=phase).set(seconds)
+        backend_startup_seconds.labels(phase='total').set(total)
+        logger.info(
+            f'Démarrage terminé en {total * 1000:.0f} ms',
+            extra={
+                'startup_ms': {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+                'preloaded': PRELOADED
+            }
+        )
+
+
+# Créé à l'import : app.py importe ce module avant ses dépendances, leur
+# temps d'import compte dans la phase 'imports'
+startup = StartupTimer()
+
+_worker_callbacks = []
+_started_pid = None
+
+
+def after_fork(phase):
+    """
+    Enregistre une initialisation propre à chaque worker
+
+    Args:
+        phase (str): Nom de la phase mesurée dans backend_startup_seconds
+
+    Returns:
+        callable: Décorateur (la fonction est retournée inchangée)
+    """
+    def register(callback):
+        _worker_callbacks.append((phase, callback))
+        return callback
+    return register
+
+
+def start_worker():
+    """
+    Exécute les initialisations par worker, une seule fois par processus
+
+    Appelé par le hook post_fork de gunicorn.conf.py en mode préchargé, sinon
+    à la fin de l'import de l'application.
+    """
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    _started_pid = os.getpid()
+    if PRELOADED:
+        startup.restart()
+    for phase, callback in _worker_callbacks:
+        callback()
+        startup.mark(phase)
+    startup.publish()
@@ -0,0 +1,128 @@
+"""
+Formatters JSON des logs du backend
+- CustomJsonFormatter : formatter historique basé sur python-json-logger
+- FastJsonFormatter : même sortie, optimisé pour le chemin chaud
+  (timestamp mis en cache par seconde, champs statiques fusionnés une fois,
+  IDs de trace lus dans le contexte de requête, orjson optionnel)
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+from pythonjsonlogger import jsonlogger
+
+from request_context import current_request
+
+# Champs statiques ajoutés à chaque log
+STATIC_FIELDS = {'service': 'backend'}
+
+# Attributs standard de LogRecord qui ne sont pas des champs "extra"
+_RESERVED_ATTRS = frozenset(jsonlogger.RESERVED_ATTRS) | {'taskName'}
+
+
+def add_trace_ids(log_record):
+    """Ajoute les IDs de trace de la requête en cours (encodés une fois par requête)"""
+    context = current_request()
+    if context is not None and context.trace_id is not None:
+        log_record['trace_id'] = context.trace_id
+        log_record['span_id'] = context.span_id
+
+
+class CustomJsonFormatter(jsonlogger.JsonFormatter):
+    """Format JSON personnalisé avec les champs requis"""
+
+    def add_fields(self, log_record, record, message_dict):
+        super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
+        log_record['timestamp'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        log_record['level'] = record.levelname
+        log_record['service'] = 'backend'
+        if 'trace_id' not in log_record:
+            add_trace_ids(log_record)
+
+
+def get_serializer(name):
+    """
+    Retourne la fonction de sérialisation dict -> str
+
+    Args:
+        name (str): 'json' (stdlib) ou 'orjson' (repli sur json si absent)
+    """
+    if name == 'orjson':
+        try:
+            import orjson
+
+            def dumps(log_record):
+                return orjson.dumps(log_record, default=str).decode('utf-8')
+
+            return dumps
+        except ImportError:
+            pass
+
+    def dumps(log_record):
+        return json.dumps(log_record, default=str)
+
+    return dumps
+
+
+class FastJsonFormatter(logging.Formatter):
+    """
+    Formatter JSON à coût réduit, compatible avec CustomJsonFormatter
+
+    Args:
+        static_fields (dict): Champs constants ajoutés à chaque log
+        serializer (str): 'json' ou 'orjson'
+    """
+
+    def __init__(self, static_fields=None, serializer='json'):
+        super().__init__()
+        self._static_fields = dict(STATIC_FIELDS if static_fields is None else static_fields)
+        self._dumps = get_serializer(serializer)
+        self._timestamp_cache = (None, '')
+
+    def _timestamp(self, created):
+        """Horodatage UTC à la seconde, recalculé une fois par seconde"""
+        second = int(created)
+        cached = self._timestamp_cache
+        if cached[0] != second:
+            cached = (second, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second)))
+            self._timestamp_cache = cached
+        return cached[1]
+
+    def format(self, record):
+        log_record = {
+            'timestamp': self._timestamp(record.created),
+            'level': record.levelname,
+        }
+        log_record.update(self._static_fields)
+        log_record['message'] = record.getMessage()
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                log_record[key] = value
+
+        if record.exc_info:
+            log_record['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record['exc_info'] = record.exc_text
+        if record.stack_info:
+            log_record['stack_info'] = self.formatStack(record.stack_info)
+
+        # Les logs passés par la file asynchrone portent déjà leurs IDs de trace
+        if 'trace_id' not in log_record:
+            add_trace_ids(log_record)
+
+        return self._dumps(log_record)
+
+
+def build_formatter(name, serializer='json'):
+    """
+    Construit le formatter configuré
+
+    Args:
+        name (str): 'fast' ou 'standard'
+        serializer (str): 'json' ou 'orjson' (formatter 'fast' uniquement)
+    """
+    if name == 'standard':
+        return CustomJsonFormatter('%(timestamp)s %(level)s %(service)s %(message)s')
+    return FastJsonFormatter(serializer=serializer)
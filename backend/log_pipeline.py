@@ -0,0 +1,213 @@
+"""
+Pipeline de logs asynchrone du backend
+- QueueHandler borné : les threads de requête ne font qu'un put() en mémoire
+- QueueListener : formatage JSON et écriture stdout sur un thread dédié
+- Politique drop (par défaut) ou block quand la file est pleine
+- Expédition directe optionnelle vers l'entrée tcp/json_lines de Logstash, par lots
+- Threads redémarrés dans les processus forkés (workers gunicorn --preload)
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+
+from prometheus_client import Counter
+
+from request_context import current_request
+
+log_records_dropped_total = Counter(
+    'log_records_dropped_total',
+    'Nombre de logs abandonnés par le pipeline asynchrone',
+    ['reason']
+)
+
+log_records_shipped_total = Counter(
+    'log_records_shipped_total',
+    'Nombre de logs expédiés à Logstash en TCP'
+)
+
+_exception_formatter = logging.Formatter()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler sur une file bornée avec politique de saturation
+
+    prepare() s'exécute sur le thread de la requête : il fige le message,
+    la trace et l'exception pour que le formatage puisse se faire plus tard
+    sur le thread du listener, hors du contexte de la requête.
+
+    Args:
+        log_queue (queue.Queue): File bornée partagée avec le listener
+        policy (str): 'drop' pour abandonner, 'block' pour attendre de la place
+    """
+
+    def __init__(self, log_queue, policy='drop'):
+        super().__init__(log_queue)
+        self.block = policy == 'block'
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        context = current_request()
+        if context is not None and context.trace_id is not None and 'trace_id' not in record.__dict__:
+            record.trace_id, record.span_id = context.trace_id, context.span_id
+        return record
+
+    def enqueue(self, record):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.labels(reason='queue_full').inc()
+
+
+class LogstashTCPHandler(logging.Handler):
+    """
+    Expédie les logs formatés vers Logstash (codec json_lines) par lots
+
+    emit() ne fait qu'ajouter la ligne à un tampon borné ; un thread dédié
+    envoie les lots sur une connexion TCP persistante, se reconnecte en cas
+    d'erreur et abandonne les lignes les plus anciennes si le tampon déborde.
+
+    Args:
+        host (str): Hôte Logstash
+        port (int): Port de l'entrée tcp de logstash/pipeline.conf
+        batch_size (int): Nombre maximum de lignes par envoi
+        flush_interval (float): Délai maximum entre deux envois (secondes)
+        buffer_size (int): Nombre maximum de lignes en attente
+    """
+
+    def __init__(self, host, port, batch_size=200, flush_interval=1.0, buffer_size=10000):
+        super().__init__()
+        self.address = (host, port)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque()
+        self._buffer_size = buffer_size
+        self._cond = threading.Condition()
+        self._sock = None
+        self._closed = False
+        self._start_thread()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, name='logstash-shipper', daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        """
+        Processus enfant : le thread d'envoi n'existe plus
+
+        Le tampon (déjà expédié par le parent) est vidé, le verrou recréé (il a
+        pu être copié pris) et la connexion rouverte par un nouveau thread.
+        """
+        self._buffer.clear()
+        self._cond = threading.Condition()
+        if self._sock is not None:
+            # Ferme la copie du descripteur : la connexion du parent reste ouverte
+            self._sock.close()
+            self._sock = None
+        if not self._closed:
+            self._start_thread()
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + '\n'
+        except Exception:
+            self.handleError(record)
+            return
+        with self._cond:
+            if len(self._buffer) >= self._buffer_size:
+                self._buffer.popleft()
+                log_records_dropped_total.labels(reason='tcp_buffer_full').inc()
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_batch(self):
+        with self._cond:
+            if len(self._buffer) < self.batch_size and not self._closed:
+                self._cond.wait(self.flush_interval)
+            count = min(len(self._buffer), self.batch_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _send(self, batch):
+        payload = ''.join(batch).encode('utf-8')
+        for attempt in range(2):
+            try:
+                if self._sock is None:
+                    self._sock = socket.create_connection(self.address, timeout=5)
+                self._sock.sendall(payload)
+                log_records_shipped_total.inc(len(batch))
+                return
+            except OSError:
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+        log_records_dropped_total.labels(reason='tcp_error').inc(len(batch))
+        # Attendre avant de retenter la connexion
+        time.sleep(self.flush_interval)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._send(batch)
+            elif self._closed:
+                break
+
+    def close(self):
+        """Envoie les lignes restantes puis ferme la connexion"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        super().close()
+
+
+def install_async_handlers(logger, handlers, queue_size, policy):
+    """
+    Remplace les handlers synchrones par un QueueHandler + QueueListener
+
+    Args:
+        logger (logging.Logger): Logger racine
+        handlers (list): Handlers exécutés sur le thread du listener
+        queue_size (int): Capacité de la file
+        policy (str): 'drop' ou 'block'
+
+    Returns:
+        QueueListener: Listener démarré (arrêté automatiquement à la sortie)
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    handler = BoundedQueueHandler(log_queue, policy)
+    logger.addHandler(handler)
+    listener.start()
+
+    def restart_after_fork():
+        # Processus enfant : file neuve (celle du parent est déjà traitée
+        # par son listener, et son verrou a pu être copié pris), nouveau thread
+        handler.queue = listener.queue = queue.Queue(maxsize=queue_size)
+        listener._thread = None
+        listener.start()
+
+    os.register_at_fork(after_in_child=restart_after_fork)
+    atexit.register(listener.stop)
+    return listener
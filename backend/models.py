@@ -4,8 +4,10 @@ Modèles de données SQLAlchemy pour la base de données PostgreSQL
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
-# Instance SQLAlchemy partagée
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+# Instance SQLAlchemy partagée (SELECT des routes en lecture seule aiguillés vers une réplique)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Product(db.Model):
     """
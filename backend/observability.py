@@ -0,0 +1,185 @@
+"""
+Instrumentation d'observabilité partagée par les serveurs WSGI (app.py) et ASGI (asgi.py)
+- Configuration du logger JSON structuré
+- Initialisation du tracer Jaeger (reporter UDP borné, span_reporter.py)
+- Métriques Prometheus personnalisées
+"""
+import atexit
+import logging
+import sys
+
+import opentracing
+from jaeger_client import Config as JaegerConfig
+from jaeger_client.reporter import CompositeReporter, LoggingReporter
+from prometheus_client import Counter, Gauge
+
+from log_format import build_formatter
+from log_pipeline import LogstashTCPHandler, install_async_handlers
+from sampling import EndpointSampler, build_sampler, parse_rules
+from span_reporter import UDPSpanReporter
+
+# ============================================================================
+# CONFIGURATION DU LOGGER JSON STRUCTURÉ
+# ============================================================================
+def setup_logging(config):
+    """
+    Configure le logger avec format JSON structuré
+    
+    En mode asynchrone (LOG_ASYNC_ENABLED), les threads de requête déposent
+    les enregistrements dans une file bornée ; le formatage et les écritures
+    (stdout, Logstash TCP) se font sur le thread d'un QueueListener.
+    
+    Args:
+        config: Classe de configuration (config.Config)
+        
+    Returns:
+        logger: Logger racine configuré
+    """
+    logger = logging.getLogger()
+    logger.setLevel(config.LOG_LEVEL)
+    
+    # Handler pour stdout
+    log_handler = logging.StreamHandler(sys.stdout)
+    
+    # Format JSON avec les champs requis (formatter 'fast' ou 'standard')
+    formatter = build_formatter(config.LOG_FORMATTER, config.LOG_JSON_SERIALIZER)
+    log_handler.setFormatter(formatter)
+    handlers = [log_handler]
+    
+    # Expédition directe optionnelle vers l'entrée tcp/json_lines de Logstash
+    if config.LOGSTASH_HOST:
+        logstash_handler = LogstashTCPHandler(
+            config.LOGSTASH_HOST,
+            config.LOGSTASH_PORT,
+            batch_size=config.LOGSTASH_BATCH_SIZE,
+            flush_interval=config.LOGSTASH_FLUSH_INTERVAL,
+            buffer_size=config.LOGSTASH_BUFFER_SIZE
+        )
+        logstash_handler.setFormatter(formatter)
+        handlers.append(logstash_handler)
+    
+    if config.LOG_ASYNC_ENABLED:
+        install_async_handlers(
+            logger,
+            handlers,
+            queue_size=config.LOG_QUEUE_SIZE,
+            policy=config.LOG_QUEUE_POLICY
+        )
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    
+    return logger
+
+# ============================================================================
+# INITIALISATION JAEGER TRACING
+# ============================================================================
+def init_jaeger_tracer(config, scope_manager=None):
+    """
+    Initialise le tracer Jaeger pour le tracing distribué
+    
+    Les spans partent par UDPSpanReporter (tampon borné, lots, plafonds par
+    span, métriques tracing_*), vidé à la sortie du processus.
+    
+    Args:
+        config (dict): Configuration (app.config ou équivalent)
+        scope_manager: ScopeManager OpenTracing (défaut : thread-local)
+        
+    Returns:
+        tracer: Instance du tracer
+    """
+    # Sampler par défaut, éventuellement surchargé par endpoint (TRACE_SAMPLING_RULES)
+    sampler = build_sampler(config['JAEGER_SAMPLER_TYPE'], config['JAEGER_SAMPLER_PARAM'])
+    if config['TRACE_SAMPLING_RULES']:
+        sampler = EndpointSampler(sampler, parse_rules(config['TRACE_SAMPLING_RULES']))
+    
+    jaeger_config = JaegerConfig(
+        config={
+            'local_agent': {
+                'reporting_host': config['JAEGER_AGENT_HOST'],
+                'reporting_port': config['JAEGER_AGENT_PORT'],
+            },
+            'logging': True,
+            # Même plafond que le reporter, qui compte les valeurs tronquées
+            'max_tag_value_length': config['JAEGER_MAX_TAG_VALUE_LENGTH'],
+        },
+        service_name=config['JAEGER_SERVICE_NAME'],
+        validate=True,
+        scope_manager=scope_manager,
+    )
+    
+    reporter = UDPSpanReporter(
+        config['JAEGER_AGENT_HOST'],
+        config['JAEGER_AGENT_PORT'],
+        queue_size=config['JAEGER_REPORTER_QUEUE_SIZE'],
+        batch_size=config['JAEGER_REPORTER_BATCH_SIZE'],
+        flush_interval=config['JAEGER_REPORTER_FLUSH_INTERVAL'],
+        max_packet_size=config['JAEGER_MAX_PACKET_SIZE'],
+        max_tag_length=config['JAEGER_MAX_TAG_VALUE_LENGTH'],
+        max_tags=config['JAEGER_MAX_SPAN_TAGS'],
+        max_logs=config['JAEGER_MAX_SPAN_LOGS']
+    )
+    # Envoi des derniers spans à l'arrêt du worker
+    atexit.register(reporter.close)
+    
+    # Sampler passé au tracer : la clé 'sampler' de la configuration attend un dict
+    tracer = jaeger_config.create_tracer(
+        reporter=CompositeReporter(reporter, LoggingReporter(logging.getLogger('jaeger_tracing'))),
+        sampler=sampler
+    )
+    opentracing.tracer = tracer
+    
+    logging.getLogger(__name__).info(
+        'Jaeger tracer initialisé',
+        extra={
+            'jaeger_host': config['JAEGER_AGENT_HOST'],
+            'jaeger_port': config['JAEGER_AGENT_PORT']
+        }
+    )
+    
+    return tracer
+
+# ============================================================================
+# MÉTRIQUES PERSONNALISÉES
+# ============================================================================
+# Requêtes SQL
+db_queries_total = Counter(
+    'database_queries_total',
+    'Nombre total de requêtes SQL',
+    ['operation', 'table']
+)
+
+# Chaque worker a son propre pool : somme sur les workers vivants
+db_connection_pool = Gauge(
+    'database_connection_pool',
+    'État du pool de connexions PostgreSQL',
+    ['status'],
+    multiprocess_mode='livesum'
+)
+
+product_cache_events_total = Counter(
+    'product_cache_events_total',
+    'Événements du cache produits (hit, miss, eviction)',
+    ['event', 'tier']
+)
+
+trace_sampling_decisions_total = Counter(
+    'trace_sampling_decisions_total',
+    'Décisions d\'échantillonnage des traces de requêtes',
+    ['decision', 'route']
+)
+
+# Agrégats du catalogue : chaque worker publie les mêmes valeurs, le max suffit
+catalog_products = Gauge(
+    'catalog_products',
+    'Nombre de produits par catégorie',
+    ['category'],
+    multiprocess_mode='livemax'
+)
+
+catalog_price = Gauge(
+    'catalog_price',
+    'Statistiques de prix par catégorie (min, max, avg, p50, p95)',
+    ['category', 'stat'],
+    multiprocess_mode='livemax'
+)
@@ -0,0 +1,263 @@
+"""
+Pagination par curseur (keyset) et export en streaming du catalogue produits
+- Pagination sur products.id (?limit=&after=) sans OFFSET
+- Filtres category / created_at qui s'appuient sur les index de init.sql
+- Streaming NDJSON ou tableau JSON chunké depuis un curseur serveur (yield_per)
+- Lecture des seules colonnes de l'API : pas d'instance ORM par ligne
+- Lecture groupée par IDs (?ids=1,2,3) en une requête id = ANY(:ids)
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models import Product
+
+# Colonnes exposées par l'API (mêmes clés que Product.to_dict)
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.price, Product.category, Product.created_at)
+
+# Formats de streaming supportés et leur Content-Type
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+class PaginationError(ValueError):
+    """Paramètre de pagination ou de filtre invalide (réponse 400)"""
+
+
+def _parse_int(args, name, minimum):
+    """Lit un paramètre entier optionnel et vérifie sa borne inférieure"""
+    raw = args.get(name)
+    if raw is None or raw == '':
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        raise PaginationError(f"Le paramètre '{name}' doit être un entier")
+    if value < minimum:
+        raise PaginationError(f"Le paramètre '{name}' doit être >= {minimum}")
+    return value
+
+
+def _parse_datetime(args, name):
+    """Lit un paramètre date ISO 8601 optionnel"""
+    raw = args.get(name)
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise PaginationError(f"Le paramètre '{name}' doit être une date ISO 8601")
+
+
+def parse_product_query(args, default_limit, max_limit):
+    """
+    Extrait les paramètres de pagination et de filtre de la query string
+
+    Args:
+        args: request.args
+        default_limit (int): Taille de page par défaut
+        max_limit (int): Taille de page maximale autorisée
+
+    Returns:
+        dict: limit, after, category, created_after, created_before, stream
+
+    Raises:
+        PaginationError: Si un paramètre est invalide
+    """
+    stream = args.get('stream')
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise PaginationError(
+            f"Le paramètre 'stream' doit valoir {' ou '.join(STREAM_FORMATS)}"
+        )
+
+    limit = _parse_int(args, 'limit', 1)
+    if limit is None:
+        # En streaming l'export complet est le cas nominal : pas de limite par défaut
+        limit = None if stream else default_limit
+    elif not stream:
+        limit = min(limit, max_limit)
+
+    return {
+        'limit': limit,
+        'after': _parse_int(args, 'after', 0),
+        'category': args.get('category') or None,
+        'created_after': _parse_datetime(args, 'created_after'),
+        'created_before': _parse_datetime(args, 'created_before'),
+        'stream': stream,
+    }
+
+
+def parse_product_ids(raw, max_ids):
+    """
+    Lit une liste d'IDs produits ('1,2,3' ou liste JSON), sans doublons, ordre conservé
+
+    Args:
+        raw: Chaîne séparée par des virgules ou liste d'entiers
+        max_ids (int): Nombre maximum d'IDs distincts
+
+    Returns:
+        list: IDs dans l'ordre de la demande
+
+    Raises:
+        PaginationError: Si un ID est invalide ou s'il y en a trop
+    """
+    items = raw.split(',') if isinstance(raw, str) else raw
+    if not isinstance(items, list):
+        raise PaginationError("'ids' doit être une liste d'entiers")
+    ids = []
+    for item in items:
+        if isinstance(item, str):
+            item = item.strip()
+            if not item:
+                continue
+        try:
+            product_id = int(item)
+        except (TypeError, ValueError):
+            raise PaginationError(f"ID produit invalide: {item!r}")
+        if isinstance(item, (bool, float)) or product_id < 1:
+            raise PaginationError(f"ID produit invalide: {item!r}")
+        ids.append(product_id)
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise PaginationError("'ids' ne contient aucun ID")
+    if len(ids) > max_ids:
+        raise PaginationError(f"'ids' est limité à {max_ids} IDs distincts")
+    return ids
+
+
+def fetch_products_by_ids(session, ids):
+    """
+    Lit plusieurs produits en une requête
+
+    Sur PostgreSQL, id = ANY(:ids) lie un seul tableau : le texte SQL est le
+    même quel que soit le nombre d'IDs (un seul plan, une seule empreinte).
+    Ailleurs, IN (...) étendu.
+
+    Returns:
+        dict: id -> dict aux clés de Product.to_dict (created_at en ISO 8601,
+        comme les entrées du cache produits)
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        condition = Product.id == any_(bindparam('ids', ids, type_=ARRAY(Integer)))
+    else:
+        condition = Product.id.in_(ids)
+    rows = session.execute(select(*PRODUCT_COLUMNS).where(condition)).all()
+    return {
+        row.id: dict(row._asdict(), created_at=row.created_at.isoformat() if row.created_at else None)
+        for row in rows
+    }
+
+
+def product_filters(params):
+    """
+    Conditions WHERE de la requête keyset
+
+    Les filtres d'égalité sur category et de plage sur created_at peuvent
+    utiliser idx_products_category / idx_products_created_at, la clé primaire
+    sert au tri et au curseur.
+
+    Args:
+        params (dict): Résultat de parse_product_query
+
+    Returns:
+        list: Expressions SQLAlchemy
+    """
+    conditions = []
+    if params['after'] is not None:
+        conditions.append(Product.id > params['after'])
+    if params['category'] is not None:
+        conditions.append(Product.category == params['category'])
+    if params['created_after'] is not None:
+        conditions.append(Product.created_at >= params['created_after'])
+    if params['created_before'] is not None:
+        conditions.append(Product.created_at < params['created_before'])
+    return conditions
+
+
+def build_product_query(params):
+    """
+    Construit le SELECT keyset des colonnes de l'API, trié sur products.id
+
+    Les lignes retournées sont des tuples nommés : ni instance ORM, ni
+    identity map, ni to_dict() par ligne.
+
+    Returns:
+        Select: Requête SQLAlchemy (sans LIMIT)
+    """
+    return select(*PRODUCT_COLUMNS).where(*product_filters(params)).order_by(Product.id)
+
+
+def build_product_select(params):
+    """
+    Construit le SELECT keyset trié sur products.id (SQLAlchemy 2.0, sessions async)
+
+    Returns:
+        Select: Requête SQLAlchemy (sans LIMIT)
+    """
+    return select(Product).where(*product_filters(params)).order_by(Product.id)
+
+
+def fetch_page(session, query, limit):
+    """
+    Récupère une page et le curseur de la page suivante
+
+    Une ligne supplémentaire est demandée pour savoir s'il reste des
+    résultats sans exécuter de COUNT. created_at reste un datetime : le
+    fournisseur JSON de l'application le sérialise en ISO 8601.
+
+    Args:
+        session: Session SQLAlchemy
+        query: Requête construite par build_product_query
+        limit (int): Taille de page
+
+    Returns:
+        tuple: (liste de dict, curseur suivant ou None)
+    """
+    rows = session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return [row._asdict() for row in rows], next_cursor
+
+
+def stream_products(session, query, fmt, batch_size, limit=None, dumps=json.dumps):
+    """
+    Générateur qui sérialise les produits au fil de l'eau
+
+    Le curseur serveur (yield_per) ne matérialise que batch_size lignes à la
+    fois : la mémoire reste constante quelle que soit la taille de la table.
+
+    Args:
+        session: Session SQLAlchemy
+        query: Requête construite par build_product_query
+        fmt (str): 'ndjson' ou 'json'
+        batch_size (int): Nombre de lignes lues par aller-retour
+        limit (int): Nombre maximum de lignes (optionnel)
+        dumps (callable): Sérialiseur dict -> str gérant les datetime (app.json.dumps)
+
+    Yields:
+        str: Morceaux de la réponse HTTP
+    """
+    if limit is not None:
+        query = query.limit(limit)
+    rows = session.execute(query.execution_options(yield_per=batch_size))
+
+    if fmt == 'ndjson':
+        for row in rows:
+            yield dumps(row._asdict()) + '\n'
+        return
+
+    yield '['
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            yield dumps(row._asdict())
+        else:
+            yield ',' + dumps(row._asdict())
+    yield ']'
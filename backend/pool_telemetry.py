@@ -0,0 +1,253 @@
+"""
+Télémétrie et dimensionnement du pool de connexions SQLAlchemy
+- Événements du pool (connect, checkout, checkin, invalidate) : compteurs et
+  état du pool mis à jour en continu, pas seulement au healthcheck
+- Temps d'attente des checkouts (pool saturé, ouverture d'une connexion)
+- Échecs de pre-ping et timeouts de checkout
+- Conseiller : tailles recommandées d'après la concurrence observée,
+  plafonnées par le budget max_connections de PostgreSQL partagé entre workers
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from observability import db_connection_pool
+
+logger = logging.getLogger(__name__)
+
+ADVISOR_MODES = ('off', 'advise', 'apply')
+
+pool_checkout_wait_seconds = Histogram(
+    'database_pool_checkout_wait_seconds',
+    'Temps d\'attente pour obtenir une connexion du pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+pool_events_total = Counter(
+    'database_pool_events_total',
+    'Événements du pool de connexions',
+    ['event']
+)
+
+# Par worker : le maximum sur les workers vivants est la valeur utile
+pool_checked_out_peak = Gauge(
+    'database_pool_checked_out_peak',
+    'Connexions utilisées simultanément au maximum sur la dernière fenêtre',
+    multiprocess_mode='livemax'
+)
+
+pool_recommended = Gauge(
+    'database_pool_recommended',
+    'Taille de pool recommandée par worker',
+    ['setting'],
+    multiprocess_mode='livemax'
+)
+
+
+class _TimedCheckoutMixin:
+    """Mesure le temps passé dans _do_get : attente d'une connexion libre ou ouverture"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_events_total.labels(event='checkout_timeout').inc()
+            raise
+        finally:
+            pool_checkout_wait_seconds.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool (serveur WSGI) avec mesure du temps d'attente des checkouts"""
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool (serveur ASGI) avec mesure du temps d'attente des checkouts"""
+
+
+def fit_pool_to_budget(pool_size, max_overflow, workers, max_connections, reserved):
+    """
+    Réduit pool_size / max_overflow pour que tous les workers tiennent dans max_connections
+
+    Args:
+        pool_size (int): Connexions permanentes par worker
+        max_overflow (int): Connexions supplémentaires par worker
+        workers (int): Nombre de processus ayant chacun leur pool
+        max_connections (int): max_connections de PostgreSQL
+        reserved (int): Connexions laissées aux autres clients (psql, exporter...)
+
+    Returns:
+        tuple: (pool_size, max_overflow) ajustés
+    """
+    per_worker = max(1, (max_connections - reserved) // max(1, workers))
+    if pool_size + max_overflow <= per_worker:
+        return pool_size, max_overflow
+    pool_size = min(pool_size, per_worker)
+    return pool_size, per_worker - pool_size
+
+
+class PoolAdvisor:
+    """
+    Recommande pool_size / max_overflow à partir de la concurrence observée
+
+    Le pic de connexions utilisées simultanément est relevé à chaque
+    checkout ; à la fin de chaque fenêtre, pool_size recommandé = plus haut
+    pic des dernières fenêtres, max_overflow = 50 % de ce pic, le tout dans
+    la limite du budget par worker.
+
+    Args:
+        pool_size (int): pool_size configuré
+        max_overflow (int): max_overflow configuré
+        workers (int): Nombre de workers partageant le budget
+        max_connections (int): max_connections de PostgreSQL
+        reserved (int): Connexions réservées aux autres clients
+        interval (float): Durée d'une fenêtre d'observation (secondes)
+        windows (int): Nombre de fenêtres prises en compte
+    """
+
+    def __init__(self, pool_size, max_overflow, workers, max_connections, reserved,
+                 interval=60.0, windows=10):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.workers = workers
+        self.per_worker_budget = max(1, (max_connections - reserved) // max(1, workers))
+        self.interval = interval
+        self._peaks = deque(maxlen=windows)
+        self._peak = 0
+        self._window_end = time.monotonic() + interval
+        self._lock = threading.Lock()
+        self.recommendation = None
+
+        if pool_size + max_overflow > self.per_worker_budget:
+            logger.warning(
+                f'Pool trop grand pour PostgreSQL : {workers} workers × ({pool_size} + {max_overflow}) '
+                f'connexions > {max_connections - reserved} disponibles',
+                extra={'workers': workers, 'max_connections': max_connections}
+            )
+
+    def observe(self, checked_out):
+        """Enregistre le nombre de connexions utilisées lors d'un checkout"""
+        with self._lock:
+            if checked_out > self._peak:
+                self._peak = checked_out
+            if time.monotonic() < self._window_end:
+                return
+            peak = self._peak
+            self._peaks.append(peak)
+            observed = max(self._peaks)
+            self._peak = 0
+            self._window_end = time.monotonic() + self.interval
+        self._recommend(peak, observed)
+
+    def _recommend(self, last_peak, observed):
+        pool_size = min(max(1, observed), self.per_worker_budget)
+        max_overflow = max(0, min(self.per_worker_budget - pool_size, math.ceil(observed * 0.5)))
+        self.recommendation = (pool_size, max_overflow)
+
+        pool_checked_out_peak.set(last_peak)
+        pool_recommended.labels(setting='pool_size').set(pool_size)
+        pool_recommended.labels(setting='max_overflow').set(max_overflow)
+
+        if (pool_size, max_overflow) != (self.pool_size, self.max_overflow):
+            logger.info(
+                f'Pool recommandé : pool_size={pool_size}, max_overflow={max_overflow} '
+                f'(configuré : {self.pool_size} / {self.max_overflow}, pic observé : {observed})',
+                extra={'observed_peak': observed, 'workers': self.workers}
+            )
+
+
+def instrument_engine(engine, advisor=None):
+    """
+    Branche les métriques du pool sur les événements SQLAlchemy de l'engine
+
+    Les écouteurs enregistrés sur l'engine suivent le pool recréé par dispose().
+
+    Args:
+        engine: Engine SQLAlchemy (engine.sync_engine pour un AsyncEngine)
+        advisor (PoolAdvisor): Conseiller de dimensionnement (optionnel)
+    """
+
+    def update_state():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            return
+        checked_out = pool.checkedout()
+        db_connection_pool.labels(status='size').set(pool.size())
+        db_connection_pool.labels(status='checked_out').set(checked_out)
+        db_connection_pool.labels(status='idle').set(pool.checkedin())
+        db_connection_pool.labels(status='overflow').set(max(0, pool.overflow()))
+        return checked_out
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        pool_events_total.labels(event='connect').inc()
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_events_total.labels(event='checkout').inc()
+        checked_out = update_state()
+        if advisor is not None and checked_out is not None:
+            advisor.observe(checked_out)
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        pool_events_total.labels(event='checkin').inc()
+        update_state()
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        # Un pre-ping en échec invalide la connexion avec InvalidatePoolError
+        if isinstance(exception, exc.InvalidatePoolError):
+            pool_events_total.labels(event='pre_ping_failure').inc()
+        else:
+            pool_events_total.labels(event='invalidate').inc()
+
+    @event.listens_for(engine, 'soft_invalidate')
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        pool_events_total.labels(event='soft_invalidate').inc()
+
+
+def configure_pool(config, poolclass=InstrumentedQueuePool):
+    """
+    Options d'engine instrumentées, ajustées au budget de connexions si demandé
+
+    Args:
+        config: Configuration (mapping : app.config ou équivalent)
+        poolclass: Classe de pool instrumentée (WSGI ou asyncio)
+
+    Returns:
+        tuple: (options d'engine, PoolAdvisor ou None)
+    """
+    options = dict(config['SQLALCHEMY_ENGINE_OPTIONS'], poolclass=poolclass)
+    # Valeurs par défaut de QueuePool si la configuration ne les précise pas
+    options.setdefault('pool_size', 5)
+    options.setdefault('max_overflow', 10)
+    mode = config['DB_POOL_ADVISOR']
+    if mode not in ADVISOR_MODES:
+        raise ValueError(f'DB_POOL_ADVISOR inconnu: {mode} (attendus : {", ".join(ADVISOR_MODES)})')
+    if mode == 'off':
+        return options, None
+
+    budget = (config['WORKERS'], config['DB_MAX_CONNECTIONS'], config['DB_RESERVED_CONNECTIONS'])
+    if mode == 'apply':
+        pool_size, max_overflow = fit_pool_to_budget(
+            options['pool_size'], options['max_overflow'], *budget
+        )
+        if (pool_size, max_overflow) != (options['pool_size'], options['max_overflow']):
+            logger.warning(
+                f'Pool réduit au budget de connexions : pool_size={pool_size}, max_overflow={max_overflow}'
+            )
+        options.update(pool_size=pool_size, max_overflow=max_overflow)
+
+    advisor = PoolAdvisor(
+        options['pool_size'], options['max_overflow'], *budget,
+        interval=config['DB_POOL_ADVISOR_INTERVAL']
+    )
+    return options, advisor
@@ -0,0 +1,176 @@
+"""
+Profilage par échantillonnage des requêtes (flamegraphs à la demande)
+- Requêtes profilées choisies au hasard (PROFILING_SAMPLE_RATE) ou par en-tête
+- Un thread échantillonneur relève la pile des seuls threads profilés
+  (sys._current_frames), sans dépendance ni hook de trace par appel
+- Piles agrégées par route au format « collapsed » (flamegraph.pl, speedscope)
+- Coût borné : l'intervalle s'allonge pour que le temps d'échantillonnage
+  reste sous PROFILING_MAX_OVERHEAD du temps écoulé, et il est exporté en métrique
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from prometheus_client import Counter as MetricCounter, Gauge
+
+# Profondeur maximale d'une pile relevée
+MAX_DEPTH = 128
+
+# Entrée regroupant les piles au-delà de max_stacks piles distinctes par route
+OVERFLOW_STACK = '[autres piles]'
+
+profiled_requests_total = MetricCounter(
+    'profiled_requests_total',
+    'Requêtes profilées par route',
+    ['route']
+)
+
+profiling_sampler_seconds_total = MetricCounter(
+    'profiling_sampler_seconds_total',
+    'Temps passé par le thread échantillonneur à relever les piles (coût du profilage)'
+)
+
+profiling_interval_seconds = Gauge(
+    'profiling_interval_seconds',
+    'Intervalle d\'échantillonnage effectif, allongé si le coût dépasse le plafond',
+    multiprocess_mode='livemax'
+)
+
+
+class SamplingProfiler:
+    """
+    Échantillonneur de piles des requêtes profilées, propre à chaque worker
+
+    Le thread échantillonneur dort tant qu'aucune requête n'est profilée.
+    Pendant qu'il relève les piles il tient le GIL : son coût relatif
+    (temps de relevé / intervalle) est plafonné à max_overhead.
+
+    Args:
+        interval (float): Intervalle d'échantillonnage nominal (secondes)
+        max_overhead (float): Part maximale du temps passée à échantillonner (0.02 = 2 %)
+        max_concurrent (int): Requêtes profilées simultanément au maximum
+        max_stacks (int): Piles distinctes conservées par route
+    """
+
+    def __init__(self, interval, max_overhead, max_concurrent, max_stacks=5000):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_concurrent = max_concurrent
+        self.max_stacks = max_stacks
+        self.current_interval = interval
+        self._active = {}
+        self._stacks = {}
+        self._requests = Counter()
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, route):
+        """
+        Profile la requête du thread courant
+
+        Returns:
+            bool: False si le plafond de requêtes profilées simultanées est atteint
+        """
+        with self._lock:
+            if len(self._active) >= self.max_concurrent:
+                return False
+            self._active[threading.get_ident()] = route
+            self._requests[route] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        profiled_requests_total.labels(route=route).inc()
+        self._wakeup.set()
+        return True
+
+    def stop(self):
+        """Arrête le profilage du thread courant (sans effet s'il n'était pas profilé)"""
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            # Dossier parent conservé : flask/app.py et le app.py du backend restent distincts
+            path = os.path.join(*code.co_filename.split(os.sep)[-2:])
+            label = f'{code.co_name} ({path}:{code.co_firstlineno})'
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, frame):
+        """Pile d'appels au format collapsed : racine d'abord, frames séparées par ';'"""
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ';'.join(labels)
+
+    def _sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, route in self._active.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = self._collapse(frame)
+                stacks = self._stacks.setdefault(route, Counter())
+                if stack not in stacks and len(stacks) >= self.max_stacks:
+                    stack = OVERFLOW_STACK
+                stacks[stack] += 1
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    continue
+            started = time.perf_counter()
+            self._sample()
+            cost = time.perf_counter() - started
+            profiling_sampler_seconds_total.inc(cost)
+            # cost / intervalle <= max_overhead
+            self.current_interval = max(self.interval, cost / self.max_overhead)
+            profiling_interval_seconds.set(self.current_interval)
+            time.sleep(self.current_interval)
+
+    def summary(self):
+        """Requêtes profilées et échantillons relevés par route"""
+        with self._lock:
+            return {
+                route: {'requests': count, 'samples': sum(self._stacks.get(route, Counter()).values())}
+                for route, count in self._requests.items()
+            }
+
+    def collapsed(self, route=None):
+        """
+        Piles agrégées au format collapsed (une ligne « pile nombre »)
+
+        Args:
+            route (str): Route voulue ; toutes par défaut, la route devenant
+                la frame racine de chaque pile
+
+        Returns:
+            str: Entrée de flamegraph.pl / speedscope
+        """
+        with self._lock:
+            if route is not None:
+                items = self._stacks.get(route, Counter()).items()
+            else:
+                items = [
+                    (f'{name};{stack}', count)
+                    for name, stacks in self._stacks.items()
+                    for stack, count in stacks.items()
+                ]
+            return ''.join(f'{stack} {count}\n' for stack, count in sorted(items))
+
+    def reset(self):
+        """Oublie les piles et compteurs accumulés"""
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
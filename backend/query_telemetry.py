@@ -0,0 +1,239 @@
+"""
+Instrumentation automatique des requêtes SQL (événements d'engine SQLAlchemy)
+- before/after_cursor_execute : latence par empreinte de requête et par table
+- Span enfant par requête avec le SQL paramétré réellement exécuté
+- Journal circulaire des requêtes lentes, avec plan EXPLAIN capturé en
+  arrière-plan au-delà d'un second seuil
+- Empreintes mises en cache : une requête déjà vue ne coûte qu'un accès au cache
+"""
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+import opentracing
+from opentracing.ext import tags as ot_tags
+from prometheus_client import Histogram
+from sqlalchemy import event
+
+from observability import db_queries_total
+from request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, les nouvelles empreintes sont regroupées sous 'other' (cardinalité bornée)
+MAX_FINGERPRINTS = 500
+
+# Option d'exécution : False désactive l'instrumentation (requêtes EXPLAIN elles-mêmes)
+TELEMETRY_OPTION = 'query_telemetry'
+
+EXPLAIN_PREFIXES = {'postgresql': 'EXPLAIN ', 'sqlite': 'EXPLAIN QUERY PLAN '}
+EXPLAINABLE_OPERATIONS = frozenset(('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'))
+
+db_query_duration_seconds = Histogram(
+    'database_query_duration_seconds',
+    'Durée des requêtes SQL par empreinte de requête',
+    ['operation', 'table', 'fingerprint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\?|\$\d+|(?<!:):\w+")
+_SPACES = re.compile(r'\s+')
+_TUPLE = r'\(\?(?:, \?)*\)'
+_REPEATED_TUPLES = re.compile(rf'({_TUPLE})(?:, {_TUPLE})+')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, \?)+\)', re.IGNORECASE)
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?(\w+)', re.IGNORECASE)
+
+_known_fingerprints = {}
+_known_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """
+    Normalise une requête SQL en empreinte stable
+
+    Littéraux et paramètres deviennent ?, les listes de VALUES / IN répétées
+    sont réduites à un seul tuple : les lots d'INSERT de tailles différentes
+    partagent la même empreinte.
+
+    Returns:
+        tuple: (identifiant court, texte normalisé, opération, table)
+    """
+    text = _PLACEHOLDERS.sub('?', _LITERALS.sub('?', statement))
+    text = _SPACES.sub(' ', text).strip()
+    text = _IN_LIST.sub('IN (?, ...)', _REPEATED_TUPLES.sub(r'\1, ...', text))
+    operation = text.split(' ', 1)[0].upper() if text else 'UNKNOWN'
+    match = _TABLE.search(text)
+    table = match.group(1).lower() if match else 'none'
+    fingerprint_id = hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+    with _known_lock:
+        if fingerprint_id not in _known_fingerprints:
+            if len(_known_fingerprints) >= MAX_FINGERPRINTS:
+                fingerprint_id = 'other'
+            else:
+                _known_fingerprints[fingerprint_id] = text
+    return fingerprint_id, text, operation, table
+
+
+def known_fingerprints():
+    """Empreintes observées : identifiant -> texte normalisé"""
+    with _known_lock:
+        return dict(_known_fingerprints)
+
+
+class SlowQueryLog:
+    """
+    Journal circulaire des requêtes plus lentes qu'un seuil
+
+    Au-delà de explain_threshold, le plan de la requête est capturé par un
+    thread dédié, sur une autre connexion du pool : la requête HTTP n'attend
+    pas l'EXPLAIN. Chaque empreinte est expliquée au plus une fois par
+    explain_interval secondes.
+
+    Args:
+        engine: Engine SQLAlchemy utilisé pour les EXPLAIN
+        size (int): Nombre de requêtes conservées
+        threshold (float): Seuil de lenteur en secondes
+        explain_threshold (float): Seuil de capture du plan en secondes (0 = jamais)
+        explain_interval (float): Délai minimum entre deux EXPLAIN d'une même empreinte
+    """
+
+    def __init__(self, engine, size, threshold, explain_threshold, explain_interval=300.0):
+        self.engine = engine
+        self.threshold = threshold
+        self.explain_threshold = explain_threshold
+        self.explain_interval = explain_interval
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._explained_at = {}
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._thread = None
+
+    def record(self, fingerprint_id, operation, statement, parameters, duration, executemany):
+        """Conserve la requête si elle dépasse le seuil, et planifie son EXPLAIN"""
+        if duration < self.threshold:
+            return
+        context = current_request()
+        entry = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'fingerprint': fingerprint_id,
+            'statement': statement,
+            'parameters': repr(parameters)[:500],
+            'trace_id': context.trace_id if context is not None else None,
+            'plan': None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            f'Requête SQL lente ({entry["duration_ms"]} ms)',
+            extra={'fingerprint': fingerprint_id, 'duration_ms': entry['duration_ms']}
+        )
+
+        if executemany or operation not in EXPLAINABLE_OPERATIONS:
+            return
+        if not self.explain_threshold or duration < self.explain_threshold:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(fingerprint_id, -self.explain_interval) < self.explain_interval:
+                return
+            self._explained_at[fingerprint_id] = now
+            # Thread absent aussi après un fork (démarré par le master préchargé)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._explain_worker, name='slow-query-explain', daemon=True)
+                self._thread.start()
+        try:
+            self._explain_queue.put_nowait((entry, statement, parameters))
+        except queue.Full:
+            pass
+
+    def _explain_worker(self):
+        prefix = EXPLAIN_PREFIXES.get(self.engine.dialect.name, 'EXPLAIN ')
+        while True:
+            entry, statement, parameters = self._explain_queue.get()
+            try:
+                with self.engine.connect() as conn:
+                    rows = conn.exec_driver_sql(
+                        prefix + statement, parameters,
+                        execution_options={TELEMETRY_OPTION: False}
+                    ).all()
+                entry['plan'] = [' '.join(str(column) for column in row) for row in rows]
+            except Exception as e:
+                entry['plan'] = [f'EXPLAIN impossible: {str(e)}']
+
+    def entries(self):
+        """Requêtes lentes, de la plus récente à la plus ancienne"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries)]
+
+
+def _sampled(span):
+    """Span Jaeger échantillonné (None et spans no-op du tracer par défaut : non)"""
+    is_sampled = getattr(span, 'is_sampled', None)
+    return is_sampled is not None and is_sampled()
+
+
+def instrument_queries(engine, slow_log=None):
+    """
+    Branche métriques, spans et journal des requêtes lentes sur l'engine
+
+    Args:
+        engine: Engine SQLAlchemy (engine.sync_engine pour un AsyncEngine)
+        slow_log (SlowQueryLog): Journal des requêtes lentes (optionnel)
+    """
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and not context.execution_options.get(TELEMETRY_OPTION, True):
+            return
+        scope = None
+        # Span SQL seulement sous un span échantillonné : l'enfant d'un span non
+        # échantillonné n'est jamais envoyé, même si la requête est promue ensuite
+        # (promotion du seul span de requête)
+        if _sampled(opentracing.tracer.active_span):
+            fingerprint_id, _, operation, table = fingerprint(statement)
+            scope = opentracing.tracer.start_active_span(f'{operation} {table}')
+            span = scope.span
+            span.set_tag(ot_tags.SPAN_KIND, ot_tags.SPAN_KIND_RPC_CLIENT)
+            span.set_tag(ot_tags.COMPONENT, 'sqlalchemy')
+            span.set_tag(ot_tags.DATABASE_TYPE, 'sql')
+            span.set_tag(ot_tags.DATABASE_STATEMENT, statement)
+            span.set_tag('db.fingerprint', fingerprint_id)
+        conn.info.setdefault('query_telemetry', []).append((time.perf_counter(), scope))
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and not context.execution_options.get(TELEMETRY_OPTION, True):
+            return
+        started, scope = conn.info['query_telemetry'].pop()
+        duration = time.perf_counter() - started
+
+        fingerprint_id, _, operation, table = fingerprint(statement)
+        db_query_duration_seconds.labels(
+            operation=operation, table=table, fingerprint=fingerprint_id
+        ).observe(duration)
+        db_queries_total.labels(operation=operation, table=table).inc()
+        if slow_log is not None:
+            slow_log.record(fingerprint_id, operation, statement, parameters, duration, executemany)
+        if scope is not None:
+            scope.close()
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        conn = context.connection
+        if conn is None or not conn.info.get('query_telemetry'):
+            return
+        _, scope = conn.info['query_telemetry'].pop()
+        if scope is not None:
+            scope.span.set_tag(ot_tags.ERROR, True)
+            scope.span.log_kv({'event': 'error', 'error.object': context.original_exception})
+            scope.close()
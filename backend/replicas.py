@@ -0,0 +1,152 @@
+"""
+Lectures sur réplique(s) PostgreSQL et séparation lecture / écriture
+- Réplicas déclarées comme binds Flask-SQLAlchemy (DATABASE_REPLICA_URLS)
+- Routes en lecture seule (GET, HEAD) servies par une réplique saine, choisie
+  en tourniquet ou selon le moins de connexions en cours
+- Read-your-writes : après une écriture, les lectures du même client restent
+  sur le primaire pendant une courte fenêtre (cookie)
+- Vérification périodique de chaque réplique (SELECT, retard de réplication),
+  exportée en métriques ; une réplique en panne ou trop en retard est écartée
+"""
+import itertools
+import logging
+import threading
+import time
+
+from flask_sqlalchemy.session import Session
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Clé de Session.info désignant l'engine des lectures de la requête
+READ_ENGINE_KEY = 'read_engine'
+
+STRATEGIES = ('round_robin', 'least_connections')
+
+# Retard de réplication (secondes) : nul si tout le WAL reçu est rejoué, même
+# quand le primaire n'écrit plus (pg_last_xact_replay_timestamp vieillit alors)
+LAG_QUERIES = {
+    'postgresql': text(
+        'SELECT CASE WHEN NOT pg_is_in_recovery() '
+        'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+    ),
+}
+
+replica_lag_seconds = Gauge(
+    'database_replica_lag_seconds',
+    'Retard de réplication mesuré par réplique',
+    ['replica'],
+    multiprocess_mode='livemax'
+)
+
+# Une réplique vue en panne par un seul worker apparaît en panne
+replica_healthy = Gauge(
+    'database_replica_healthy',
+    'Réplique joignable et sous le retard maximum (1) ou écartée (0)',
+    ['replica'],
+    multiprocess_mode='livemin'
+)
+
+read_routing_total = Counter(
+    'database_read_routing_total',
+    'Aiguillage des requêtes en lecture seule',
+    ['decision']
+)
+
+
+class RoutingSession(Session):
+    """
+    Session qui envoie les SELECT vers l'engine de lecture choisi pour la requête
+
+    Les écritures, le flush et les requêtes textuelles (SELECT 1 des sondes)
+    restent sur le primaire, comme toute requête hors route en lecture seule.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        read_engine = self.info.get(READ_ENGINE_KEY)
+        if read_engine is not None and bind is None and not self._flushing \
+                and getattr(clause, 'is_select', False):
+            return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaSet:
+    """
+    Réplicas en lecture, propres à chaque worker
+
+    Toutes sont supposées saines jusqu'à la première vérification.
+
+    Args:
+        engines (dict): nom -> Engine de chaque réplique
+        strategy (str): round_robin ou least_connections
+        max_lag (float): Retard au-delà duquel une réplique est écartée (secondes, 0 = jamais)
+    """
+
+    def __init__(self, engines, strategy, max_lag):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Stratégie de réplique inconnue: {strategy}')
+        self.engines = dict(engines)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.healthy = list(self.engines)
+        self.lag = dict.fromkeys(self.engines, 0.0)
+        self._turn = itertools.count()
+
+    def choose(self):
+        """
+        Réplique de la requête courante
+
+        Returns:
+            tuple: (nom, Engine), ou None si aucune réplique n'est saine
+        """
+        healthy = self.healthy
+        if not healthy:
+            return None
+        if self.strategy == 'least_connections':
+            name = min(healthy, key=lambda name: self.engines[name].pool.checkedout())
+        else:
+            name = healthy[next(self._turn) % len(healthy)]
+        return name, self.engines[name]
+
+    def check(self):
+        """Vérifie chaque réplique et met à jour la liste des saines et les gauges"""
+        healthy = []
+        for name, engine in self.engines.items():
+            try:
+                with engine.connect() as conn:
+                    query = LAG_QUERIES.get(engine.dialect.name)
+                    lag = float(conn.execute(query).scalar() or 0) if query is not None else 0.0
+            except Exception as e:
+                if name in self.healthy:
+                    logger.warning(f'Réplique {name} injoignable: {str(e)}', extra={'replica': name})
+                replica_healthy.labels(replica=name).set(0)
+                continue
+            self.lag[name] = lag
+            replica_lag_seconds.labels(replica=name).set(lag)
+            ok = not self.max_lag or lag <= self.max_lag
+            if not ok and name in self.healthy:
+                logger.warning(
+                    f'Réplique {name} écartée : retard de {lag:.1f} s',
+                    extra={'replica': name, 'lag_seconds': lag}
+                )
+            replica_healthy.labels(replica=name).set(1 if ok else 0)
+            if ok:
+                healthy.append(name)
+        # Remplacement d'un bloc : choose() lit la liste sans verrou
+        self.healthy = healthy
+
+    def start_checker(self, interval):
+        """
+        Vérifie les réplicas tout de suite puis toutes les interval secondes
+
+        Args:
+            interval (float): Période de vérification
+        """
+        def run():
+            while True:
+                self.check()
+                time.sleep(interval)
+
+        threading.Thread(target=run, name='replica-health-check', daemon=True).start()
@@ -0,0 +1,92 @@
+"""
+Contexte de requête partagé par les logs, les métriques et le tracing
+- Posé une fois par requête par le middleware (hooks Flask de app.py,
+  ObservabilityMiddleware de asgi.py) dans une contextvar
+- Span de la requête, IDs de trace en hexadécimal calculés une seule fois,
+  méthode, chemin et route
+- Lecture à coût constant (un ContextVar.get()), sans flask.g ni verrou,
+  identique en thread (WSGI) et en tâche asyncio (ASGI)
+"""
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('request_context', default=None)
+
+
+def span_ids(span):
+    """(trace_id, span_id) en hexadécimal, ou (None, None) pour un span sans IDs"""
+    try:
+        ctx = span.context
+        return format(ctx.trace_id, 'x'), format(ctx.span_id, 'x')
+    except (AttributeError, TypeError, ValueError):
+        return None, None
+
+
+class RequestContext:
+    """
+    Données d'observabilité d'une requête en cours
+
+    Attributes:
+        span: Span de la requête (actif dans le scope manager pendant la requête)
+        trace_id (str): ID de trace hexadécimal (None si le span n'en a pas)
+        span_id (str): ID du span de la requête, hexadécimal
+        method (str): Méthode HTTP
+        path (str): Chemin demandé
+        route (str): Gabarit de route ('unmatched' si aucune route ne correspond)
+        started (float): Début de la requête (time.perf_counter)
+        admission: Créneaux du contrôle d'admission tenus par la requête (admission.py)
+    """
+
+    __slots__ = (
+        'span', 'trace_id', 'span_id', 'method', 'path', 'route', 'started', 'admission',
+        '_token', '_scope'
+    )
+
+    def __init__(self, span, method, path, route):
+        self.span = span
+        self.trace_id, self.span_id = span_ids(span)
+        self.method = method
+        self.path = path
+        self.route = route
+        self.started = time.perf_counter()
+        self.admission = None
+        self._token = None
+        self._scope = None
+
+    def elapsed(self):
+        """Secondes écoulées depuis le début de la requête"""
+        return time.perf_counter() - self.started
+
+
+def current_request():
+    """Contexte de la requête en cours, ou None hors requête"""
+    return _current.get()
+
+
+def enter_request(tracer, span, method, path, route):
+    """
+    Ouvre le contexte de la requête et active son span
+
+    Les spans créés ensuite par start_active_span (handlers, requêtes SQL)
+    sont les enfants du span de la requête.
+
+    Args:
+        tracer: Tracer OpenTracing dont le scope manager activera le span
+        span: Span de la requête, terminé par l'appelant
+        method (str): Méthode HTTP
+        path (str): Chemin demandé
+        route (str): Gabarit de route
+
+    Returns:
+        RequestContext: Contexte à refermer par exit_request()
+    """
+    context = RequestContext(span, method, path, route)
+    context._token = _current.set(context)
+    context._scope = tracer.scope_manager.activate(span, finish_on_close=False)
+    return context
+
+
+def exit_request(context):
+    """Désactive le span et referme le contexte, dans le contexte qui l'a ouvert"""
+    context._scope.close()
+    _current.reset(context._token)
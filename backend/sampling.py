@@ -0,0 +1,120 @@
+"""
+Échantillonnage des traces par endpoint
+- Règles par chemin (ex: /health limité en débit, probabiliste ailleurs)
+- Taux flottants supportés (ex: probabilistic:0.05)
+- Les requêtes en erreur ou plus lentes qu'un seuil sont toujours conservées :
+  leur span de requête est promu "sampled" avant d'être terminé
+"""
+from jaeger_client.sampler import (
+    ConstSampler, ProbabilisticSampler, RateLimitingSampler, Sampler
+)
+
+SAMPLER_TYPES = ('const', 'probabilistic', 'ratelimiting')
+
+
+def build_sampler(sampler_type, param):
+    """
+    Construit un sampler Jaeger à partir d'un type et d'un paramètre
+
+    Args:
+        sampler_type (str): const, probabilistic ou ratelimiting
+        param (float): Décision (const), taux (probabilistic) ou traces/s (ratelimiting)
+
+    Raises:
+        ValueError: Si le type est inconnu
+    """
+    if sampler_type == 'const':
+        return ConstSampler(decision=bool(float(param)))
+    if sampler_type == 'probabilistic':
+        return ProbabilisticSampler(rate=float(param))
+    if sampler_type in ('ratelimiting', 'rate_limiting'):
+        return RateLimitingSampler(max_traces_per_second=float(param))
+    raise ValueError(f'Type de sampler inconnu: {sampler_type}')
+
+
+def parse_rules(text):
+    """
+    Analyse TRACE_SAMPLING_RULES
+
+    Format : "chemin=type:param" séparés par des virgules. Un chemin terminé
+    par * est un préfixe. Exemple : "/health=ratelimiting:0.1,/products*=probabilistic:0.2"
+
+    Returns:
+        list: [(chemin, est_préfixe, sampler)] dans l'ordre de déclaration
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        try:
+            path, spec = item.split('=', 1)
+            sampler_type, param = spec.split(':', 1)
+        except ValueError:
+            raise ValueError(f'Règle d\'échantillonnage invalide: {item}')
+        path = path.strip()
+        is_prefix = path.endswith('*')
+        rules.append((path.rstrip('*'), is_prefix, build_sampler(sampler_type.strip(), param)))
+    return rules
+
+
+class EndpointSampler(Sampler):
+    """
+    Sampler Jaeger qui délègue à un sampler par endpoint
+
+    Le nom d'opération des spans de requête est "MÉTHODE /chemin" : le
+    chemin est comparé aux règles, sinon le sampler par défaut s'applique.
+
+    Args:
+        default (Sampler): Sampler utilisé hors règles
+        rules (list): Résultat de parse_rules
+    """
+
+    def __init__(self, default, rules):
+        super().__init__()
+        self.default = default
+        self.rules = rules
+        self._exact = {path: sampler for path, is_prefix, sampler in rules if not is_prefix}
+        self._prefixes = [(path, sampler) for path, is_prefix, sampler in rules if is_prefix]
+
+    def sampler_for(self, operation):
+        """Retourne le sampler applicable à un nom d'opération"""
+        path = operation.partition(' ')[2] or operation
+        sampler = self._exact.get(path)
+        if sampler is not None:
+            return sampler
+        for prefix, sampler in self._prefixes:
+            if path.startswith(prefix):
+                return sampler
+        return self.default
+
+    def is_sampled(self, trace_id, operation=''):
+        return self.sampler_for(operation).is_sampled(trace_id, operation)
+
+    def close(self):
+        self.default.close()
+        for _, _, sampler in self.rules:
+            sampler.close()
+
+    def __str__(self):
+        return f'EndpointSampler(default={self.default}, rules={len(self.rules)})'
+
+
+def promotion_reason(span, status_code, duration, slow_threshold, sample_errors):
+    """
+    Indique si un span de requête non échantillonné doit être conservé
+
+    Args:
+        span: Span de la requête
+        status_code (int): Code HTTP de la réponse
+        duration (float): Durée de la requête en secondes
+        slow_threshold (float): Seuil de lenteur en secondes (0 = désactivé)
+        sample_errors (bool): Conserver les réponses 5xx
+
+    Returns:
+        str: 'error', 'slow' ou None
+    """
+    if span.is_sampled():
+        return None
+    if sample_errors and status_code >= 500:
+        return 'error'
+    if slow_threshold and duration >= slow_threshold:
+        return 'slow'
+    return None
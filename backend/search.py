@@ -0,0 +1,540 @@
+"""
+Recherche plein texte et à facettes dans le catalogue produits
+- Index inversé en mémoire sur les mots de Product.name (préfixe sur le dernier mot)
+- Index de facettes sur la catégorie et le prix (plages de PRICE_RANGES)
+- Construit au démarrage, complété à chaque création et rattrapé d'après
+  max(id) et count(*) pour les écritures des autres workers
+- Repli SQL tant que l'index est froid : tsvector sur PostgreSQL
+  (idx_products_name_fts de init.sql), LIKE ailleurs ; noms et requête
+  normalisés comme dans l'index (minuscules, sans accents, mots entiers sauf
+  le dernier en préfixe) pour donner les mêmes résultats
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from prometheus_client import Counter as MetricCounter, Gauge
+from sqlalchemy import and_, case, event, func, select
+
+from models import Product
+from pagination import PRODUCT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SORTS = ('relevance', 'price_asc', 'price_desc', 'name', 'newest')
+
+# Plages de la facette prix : [min, max[ (None = sans borne haute)
+PRICE_RANGES = ((0, 50), (50, 100), (100, 500), (500, 1000), (1000, None))
+
+search_requests_total = MetricCounter(
+    'product_search_requests_total',
+    'Recherches de produits par source de résultats',
+    ['source']
+)
+
+search_index_documents = Gauge(
+    'product_search_index_documents',
+    'Produits présents dans l\'index de recherche en mémoire',
+    multiprocess_mode='livemax'
+)
+
+_WORDS = re.compile(r'\w+')
+
+# Nom normalisé côté SQL : unaccent(lower()) sur PostgreSQL (init.sql), mots
+# de tokenize() sur SQLite (register_fold_function)
+FOLD_FUNCTION = 'products_fold'
+
+# Engine PostgreSQL -> FOLD_FUNCTION présente (base initialisée par init.sql)
+_fold_available = {}
+
+
+class SearchError(ValueError):
+    """Paramètre de recherche invalide (réponse 400)"""
+
+
+def tokenize(text, fold_accents=True):
+    """
+    Découpe un texte en mots minuscules
+
+    Args:
+        text (str): Texte à découper
+        fold_accents (bool): Supprime les accents ('Écrans' -> 'ecrans')
+
+    Returns:
+        list: Mots, dans l'ordre du texte
+    """
+    text = text.lower()
+    if fold_accents:
+        text = ''.join(
+            c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c)
+        )
+    return _WORDS.findall(text)
+
+
+def _parse_number(args, name, parse, minimum):
+    """Lit un paramètre numérique optionnel et vérifie sa borne inférieure"""
+    raw = args.get(name)
+    if raw is None or raw == '':
+        return None
+    try:
+        value = parse(raw)
+    except ValueError:
+        raise SearchError(f"Le paramètre '{name}' doit être un nombre")
+    if value < minimum:
+        raise SearchError(f"Le paramètre '{name}' doit être >= {minimum}")
+    return value
+
+
+def parse_search_query(args, default_limit, max_limit):
+    """
+    Extrait les paramètres de recherche de la query string
+
+    Args:
+        args: request.args
+        default_limit (int): Taille de page par défaut
+        max_limit (int): Taille de page maximale autorisée
+
+    Returns:
+        dict: q, category, min_price, max_price, sort, limit, offset
+
+    Raises:
+        SearchError: Si un paramètre est invalide
+    """
+    sort = args.get('sort') or 'relevance'
+    if sort not in SORTS:
+        raise SearchError(f"Le paramètre 'sort' doit valoir {', '.join(SORTS)}")
+    min_price = _parse_number(args, 'min_price', float, 0)
+    max_price = _parse_number(args, 'max_price', float, 0)
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise SearchError("'min_price' doit être inférieur ou égal à 'max_price'")
+    limit = _parse_number(args, 'limit', int, 1)
+
+    return {
+        'q': (args.get('q') or '').strip(),
+        'category': args.get('category') or None,
+        'min_price': min_price,
+        'max_price': max_price,
+        'sort': sort,
+        'limit': min(limit, max_limit) if limit is not None else default_limit,
+        'offset': _parse_number(args, 'offset', int, 0) or 0,
+    }
+
+
+def _price_range_index(price):
+    """Indice de la plage de PRICE_RANGES contenant ce prix"""
+    for index, (low, high) in enumerate(PRICE_RANGES):
+        if high is None or price < high:
+            return index
+    return len(PRICE_RANGES) - 1
+
+
+def _price_facet(counts):
+    return [
+        {'min': low, 'max': high, 'count': counts.get(index, 0)}
+        for index, (low, high) in enumerate(PRICE_RANGES)
+    ]
+
+
+def _in_price(price, params):
+    return (
+        (params['min_price'] is None or price >= params['min_price'])
+        and (params['max_price'] is None or price <= params['max_price'])
+    )
+
+
+class ProductSearchIndex:
+    """
+    Index de recherche des produits, propre à chaque worker
+
+    Un produit n'est jamais modifié ni supprimé par l'API : l'index ne fait
+    que croître, et max_id (plus grand ID chargé en base) suffit pour savoir
+    ce qu'il reste à indexer.
+    Les recherches et les ajouts sont sérialisés par un verrou ; une
+    recherche ne parcourt que les ensembles d'IDs des mots demandés.
+
+    Args:
+        loader (callable): loader(after_id) -> lignes (id, name, price, category, created_at)
+            d'ID > after_id, triées par ID
+        max_documents (int): Au-delà, l'index est abandonné au profit du repli SQL
+    """
+
+    def __init__(self, loader, max_documents):
+        self._loader = loader
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._docs = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._categories = {}
+        self._price_ranges = {}
+        self.max_id = 0
+        self.ready = False
+        self.disabled = False
+
+    def _add(self, product):
+        product_id = product['id']
+        if product_id in self._docs:
+            return
+        self._docs[product_id] = product
+        for token in set(tokenize(product['name'])):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            postings.add(product_id)
+        self._categories.setdefault(product['category'], set()).add(product_id)
+        self._price_ranges.setdefault(_price_range_index(product['price']), set()).add(product_id)
+
+    def add(self, product):
+        """
+        Indexe un produit créé par ce worker (dict aux clés de Product.to_dict)
+
+        max_id n'avance qu'au chargement ; un produit d'un autre worker d'ID
+        inférieur, validé plus tard, est rattrapé par catch_up() d'après count.
+        """
+        if not self.ready:
+            return
+        with self._lock:
+            self._add(product)
+            count = len(self._docs)
+        search_index_documents.set(count)
+
+    def catch_up(self, max_id=None, count=None):
+        """
+        Indexe les produits validés depuis le dernier chargement
+
+        Les ID > max_id indexé sont lus en premier (quelques lignes). Les IDs
+        étant attribués avant le commit, un ID inférieur peut être validé
+        après un ID supérieur déjà indexé : si la table compte alors plus de
+        produits que l'index, elle est relue en entier pour indexer ceux qui
+        manquent.
+
+        Args:
+            max_id (int): max(id) connu de la table ; rien à faire s'il est déjà indexé
+            count (int): Nombre de produits de la table (None : pas de recherche de trous)
+
+        Returns:
+            bool: True si l'index est prêt
+        """
+        if self.disabled or (
+            max_id is not None and max_id <= self.max_id
+            and (count is None or count <= len(self._docs))
+        ):
+            return self.ready
+        if not self._build_lock.acquire(blocking=False):
+            return self.ready
+        try:
+            if not self._load(self._loader(self.max_id)):
+                return False
+            if count is not None and len(self._docs) < count:
+                missing = count - len(self._docs)
+                logger.info(
+                    f'Index de recherche : {missing} produits validés hors ordre, relecture complète',
+                    extra={'missing': missing}
+                )
+                if not self._load(self._loader(0)):
+                    return False
+            search_index_documents.set(len(self._docs))
+            if not self.ready:
+                logger.info(f'Index de recherche prêt : {len(self._docs)} produits')
+            self.ready = True
+        except Exception as e:
+            logger.warning(f'Construction de l\'index de recherche impossible: {str(e)}')
+        finally:
+            self._build_lock.release()
+        return self.ready
+
+    def _load(self, rows):
+        """
+        Indexe les lignes pas encore indexées
+
+        Returns:
+            bool: False si le catalogue dépasse max_documents (index abandonné)
+        """
+        for row in rows:
+            if row.id in self._docs:
+                continue
+            if len(self._docs) >= self.max_documents:
+                logger.warning(
+                    f'Catalogue trop grand pour l\'index de recherche (> {self.max_documents}) : repli SQL',
+                    extra={'max_documents': self.max_documents}
+                )
+                self._disable()
+                return False
+            with self._lock:
+                self._add(row._asdict())
+                self.max_id = max(self.max_id, row.id)
+        return True
+
+    def _disable(self):
+        """Abandonne l'index et libère sa mémoire : toutes les recherches passent en SQL"""
+        with self._lock:
+            self.disabled = True
+            self.ready = False
+            self._docs, self._postings, self._vocabulary = {}, {}, []
+            self._categories, self._price_ranges = {}, {}
+        search_index_documents.set(0)
+
+    def refresh(self, max_id, count=None, wrap=None):
+        """
+        Prépare l'index pour une recherche
+
+        Index prêt : rattrape les produits validés depuis (catch_up). Index
+        froid : relance la construction en arrière-plan si elle n'est pas en
+        cours, la recherche passe par le repli SQL.
+
+        Returns:
+            bool: True si la recherche peut être servie par l'index
+        """
+        if self.ready:
+            return self.catch_up(max_id, count)
+        if not self.disabled and not self._build_lock.locked():
+            self.build_async(wrap)
+        return False
+
+    def build_async(self, wrap=None):
+        """
+        Construit l'index dans un thread pour ne pas retarder le démarrage
+
+        Args:
+            wrap (callable): Contexte d'exécution du chargement (app.app_context)
+        """
+        def run():
+            if wrap is None:
+                self.catch_up()
+                return
+            with wrap():
+                self.catch_up()
+
+        threading.Thread(target=run, name='search-index-build', daemon=True).start()
+
+    def _matching(self, tokens):
+        """IDs contenant tous les mots (le dernier en préfixe), et score de pertinence"""
+        scores = Counter()
+        matched = None
+        for position, token in enumerate(tokens):
+            ids = set(self._postings.get(token, ()))
+            scores.update(dict.fromkeys(ids, 2))
+            if position == len(tokens) - 1:
+                start = bisect.bisect_left(self._vocabulary, token)
+                for word in self._vocabulary[start:]:
+                    if not word.startswith(token):
+                        break
+                    if word != token:
+                        prefix_ids = self._postings[word] - ids
+                        scores.update(dict.fromkeys(prefix_ids, 1))
+                        ids |= prefix_ids
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set(), scores
+        return matched, scores
+
+    def search(self, params):
+        """
+        Recherche dans l'index
+
+        Les comptes de facettes ignorent le filtre de la facette elle-même :
+        la facette catégorie indique combien de résultats donnerait chaque
+        catégorie avec les autres filtres inchangés (idem pour le prix).
+
+        Args:
+            params (dict): Résultat de parse_search_query
+
+        Returns:
+            dict: total, items (page demandée) et facets
+        """
+        tokens = tokenize(params['q'])
+        with self._lock:
+            if tokens:
+                base, scores = self._matching(tokens)
+            else:
+                base, scores = set(self._docs), Counter()
+            docs = self._docs
+
+            if params['min_price'] is None and params['max_price'] is None:
+                priced = base
+            else:
+                priced = {i for i in base if _in_price(docs[i]['price'], params)}
+            category = params['category']
+            if category is None:
+                categorized = base
+            else:
+                categorized = base & self._categories.get(category, set())
+            results = priced if category is None else priced & categorized
+
+            category_counts = Counter(docs[i]['category'] for i in priced)
+            range_counts = {
+                index: len(categorized & ids) for index, ids in self._price_ranges.items()
+            }
+            # Seuls offset + limit résultats sont triés (tas), pas tout le catalogue
+            end = params['offset'] + params['limit']
+            items = heapq.nsmallest(
+                end, (docs[i] for i in results), key=self._sort_key(params['sort'], scores)
+            )
+
+        return {
+            'total': len(results),
+            'items': items[params['offset']:end],
+            'facets': {
+                'category': dict(category_counts.most_common()),
+                'price': _price_facet(range_counts),
+            },
+        }
+
+    @staticmethod
+    def _sort_key(sort, scores):
+        if sort == 'price_asc':
+            return lambda p: (p['price'], p['id'])
+        if sort == 'price_desc':
+            return lambda p: (-p['price'], p['id'])
+        if sort == 'name':
+            return lambda p: (p['name'].lower(), p['id'])
+        if sort == 'newest':
+            return lambda p: -p['id']
+        return lambda p: (-scores.get(p['id'], 0), p['id'])
+
+
+# ============================================================================
+# REPLI SQL (INDEX FROID)
+# ============================================================================
+def register_fold_function(engine):
+    """
+    Déclare FOLD_FUNCTION sur chaque connexion SQLite de l'engine
+
+    La fonction retourne les mots de tokenize() séparés et entourés d'espaces :
+    le repli LIKE compare alors des mots entiers, sans casse ni accents.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            FOLD_FUNCTION, 1,
+            lambda text: None if text is None else f' {" ".join(tokenize(text))} ',
+            deterministic=True
+        )
+
+
+def _has_fold_function(session):
+    """FOLD_FUNCTION existe-t-elle en base (vérifié une fois par engine)"""
+    engine = session.get_bind()
+    available = _fold_available.get(engine)
+    if available is None:
+        available = session.execute(
+            select(func.to_regprocedure(f'{FOLD_FUNCTION}(text)').is_not(None))
+        ).scalar_one()
+        _fold_available[engine] = available
+        if not available:
+            logger.warning(
+                f'Fonction {FOLD_FUNCTION} absente (init.sql) : repli SQL de la recherche '
+                'sensible aux accents'
+            )
+    return available
+
+
+def _like_word(word, prefix):
+    """Motif LIKE d'un mot de tokenize() (seul _ y est un joker) dans FOLD_FUNCTION"""
+    escaped = word.replace('_', '\\_')
+    return f'% {escaped}%' if prefix else f'% {escaped} %'
+
+
+def _text_conditions(session, q):
+    """
+    Conditions plein texte : tsvector sur PostgreSQL, LIKE ailleurs
+
+    Mêmes règles que l'index : mots sans casse ni accents, tous présents, le
+    dernier en préfixe.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        folded = _has_fold_function(session)
+        words = tokenize(q, fold_accents=folded)
+        if not words:
+            return [], None
+        name = getattr(func, FOLD_FUNCTION)(Product.name) if folded else Product.name
+        document = func.to_tsvector('simple', name)
+        query = func.to_tsquery('simple', ' & '.join([*words[:-1], f'{words[-1]}:*']))
+        return [document.op('@@')(query)], func.ts_rank(document, query)
+    if dialect != 'sqlite':
+        return [Product.name.ilike(f'%{word}%') for word in tokenize(q, fold_accents=False)], None
+    words = tokenize(q)
+    name = getattr(func, FOLD_FUNCTION)(Product.name)
+    return [
+        name.like(_like_word(word, position == len(words) - 1), escape='\\')
+        for position, word in enumerate(words)
+    ], None
+
+
+def _price_conditions(params):
+    conditions = []
+    if params['min_price'] is not None:
+        conditions.append(Product.price >= params['min_price'])
+    if params['max_price'] is not None:
+        conditions.append(Product.price <= params['max_price'])
+    return conditions
+
+
+SQL_ORDERS = {
+    'price_asc': (Product.price, Product.id),
+    'price_desc': (Product.price.desc(), Product.id),
+    'name': (func.lower(Product.name), Product.id),
+    'newest': (Product.id.desc(),),
+    'relevance': (Product.id,),
+}
+
+
+def search_database(session, params):
+    """
+    Même recherche que ProductSearchIndex.search, exécutée en SQL
+
+    Quatre requêtes : page, total, facette catégorie et facette prix.
+
+    Args:
+        session: Session SQLAlchemy
+        params (dict): Résultat de parse_search_query
+
+    Returns:
+        dict: total, items et facets
+    """
+    text, rank = _text_conditions(session, params['q'])
+    prices = _price_conditions(params)
+    categories = [Product.category == params['category']] if params['category'] else []
+
+    order = SQL_ORDERS[params['sort']]
+    if params['sort'] == 'relevance' and rank is not None:
+        order = (rank.desc(), Product.id)
+    rows = session.execute(
+        select(*PRODUCT_COLUMNS).where(*text, *prices, *categories)
+        .order_by(*order).limit(params['limit']).offset(params['offset'])
+    ).all()
+    total = session.execute(
+        select(func.count()).select_from(Product).where(*text, *prices, *categories)
+    ).scalar_one()
+
+    category_counts = session.execute(
+        select(Product.category, func.count()).where(*text, *prices)
+        .group_by(Product.category).order_by(func.count().desc())
+    ).all()
+
+    range_columns = []
+    for low, high in PRICE_RANGES:
+        in_range = Product.price >= low if high is None else and_(Product.price >= low, Product.price < high)
+        range_columns.append(func.coalesce(func.sum(case((in_range, 1), else_=0)), 0))
+    range_counts = session.execute(
+        select(*range_columns).where(*text, *categories)
+    ).one()
+
+    return {
+        'total': total,
+        'items': [row._asdict() for row in rows],
+        'facets': {
+            'category': dict(category_counts),
+            'price': _price_facet(dict(enumerate(range_counts))),
+        },
+    }
@@ -0,0 +1,227 @@
+"""
+Expédition des spans Jaeger vers l'agent (UDP, thrift compact)
+- report_span() ne fait qu'ajouter le span à un tampon borné : tampon plein,
+  le span est abandonné et compté, la requête n'attend jamais l'envoi
+- Un thread dédié envoie par lots (taille ou délai maximum) ; un lot qui
+  dépasserait la taille maximum d'un paquet UDP est scindé
+- Plafonds par span (nombre de tags et de logs, longueur des valeurs),
+  appliqués et comptés à l'envoi plutôt que tronqués en silence
+- Socket UDP connecté à l'agent : nom d'hôte résolu une fois, puis à
+  nouveau seulement après une erreur d'envoi
+- Lots en attente envoyés à l'arrêt du processus (close)
+"""
+import logging
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from jaeger_client import thrift
+from jaeger_client.reporter import BaseReporter
+from jaeger_client.thrift_gen.agent import Agent
+from prometheus_client import Counter, Gauge, Histogram
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.Thrift import TMessageType
+from thrift.transport.TTransport import TMemoryBuffer
+
+logger = logging.getLogger(__name__)
+
+spans_queued_total = Counter(
+    'tracing_spans_queued_total',
+    'Spans terminés mis en attente d\'envoi à l\'agent Jaeger'
+)
+
+spans_sent_total = Counter(
+    'tracing_spans_sent_total',
+    'Spans envoyés à l\'agent Jaeger'
+)
+
+spans_dropped_total = Counter(
+    'tracing_spans_dropped_total',
+    'Spans abandonnés avant l\'agent Jaeger',
+    ['reason']
+)
+
+spans_truncated_total = Counter(
+    'tracing_spans_truncated_total',
+    'Spans envoyés tronqués (un span compte une fois par raison)',
+    ['reason']
+)
+
+# Chaque worker a son propre tampon : somme sur les workers vivants
+span_queue_depth = Gauge(
+    'tracing_span_queue_depth',
+    'Spans en attente d\'envoi (mesuré à chaque lot)',
+    multiprocess_mode='livesum'
+)
+
+span_packet_bytes = Histogram(
+    'tracing_span_packet_bytes',
+    'Taille des paquets UDP envoyés à l\'agent Jaeger',
+    buckets=(512, 1024, 4096, 8192, 16384, 32768, 49152, 65000)
+)
+
+
+def encode_batch(batch):
+    """Message emitBatch (oneway) de l'agent Jaeger, tel qu'envoyé en UDP"""
+    buffer = TMemoryBuffer()
+    protocol = TCompactProtocol(buffer)
+    protocol.writeMessageBegin('emitBatch', TMessageType.ONEWAY, 0)
+    Agent.emitBatch_args(batch=batch).write(protocol)
+    protocol.writeMessageEnd()
+    return buffer.getvalue()
+
+
+class UDPSpanReporter(BaseReporter):
+    """
+    Reporter Jaeger borné et observable, remplaçant celui de jaeger-client
+
+    Le reporter de jaeger-client tourne sur une boucle tornado sans rien
+    exposer : ni profondeur de file, ni spans perdus, ni paquets trop gros
+    ignorés par l'agent. Créé dans chaque worker (après le fork) avec le tracer.
+
+    Args:
+        host (str): Hôte de l'agent Jaeger
+        port (int): Port UDP compact de l'agent (6831)
+        queue_size (int): Spans en attente au maximum
+        batch_size (int): Spans au maximum par lot
+        flush_interval (float): Délai maximum avant l'envoi d'un lot incomplet (secondes)
+        max_packet_size (int): Taille maximum d'un paquet UDP (65000 pour l'agent)
+        max_tag_length (int): Longueur maximum des valeurs texte des tags et logs
+        max_tags (int): Tags conservés par span (les premiers)
+        max_logs (int): Logs conservés par span (les derniers)
+    """
+
+    def __init__(self, host, port, queue_size=1000, batch_size=50, flush_interval=1.0,
+                 max_packet_size=65000, max_tag_length=1024, max_tags=64, max_logs=32):
+        self.address = (host, port)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_packet_size = max_packet_size
+        self.max_tag_length = max_tag_length
+        self.max_tags = max_tags
+        self.max_logs = max_logs
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._process = None
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._connected = False
+        self._thread = threading.Thread(target=self._run, name='jaeger-reporter', daemon=True)
+        self._thread.start()
+
+    def set_process(self, service_name, tags, max_length):
+        """Appelé par le Tracer : service et tags de processus joints à chaque lot"""
+        self._process = thrift.make_process(service_name=service_name, tags=tags, max_length=max_length)
+
+    def report_span(self, span):
+        with self._cond:
+            if self._closed:
+                spans_dropped_total.labels(reason='closed').inc()
+                return
+            if len(self._buffer) >= self.queue_size:
+                spans_dropped_total.labels(reason='queue_full').inc()
+                return
+            self._buffer.append(span)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        spans_queued_total.inc()
+
+    def _take_batch(self):
+        with self._cond:
+            if len(self._buffer) < self.batch_size and not self._closed:
+                self._cond.wait(self.flush_interval)
+            count = min(len(self._buffer), self.batch_size)
+            batch = [self._buffer.popleft() for _ in range(count)]
+            depth = len(self._buffer)
+        span_queue_depth.set(depth)
+        return batch
+
+    def _truncate(self, span):
+        """Applique les plafonds au span (terminé, plus modifié par la requête)"""
+        reasons = set()
+        with span.update_lock:
+            if len(span.tags) > self.max_tags:
+                span.tags = span.tags[:self.max_tags]
+                reasons.add('tags')
+            if len(span.logs) > self.max_logs:
+                span.logs = span.logs[-self.max_logs:]
+                reasons.add('logs')
+            tags = list(span.tags)
+            for log in span.logs:
+                tags.extend(log.fields or ())
+            for tag in tags:
+                if tag.vStr is not None and len(tag.vStr) > self.max_tag_length:
+                    tag.vStr = tag.vStr[:self.max_tag_length]
+                    reasons.add('tag_value')
+        for reason in reasons:
+            spans_truncated_total.labels(reason=reason).inc()
+
+    def _emit(self, spans):
+        """Envoie des spans en paquets d'au plus max_packet_size octets"""
+        packet = encode_batch(thrift.make_jaeger_batch(spans=spans, process=self._process))
+        if len(packet) > self.max_packet_size:
+            if len(spans) > 1:
+                middle = len(spans) // 2
+                self._emit(spans[:middle])
+                self._emit(spans[middle:])
+                return
+            span = spans[0]
+            if not span.logs:
+                spans_dropped_total.labels(reason='oversized').inc()
+                return
+            # Span seul trop gros : ses logs sont sacrifiés avant le span lui-même
+            with span.update_lock:
+                span.logs = []
+            spans_truncated_total.labels(reason='packet').inc()
+            self._emit(spans)
+            return
+        try:
+            # connect() résout le nom d'hôte (DNS) : une fois, pas à chaque paquet
+            if not self._connected:
+                self._sock.connect(self.address)
+                self._connected = True
+            self._sock.send(packet)
+        except OSError as e:
+            # Agent redémarré ou déplacé : adresse résolue à nouveau au prochain paquet
+            self._connected = False
+            spans_dropped_total.labels(reason='send_error').inc(len(spans))
+            logger.debug(f'Envoi des spans à l\'agent Jaeger impossible: {str(e)}')
+            return
+        spans_sent_total.inc(len(spans))
+        span_packet_bytes.observe(len(packet))
+
+    def _send(self, batch):
+        for span in batch:
+            self._truncate(span)
+        try:
+            self._emit(batch)
+        except Exception:
+            spans_dropped_total.labels(reason='encode_error').inc(len(batch))
+            logger.exception('Encodage des spans impossible')
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._send(batch)
+            elif self._closed:
+                break
+
+    def close(self, timeout=5):
+        """
+        Envoie les spans en attente puis ferme le socket
+
+        Returns:
+            Future: Déjà résolue (interface de BaseReporter.close)
+        """
+        with self._cond:
+            already_closed, self._closed = self._closed, True
+            self._cond.notify()
+        if not already_closed:
+            self._thread.join(timeout=timeout)
+            self._sock.close()
+        future = Future()
+        future.set_result(True)
+        return future
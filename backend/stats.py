@@ -0,0 +1,286 @@
+"""
+Agrégats du catalogue produits par catégorie (GET /products/stats)
+- Nombre de produits, prix min / max / moyen, médiane (p50) et p95
+- Tenus en mémoire : listes de prix triées par catégorie, complétées à chaque
+  création et rattrapées d'après max(id), sans parcours de la table par appel
+- Rafraîchissement périodique en arrière-plan, qui met aussi à jour les
+  gauges Prometheus catalog_products / catalog_price
+- Repli SQL (GROUP BY, percentile_cont sur PostgreSQL) tant qu'ils ne sont pas prêts
+"""
+import bisect
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from models import Product
+from observability import catalog_price, catalog_products
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = {'p50': 0.5, 'p95': 0.95}
+
+# Clé des agrégats tous produits confondus
+ALL_CATEGORIES = None
+
+# Clé des agrégats des catégories hors CATALOG_METRICS_CATEGORIES, publiés sous
+# le label category="other" : les catégories saisies par les clients ne
+# créent pas de séries Prometheus
+OTHER_CATEGORIES = ('other',)
+OTHER_LABEL = 'other'
+
+
+def percentile(values, fraction):
+    """
+    Percentile par interpolation linéaire (même définition que percentile_cont)
+
+    Args:
+        values (list): Valeurs triées, non vide
+        fraction (float): Entre 0 et 1
+    """
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(prices, total):
+    """Statistiques d'une liste de prix triée et de sa somme"""
+    summary = {
+        'count': len(prices),
+        'min': prices[0],
+        'max': prices[-1],
+        'avg': round(total / len(prices), 2),
+    }
+    for name, fraction in PERCENTILES.items():
+        summary[name] = round(percentile(prices, fraction), 2)
+    return summary
+
+
+class CatalogStats:
+    """
+    Agrégats de prix par catégorie, propres à chaque worker
+
+    Les produits ne sont ni modifiés ni supprimés par l'API : les agrégats ne
+    font que recevoir des prix. Une création isolée est insérée à sa place
+    (bisect.insort) ; les nouveaux prix d'un rattrapage sont ajoutés en fin de
+    liste puis la liste est retriée une fois (quasi triée : tri linéaire).
+
+    Args:
+        loader (callable): loader(after_id) -> lignes (id, category, price)
+            d'ID > after_id, triées par ID
+        metric_categories (iterable): Catégories publiées sous leur propre label,
+            les autres étant regroupées sous "other"
+        version (callable): Retourne (max(id), count(*)) de la table pour le
+            rafraîchissement périodique (None : rattrapage des ID > max_id seul)
+    """
+
+    def __init__(self, loader, metric_categories=(), version=None):
+        self._loader = loader
+        self._version = version
+        self.metric_categories = frozenset(metric_categories)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._prices = {}
+        self._totals = {}
+        self._seen = set()
+        self.max_id = 0
+        self.ready = False
+
+    def _merge(self, rows):
+        """Ajoute des (id, category, price) et retourne les catégories modifiées"""
+        changed = set()
+        resort = len(rows) > 1
+        with self._lock:
+            for product_id, category, price in rows:
+                if product_id in self._seen:
+                    continue
+                self._seen.add(product_id)
+                for key in self._keys(category):
+                    prices = self._prices.setdefault(key, [])
+                    if resort:
+                        prices.append(price)
+                    else:
+                        bisect.insort(prices, price)
+                    self._totals[key] = self._totals.get(key, 0.0) + price
+                changed.add(category)
+            if changed and resort:
+                for key in {key for category in changed for key in self._keys(category)}:
+                    self._prices[key].sort()
+        return changed
+
+    def _keys(self, category):
+        """Agrégats alimentés par un produit de cette catégorie"""
+        if category in self.metric_categories:
+            return (category, ALL_CATEGORIES)
+        return (category, ALL_CATEGORIES, OTHER_CATEGORIES)
+
+    def add(self, product_id, category, price):
+        """
+        Compte un produit créé par ce worker
+
+        max_id n'avance qu'au chargement ; un produit d'un autre worker d'ID
+        inférieur, validé plus tard, est rattrapé par catch_up() d'après count.
+        """
+        if not self.ready:
+            return
+        self.publish(self._merge([(product_id, category, price)]))
+
+    def catch_up(self, max_id=None, count=None):
+        """
+        Intègre les produits validés depuis le dernier chargement
+
+        Les ID > max_id déjà chargé sont lus en premier. Les IDs étant
+        attribués avant le commit, un ID inférieur peut être validé après un
+        ID supérieur déjà chargé : si la table compte alors plus de produits
+        que les agrégats, elle est relue en entier et seuls les produits
+        manquants sont ajoutés.
+
+        Args:
+            max_id (int): max(id) connu de la table ; rien à faire s'il est déjà chargé
+            count (int): Nombre de produits de la table (None : pas de recherche de trous)
+
+        Returns:
+            bool: True si les agrégats sont prêts
+        """
+        if max_id is not None and max_id <= self.max_id and (count is None or count <= len(self._seen)):
+            return self.ready
+        if not self._build_lock.acquire(blocking=False):
+            return self.ready
+        try:
+            rows = [tuple(row) for row in self._loader(self.max_id)]
+            changed = self._merge(rows)
+            if rows:
+                self.max_id = max(self.max_id, rows[-1][0])
+            if count is not None and len(self._seen) < count:
+                missing = count - len(self._seen)
+                logger.info(
+                    f'Agrégats du catalogue : {missing} produits validés hors ordre, relecture complète',
+                    extra={'missing': missing}
+                )
+                changed |= self._merge([tuple(row) for row in self._loader(0)])
+            if not self.ready:
+                logger.info(f'Agrégats du catalogue prêts : {len(self._seen)} produits')
+            self.ready = True
+            self.publish(changed)
+        except Exception as e:
+            logger.warning(f'Calcul des agrégats du catalogue impossible: {str(e)}')
+        finally:
+            self._build_lock.release()
+        return self.ready
+
+    def publish(self, categories=None):
+        """
+        Met à jour les gauges Prometheus des catégories modifiées (toutes par défaut)
+
+        Seules les catégories de metric_categories ont leur propre label, les
+        autres sont publiées ensemble sous category="other".
+        """
+        if categories is not None and not categories:
+            return
+        with self._lock:
+            if categories is None:
+                categories = [key for key in self._prices if isinstance(key, str)]
+            keys = {
+                category if category in self.metric_categories else OTHER_CATEGORIES
+                for category in categories
+            }
+            summaries = {
+                OTHER_LABEL if key is OTHER_CATEGORIES else key: summarize(self._prices[key], self._totals[key])
+                for key in keys
+            }
+        for category, summary in summaries.items():
+            catalog_products.labels(category=category).set(summary['count'])
+            for stat in ('min', 'max', 'avg', *PERCENTILES):
+                catalog_price.labels(category=category, stat=stat).set(summary[stat])
+
+    def snapshot(self, categories=None):
+        """
+        Statistiques courantes
+
+        Args:
+            categories (iterable): Catégories voulues (toutes par défaut)
+
+        Returns:
+            dict: catégorie -> count, min, max, avg, p50, p95
+        """
+        with self._lock:
+            keys = [key for key in self._prices if isinstance(key, str)] if categories is None else categories
+            return {
+                key: summarize(self._prices[key], self._totals[key])
+                for key in sorted(keys)
+            }
+
+    def overall(self):
+        """Statistiques tous produits confondus (None si le catalogue est vide)"""
+        with self._lock:
+            if ALL_CATEGORIES not in self._prices:
+                return None
+            return summarize(self._prices[ALL_CATEGORIES], self._totals[ALL_CATEGORIES])
+
+    def start_refresher(self, interval, wrap=None):
+        """
+        Charge les agrégats puis les rattrape toutes les interval secondes
+
+        Les gauges restent à jour même sans appel à /products/stats, y compris
+        pour les produits créés par les autres workers.
+
+        Args:
+            interval (float): Période de rafraîchissement (0 = chargement initial seulement)
+            wrap (callable): Contexte d'exécution du chargement (app.app_context)
+        """
+        def refresh():
+            if self._version is None or not self.ready:
+                self.catch_up()
+            else:
+                self.catch_up(*self._version())
+
+        def run():
+            while True:
+                if wrap is None:
+                    refresh()
+                else:
+                    with wrap():
+                        refresh()
+                if not interval:
+                    return
+                time.sleep(interval)
+
+        threading.Thread(target=run, name='catalog-stats-refresh', daemon=True).start()
+
+
+def stats_from_database(session):
+    """
+    Mêmes agrégats calculés en SQL (un GROUP BY et un agrégat global)
+
+    Les percentiles ne sont disponibles que sur PostgreSQL (percentile_cont),
+    ils valent None ailleurs.
+
+    Returns:
+        tuple: (dict catégorie -> statistiques, statistiques globales ou None)
+    """
+    columns = [func.count(), func.min(Product.price), func.max(Product.price), func.avg(Product.price)]
+    postgresql = session.get_bind().dialect.name == 'postgresql'
+    if postgresql:
+        columns.extend(
+            func.percentile_cont(fraction).within_group(Product.price)
+            for fraction in PERCENTILES.values()
+        )
+
+    def to_summary(values):
+        # Arrondis faits ici : round(double precision, int) n'existe pas en PostgreSQL
+        count, minimum, maximum, average, *percentiles = values
+        summary = {'count': count, 'min': float(minimum), 'max': float(maximum), 'avg': round(float(average), 2)}
+        for index, name in enumerate(PERCENTILES):
+            summary[name] = round(float(percentiles[index]), 2) if postgresql else None
+        return summary
+
+    rows = session.execute(
+        select(Product.category, *columns).group_by(Product.category).order_by(Product.category)
+    ).all()
+    overall = session.execute(select(*columns)).one()
+    return (
+        {row[0]: to_summary(row[1:]) for row in rows},
+        to_summary(overall) if overall[0] else None
+    )
@@ -0,0 +1,71 @@
+"""
+Fixtures communes des tests du backend
+
+L'application est importée une seule fois, sur une base SQLite temporaire
+(configuration lue à l'import de config.py) : sans PostgreSQL, Redis, Jaeger
+ni Logstash.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_DATABASE_DIR = tempfile.mkdtemp(prefix='backend-tests-')
+
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+os.environ.update({
+    'DATABASE_URL': f'sqlite:///{_DATABASE_DIR}/app.db',
+    'DATABASE_REPLICA_URLS': '',
+    'CATALOG_VERSION_TTL': '0',
+    'CATALOG_STATS_REFRESH_INTERVAL': '0',
+    'SEARCH_INDEX_ENABLED': 'false',
+    'PRODUCT_CACHE_REDIS_URL': '',
+    'LOGSTASH_HOST': '',
+    'LOG_LEVEL': 'WARNING',
+    'JAEGER_AGENT_HOST': '127.0.0.1',
+    'ADMISSION_ENABLED': 'false',
+})
+
+
+@pytest.fixture(scope='session')
+def backend():
+    """Module app.py, tables créées"""
+    import app as backend_app
+    with backend_app.app.app_context():
+        backend_app.db.create_all()
+    return backend_app
+
+
+@pytest.fixture
+def client(backend):
+    """Client de test sur une table products vide et des caches vidés"""
+    from models import Product
+    with backend.app.app_context():
+        backend.db.session.query(Product).delete()
+        backend.db.session.commit()
+    backend.catalog_version.bump()
+    if backend.product_list_cache is not None:
+        backend.product_list_cache.clear()
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def insert_product(backend):
+    """Insère un produit d'ID choisi, comme le commit tardif d'une autre transaction"""
+    from datetime import datetime
+
+    from models import Product
+
+    def insert(product_id, name='Produit', price=10.0, category='Audio', created_at=None):
+        with backend.app.app_context():
+            backend.db.session.add(Product(
+                id=product_id, name=name, price=price, category=category,
+                created_at=created_at or datetime.utcnow()
+            ))
+            backend.db.session.commit()
+
+    return insert
@@ -0,0 +1,95 @@
+"""Contrôle d'admission : créneaux partagés, files d'attente et délestage"""
+import multiprocessing
+import threading
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, SlotTable, parse_route_limits
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / 'admission.lock')
+
+
+def reason(controller, route):
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(route)
+    return rejected.value.reason
+
+
+def test_parse_route_limits():
+    assert parse_route_limits(' /slow=1, /products/<int:product_id>=8,') == {
+        '/slow': 1, '/products/<int:product_id>': 8,
+    }
+    for text in ('/slow', '/slow=0', '/slow=x'):
+        with pytest.raises(ValueError):
+            parse_route_limits(text)
+
+
+def test_global_capacity_sheds_then_recovers(lock_path):
+    controller = AdmissionController(2, {}, 0, 0.0, lock_path)
+    tickets = [controller.admit('/products'), controller.admit('/health')]
+
+    assert reason(controller, '/products') == 'capacity'
+
+    controller.release(tickets.pop())
+    tickets.append(controller.admit('/products'))
+    assert sorted(slot for ticket in tickets for slot in ticket.slots) == [0, 1]
+
+
+def test_route_limit_queue_and_timeout(lock_path):
+    controller = AdmissionController(0, {'/slow': 1}, 1, 0.05, lock_path)
+    running = controller.admit('/slow')
+
+    # Créneau pris : la requête suivante attend dans la file puis expire
+    assert reason(controller, '/slow') == 'timeout'
+    # Les autres routes ne sont pas plafonnées
+    controller.release(controller.admit('/products'))
+    controller.release(running)
+    controller.release(controller.admit('/slow'))
+
+
+def test_without_queue_busy_route_is_rejected_at_once(lock_path):
+    controller = AdmissionController(0, {'/slow': 1}, 0, 5.0, lock_path)
+    running = controller.admit('/slow')
+
+    assert reason(controller, '/slow') == 'queue_full'
+    controller.release(running)
+
+
+def test_queued_request_takes_the_released_slot(lock_path):
+    controller = AdmissionController(0, {'/slow': 1}, 1, 5.0, lock_path)
+    running = controller.admit('/slow')
+    admitted = []
+    waiting = threading.Thread(target=lambda: admitted.append(controller.admit('/slow')))
+    waiting.start()
+
+    controller.release(running)
+    waiting.join(timeout=5)
+
+    assert [ticket.slots for ticket in admitted] == [[0]]
+
+
+def _hold_slot(path, held, done):
+    table = SlotTable(path)
+    table.acquire(0, 1)
+    held.set()
+    done.wait(5)
+
+
+def test_slots_are_shared_between_processes_and_freed_on_exit(lock_path):
+    context = multiprocessing.get_context('fork')
+    held, done = context.Event(), context.Event()
+    worker = context.Process(target=_hold_slot, args=(lock_path, held, done))
+    worker.start()
+    assert held.wait(5)
+    table = SlotTable(lock_path)
+
+    assert table.acquire(0, 1) is None
+    assert table.acquire(0, 2) == 1
+
+    # Le noyau libère les verrous d'un worker terminé
+    done.set()
+    worker.join(5)
+    assert table.acquire(0, 1) == 0
@@ -0,0 +1,119 @@
+"""Ingestion en masse : validation par ligne, lots, COPY"""
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import bulk
+from models import Product
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/bulk.db')
+    Product.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def product(number):
+    return {'name': f'Produit {number}', 'price': 10.0 + number, 'category': 'Audio'}
+
+
+def items(*rows):
+    return ((index, row, None) for index, row in enumerate(rows))
+
+
+def stored_names(session):
+    return session.execute(select(Product.name).order_by(Product.id)).scalars().all()
+
+
+def test_ndjson_is_read_line_by_line():
+    stream = io.BytesIO(b'{"name": "a"}\n\n{invalide\n{"name": "b"}\n')
+
+    parsed = list(bulk._iter_ndjson(stream))
+
+    assert [(index, data) for index, data, _ in parsed] == [(0, {'name': 'a'}), (1, None), (2, {'name': 'b'})]
+    assert parsed[1][2].startswith('JSON invalide')
+
+
+def test_ingest_batches_and_reports_invalid_rows(session):
+    batches = []
+
+    summary = bulk.ingest(
+        session,
+        items(product(1), {'name': 'sans prix', 'category': 'Audio'}, 'texte', product(2), product(3)),
+        batch_size=2,
+        on_batch=lambda method, size: batches.append((method, size)),
+    )
+
+    assert summary['inserted'] == 3
+    assert summary['failed'] == 2
+    assert [error['index'] for error in summary['errors']] == [1, 2]
+    assert batches == [('INSERT', 2), ('INSERT', 1)]
+    assert summary['ids'] == session.execute(select(Product.id).order_by(Product.id)).scalars().all()
+    assert stored_names(session) == ['Produit 1', 'Produit 2', 'Produit 3']
+
+
+def test_failed_batch_is_rolled_back_alone(session, monkeypatch):
+    insert_returning = bulk.insert_returning
+    calls = []
+
+    def fail_second_batch(session, rows, ordered=False):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            insert_returning(session, rows)
+            raise RuntimeError('contrainte violée')
+        return insert_returning(session, rows, ordered)
+
+    monkeypatch.setattr(bulk, 'insert_returning', fail_second_batch)
+
+    summary = bulk.ingest(session, items(*(product(n) for n in range(1, 6))), batch_size=2)
+
+    assert (summary['inserted'], summary['failed'], summary['batches']) == (3, 2, 3)
+    assert [error['index'] for error in summary['errors']] == [2, 3]
+    assert stored_names(session) == ['Produit 1', 'Produit 2', 'Produit 5']
+
+
+def test_copy_threshold_falls_back_to_insert_outside_postgresql(session):
+    batches = []
+
+    bulk.ingest(session, items(product(1)), batch_size=10, copy_threshold=1,
+                on_batch=lambda method, size: batches.append(method))
+
+    assert batches == ['INSERT']
+
+
+def test_copy_rows_streams_csv_in_column_order():
+    class Cursor:
+        def copy_expert(self, statement, buffer):
+            self.statement, self.body = statement, buffer.read()
+
+        def close(self):
+            self.closed = True
+
+    cursor = Cursor()
+    connection = SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor))
+    session = SimpleNamespace(connection=lambda: connection)
+    row, _ = bulk.validate_row({'name': 'Câble "USB-C", 2 m', 'price': 9.5, 'category': 'Accessoires'})
+
+    bulk.copy_rows(session, [row])
+
+    assert cursor.statement == 'COPY products (name, price, category, created_at) FROM STDIN WITH (FORMAT csv)'
+    assert next(csv.reader(io.StringIO(cursor.body)))[:3] == ['Câble "USB-C", 2 m', '9.5', 'Accessoires']
+    assert cursor.closed
+
+
+def test_bulk_route_accepts_ndjson(client):
+    body = '\n'.join(json.dumps(row) for row in (product(1), {'name': 'x'}, product(2)))
+
+    response = client.post('/products/bulk', data=body, content_type='application/x-ndjson')
+
+    assert response.status_code == 207
+    summary = response.get_json()
+    assert (summary['inserted'], summary['failed']) == (2, 1)
+    assert [product['id'] for product in client.get('/products').get_json()] == summary['ids']
@@ -0,0 +1,142 @@
+"""Caches produits : LRU local avec TTL et niveau partagé"""
+import sys
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter
+
+import cache
+from cache import LRUCache, ProductCache
+
+
+class Clock:
+    """time.monotonic contrôlé par le test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MemoryTier:
+    """Niveau partagé en mémoire, à l'interface de RedisTier"""
+
+    def __init__(self, fail=False):
+        self.data = {}
+        self.fail = fail
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError('redis injoignable')
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self._check()
+        self.data[key] = value
+
+    def get_many(self, keys):
+        self._check()
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_many(self, values):
+        self._check()
+        self.data.update(values)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def events():
+    """Counter hit / miss / eviction sur un registre propre au test"""
+    registry = CollectorRegistry()
+    counter = Counter('product_cache_events', 'test', ['event', 'tier'], registry=registry)
+
+    def value(event, tier):
+        return registry.get_sample_value('product_cache_events_total', {'event': event, 'tier': tier})
+
+    value.counter = counter
+    return value
+
+
+def test_lru_evicts_least_recently_used(clock):
+    evicted = []
+    lru = LRUCache(2, 60, on_evict=evicted.append)
+    lru.set(1, 'a')
+    lru.set(2, 'b')
+    lru.get(1)
+
+    lru.set(3, 'c')
+
+    assert (lru.get(1), lru.get(2), lru.get(3)) == ('a', None, 'c')
+    assert evicted == [1]
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    lru = LRUCache(10, 60)
+    lru.set(1, 'a')
+
+    clock.now += 59
+    assert lru.get(1) == 'a'
+    clock.now += 2
+    assert lru.get(1) is None
+    assert len(lru) == 0
+
+
+def test_product_cache_counts_local_hits_and_misses(clock, events):
+    products = ProductCache(10, 60, counter=events.counter)
+    products.set(1, {'id': 1})
+
+    assert products.get(1) == {'id': 1}
+    assert products.get(2) is None
+    assert (events('hit', 'local'), events('miss', 'local')) == (1, 1)
+
+
+def test_shared_tier_fills_the_local_tier(clock, events):
+    products = ProductCache(10, 60, counter=events.counter)
+    products.shared = MemoryTier()
+    products.shared.data = {1: {'id': 1}, 2: {'id': 2}}
+
+    assert products.get_many([1, 2, 3]) == {1: {'id': 1}, 2: {'id': 2}}
+    assert products.local.get(2) == {'id': 2}
+    assert (events('hit', 'shared'), events('miss', 'shared')) == (2, 1)
+
+
+def test_unavailable_shared_tier_degrades_to_local(clock, events):
+    products = ProductCache(10, 60, counter=events.counter)
+    products.shared = MemoryTier(fail=True)
+
+    products.set_many({1: {'id': 1}})
+
+    assert products.get(1) == {'id': 1}
+    assert products.get(2) is None
+    assert products.get_many([1, 2]) == {1: {'id': 1}}
+
+
+def test_missing_redis_module_disables_shared_tier(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'redis', None)
+
+    assert ProductCache(10, 60, shared_url='redis://localhost:6379/0').shared is None
+
+
+def test_product_route_reads_through_the_cache(client, backend, insert_product):
+    insert_product(1, name='Casque')
+    backend.product_cache.local.clear()
+
+    first = client.get('/products/1')
+    with backend.app.app_context():
+        backend.db.session.execute(backend.db.text("UPDATE products SET name = 'Modifié' WHERE id = 1"))
+        backend.db.session.commit()
+    second = client.get('/products/1')
+
+    # Écriture hors API : servie depuis le cache jusqu'à PRODUCT_CACHE_TTL
+    assert first.get_json()['name'] == second.get_json()['name'] == 'Casque'
+    assert client.get('/products/2').status_code == 404
+    assert backend.product_cache.local.get(2) is None
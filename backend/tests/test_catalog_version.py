@@ -0,0 +1,71 @@
+"""Version du catalogue (ETag, Last-Modified) et revalidation de GET /products"""
+from datetime import datetime, timedelta
+
+from cache import CatalogVersion
+
+
+def names(response):
+    return [product['name'] for product in response.get_json()]
+
+
+def test_etag_changes_when_a_lower_id_commits_late(client, insert_product):
+    insert_product(1, 'a')
+    insert_product(3, 'c')
+    first = client.get('/products')
+    etag = first.headers['ETag']
+    assert names(first) == ['a', 'c']
+
+    # L'ID 2, attribué avant l'ID 3, est validé après lui : max(id) ne bouge pas
+    insert_product(2, 'b')
+
+    response = client.get('/products', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert names(response) == ['a', 'b', 'c']
+
+
+def test_list_cache_does_not_serve_page_missing_a_late_commit(client, insert_product):
+    insert_product(1, 'a')
+    insert_product(3, 'c')
+    assert names(client.get('/products')) == ['a', 'c']
+    assert names(client.get('/products')) == ['a', 'c']
+
+    insert_product(2, 'b')
+
+    assert names(client.get('/products')) == ['a', 'b', 'c']
+
+
+def test_if_modified_since_after_late_commit_with_older_created_at(client, insert_product):
+    now = datetime.utcnow().replace(microsecond=0)
+    insert_product(1, 'a', created_at=now - timedelta(minutes=5))
+    insert_product(3, 'c', created_at=now - timedelta(minutes=1))
+    last_modified = client.get('/products').headers['Last-Modified']
+
+    # Ligne créée avant la précédente mais validée après elle
+    insert_product(2, 'b', created_at=now - timedelta(minutes=3))
+
+    response = client.get('/products', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert names(response) == ['a', 'b', 'c']
+
+
+def test_unchanged_catalog_is_not_modified(client, insert_product):
+    insert_product(1, 'a')
+    etag = client.get('/products').headers['ETag']
+
+    response = client.get('/products', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+
+
+def test_version_keeps_state_when_nothing_changes():
+    created_at = datetime(2024, 1, 1)
+    version = CatalogVersion(lambda: (3, created_at, 2), ttl=0)
+    first = version.current()
+    assert first.etag == 'catalog-3-2'
+    assert version.current() is first
+
+
+def test_version_of_empty_catalog():
+    state = CatalogVersion(lambda: (None, None, 0), ttl=0).current()
+    assert (state.etag, state.max_id, state.count, state.last_modified) == ('catalog-0-0', 0, 0, None)
@@ -0,0 +1,98 @@
+"""Commit groupé : meneur, suiveurs et rejeu ligne par ligne"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from bulk import insert_returning
+from group_commit import GroupCommitter
+from models import Product
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/group_commit.db')
+    Product.__table__.create(engine)
+    return engine
+
+
+def make_committer(engine, window=5.0, max_rows=3):
+    """GroupCommitter sur SQLite, qui note la taille de chaque transaction"""
+    transactions = []
+
+    def insert_rows(rows):
+        transactions.append(len(rows))
+        with Session(engine) as session:
+            ids = insert_returning(session, rows, ordered=True)
+            session.commit()
+        return ids
+
+    return GroupCommitter(insert_rows, window, max_rows), transactions
+
+
+def row(name):
+    return {'name': name, 'price': 10.0, 'category': 'Audio', 'created_at': datetime(2024, 1, 1)}
+
+
+def submit_concurrently(committer, rows):
+    """Soumet les lignes depuis autant de threads, partis ensemble"""
+    barrier = threading.Barrier(len(rows))
+
+    def submit(row):
+        barrier.wait()
+        try:
+            return committer.submit(row)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(len(rows)) as executor:
+        return list(executor.map(submit, rows))
+
+
+def stored(engine):
+    with engine.connect() as connection:
+        return dict(connection.execute(select(Product.name, Product.id)).all())
+
+
+def test_full_batch_is_inserted_in_one_transaction(engine):
+    # Fenêtre de 5 s : seul le lot plein (max_rows) peut libérer le meneur à temps
+    committer, transactions = make_committer(engine)
+
+    results = submit_concurrently(committer, [row('a'), row('b'), row('c')])
+
+    assert transactions == [3]
+    assert [batch_size for _, batch_size in results] == [3, 3, 3]
+    # Chaque appelant reçoit l'ID de sa propre ligne
+    assert stored(engine) == {name: product_id for name, (product_id, _) in zip('abc', results)}
+
+
+def test_lone_submit_waits_for_the_window_only(engine):
+    committer, transactions = make_committer(engine, window=0.01)
+
+    product_id, batch_size = committer.submit(row('seul'))
+
+    assert (batch_size, transactions) == (1, [1])
+    assert stored(engine) == {'seul': product_id}
+
+
+def test_failed_batch_is_replayed_row_by_row(engine):
+    committer, transactions = make_committer(engine)
+
+    results = submit_concurrently(committer, [row('a'), row(None), row('c')])
+
+    assert transactions == [3, 1, 1, 1]
+    assert sorted(stored(engine)) == ['a', 'c']
+    assert isinstance(results[1], Exception)
+    assert [batch_size for _, batch_size in results[::2]] == [1, 1]
+
+
+def test_arrival_after_a_full_batch_leads_the_next_one(engine):
+    committer, transactions = make_committer(engine, window=0.5, max_rows=2)
+
+    submit_concurrently(committer, [row(name) for name in 'abcde'])
+
+    assert sorted(transactions) == [1, 2, 2]
+    assert sorted(stored(engine)) == list('abcde')
@@ -0,0 +1,98 @@
+"""Histogramme de latence HTTP : buckets par route, fusion et exemplars"""
+import json
+
+import pytest
+from prometheus_client import CollectorRegistry, values
+from prometheus_client.openmetrics.exposition import generate_latest as generate_openmetrics
+
+from http_metrics import (
+    DURATION_METRIC, ExemplarStore, HTTPLatencyHistogram, MultiProcessExemplarCollector, exemplar_path,
+    flask_route_template, load_exemplars, parse_buckets, parse_route_buckets,
+)
+
+TRACE_ID = '4bf92f3577b34da6'
+
+
+def bucket_counts(metrics, path):
+    """le -> valeur des buckets d'une route, toutes familles confondues"""
+    return {
+        sample.labels['le']: sample.value
+        for metric in metrics for sample in metric.samples
+        if sample.name == f'{DURATION_METRIC}_bucket' and sample.labels['path'] == path
+    }
+
+
+def test_parse_buckets_sorts_and_rejects_invalid_lists():
+    assert parse_buckets('0.5, 0.1,0.5') == (0.1, 0.5)
+    for text in ('', 'abc', '0.1,+Inf'):
+        with pytest.raises(ValueError):
+            parse_buckets(text)
+    assert parse_route_buckets('/slow=1,5; /health=0.01') == {'/slow': (1.0, 5.0), '/health': (0.01,)}
+    with pytest.raises(ValueError):
+        parse_route_buckets('=1,2')
+
+
+def test_starlette_routes_use_flask_templates():
+    assert flask_route_template('/products/{product_id:int}') == '/products/<int:product_id>'
+    assert flask_route_template('/files/{name}') == '/files/<name>'
+
+
+def test_route_buckets_are_merged_into_one_family():
+    registry = CollectorRegistry()
+    histogram = HTTPLatencyHistogram((0.1, 1.0), {'/slow': (1.0, 5.0)}, registry=registry)
+
+    histogram.observe('GET', '/products', 200, 0.05)
+    histogram.observe('GET', '/slow', 200, 3.0)
+    metrics = list(registry.collect())
+
+    assert [metric.name for metric in metrics] == [DURATION_METRIC]
+    assert bucket_counts(metrics, '/products') == {'0.1': 1.0, '1.0': 1.0, '+Inf': 1.0}
+    assert bucket_counts(metrics, '/slow') == {'1.0': 0.0, '5.0': 1.0, '+Inf': 1.0}
+
+
+def test_trace_id_exposed_as_exemplar_in_openmetrics():
+    registry = CollectorRegistry()
+    histogram = HTTPLatencyHistogram((0.1, 1.0), {}, registry=registry)
+
+    histogram.observe('GET', '/products', 200, 0.05, trace_id=TRACE_ID)
+    histogram.observe('GET', '/health', 200, 0.05)
+
+    lines = generate_openmetrics(registry).decode().splitlines()
+    assert [line.split(' # ')[0] for line in lines if f'trace_id="{TRACE_ID}"' in line] == [
+        f'{DURATION_METRIC}_bucket{{le="0.1",method="GET",path="/products",status="200"}} 1.0'
+    ]
+
+
+def test_load_exemplars_keeps_the_latest_per_bucket(tmp_path):
+    key = [f'{DURATION_METRIC}_bucket', {'le': '0.1', 'path': '/products'}]
+    for pid, trace_id, timestamp in ((101, 'ancien', 1.0), (102, 'recent', 2.0)):
+        with open(exemplar_path(str(tmp_path), pid), 'w') as f:
+            json.dump([key + [trace_id, 0.05, timestamp]], f)
+
+    exemplars = load_exemplars(str(tmp_path))
+
+    assert [exemplar.labels['trace_id'] for exemplar in exemplars.values()] == ['recent']
+
+
+def test_multiprocess_workers_are_merged_with_their_exemplars(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', directory)
+    worker = {'pid': 101}
+    monkeypatch.setattr(values, 'ValueClass', values.MultiProcessValue(lambda: worker['pid']))
+    store = ExemplarStore(directory, interval=3600)
+
+    # Deux workers : chacun son histogramme et ses fichiers mmap
+    for pid in (101, 102):
+        worker['pid'] = pid
+        histogram = HTTPLatencyHistogram((0.1, 1.0), {}, registry=None, exemplar_store=store)
+        histogram.observe('GET', '/products', 200, 0.05, trace_id=TRACE_ID if pid == 102 else None)
+    store.dump()
+
+    metrics = list(MultiProcessExemplarCollector(directory, registry=None).collect())
+
+    assert bucket_counts(metrics, '/products') == {'0.1': 2.0, '1.0': 2.0, '+Inf': 2.0}
+    exemplars = {
+        sample.labels['le']: sample.exemplar.labels['trace_id']
+        for metric in metrics for sample in metric.samples if sample.exemplar is not None
+    }
+    assert exemplars == {'0.1': TRACE_ID}
@@ -0,0 +1,116 @@
+"""Pagination par curseur, lecture groupée par IDs et streaming"""
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from models import Product
+from pagination import (
+    PaginationError, build_product_query, fetch_page, fetch_products_by_ids, parse_product_ids,
+    parse_product_query, stream_products,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pagination.db')
+    Product.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Product), [
+            {'id': product_id, 'name': f'p{product_id}', 'price': float(product_id),
+             'category': 'Audio' if product_id % 2 else 'Photo', 'created_at': datetime(2024, 1, product_id)}
+            for product_id in range(1, 8)
+        ])
+    return engine
+
+
+def pages(engine, limit, **args):
+    """Suit le curseur jusqu'à la dernière page, comme le frontend"""
+    ids, cursor = [], None
+    with Session(engine) as session:
+        while True:
+            params = parse_product_query(dict(args, after=cursor), limit, 100)
+            page, cursor = fetch_page(session, build_product_query(params), params['limit'])
+            ids.append([product['id'] for product in page])
+            if cursor is None:
+                return ids
+
+
+def test_parse_product_query_defaults_and_caps():
+    assert parse_product_query({}, 50, 100) == {
+        'limit': 50, 'after': None, 'category': None,
+        'created_after': None, 'created_before': None, 'stream': None,
+    }
+    assert parse_product_query({'limit': '500', 'after': '0'}, 50, 100)['limit'] == 100
+    # Export en streaming : pas de limite par défaut ni de plafond
+    assert parse_product_query({'stream': 'ndjson'}, 50, 100)['limit'] is None
+    assert parse_product_query({'stream': 'json', 'limit': '500'}, 50, 100)['limit'] == 500
+
+
+@pytest.mark.parametrize('args', [
+    {'limit': '0'}, {'limit': 'abc'}, {'after': '-1'},
+    {'created_after': 'hier'}, {'stream': 'csv'},
+])
+def test_parse_product_query_rejects_invalid_values(args):
+    with pytest.raises(PaginationError):
+        parse_product_query(args, 50, 100)
+
+
+def test_parse_product_ids_deduplicates_in_order():
+    assert parse_product_ids('3, 1,3,,2', 10) == [3, 1, 2]
+    assert parse_product_ids([5, '4', 5], 10) == [5, 4]
+
+
+@pytest.mark.parametrize('raw', ['', '1,x', '0', [1.5], [True], {'ids': 1}, '1,2,3'])
+def test_parse_product_ids_rejects_invalid_lists(raw):
+    with pytest.raises(PaginationError):
+        parse_product_ids(raw, 2)
+
+
+def test_cursor_walks_every_row_once(engine):
+    assert pages(engine, 3) == [[1, 2, 3], [4, 5, 6], [7]]
+    # Page pleine en fin de table : la ligne supplémentaire évite une page vide
+    assert pages(engine, 7) == [[1, 2, 3, 4, 5, 6, 7]]
+
+
+def test_cursor_with_filters(engine):
+    assert pages(engine, 2, category='Audio') == [[1, 3], [5, 7]]
+    assert pages(engine, 10, created_after='2024-01-03', created_before='2024-01-06') == [[3, 4, 5]]
+
+
+def test_fetch_products_by_ids_serializes_like_the_cache(engine):
+    with Session(engine) as session:
+        products = fetch_products_by_ids(session, [2, 99, 1])
+
+    assert sorted(products) == [1, 2]
+    assert products[2] == {
+        'id': 2, 'name': 'p2', 'price': 2.0, 'category': 'Photo', 'created_at': '2024-01-02T00:00:00',
+    }
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'json'])
+def test_stream_products_formats(engine, fmt):
+    params = parse_product_query({'category': 'Photo', 'stream': fmt}, 50, 100)
+    dumps = lambda row: json.dumps(row, default=str)  # noqa: E731
+    with Session(engine) as session:
+        body = ''.join(stream_products(session, build_product_query(params), fmt, 2, dumps=dumps))
+
+    if fmt == 'ndjson':
+        products = [json.loads(line) for line in body.splitlines()]
+    else:
+        products = json.loads(body)
+    assert [product['id'] for product in products] == [2, 4, 6]
+
+
+def test_products_route_returns_next_cursor_header(client, insert_product):
+    for product_id in range(1, 4):
+        insert_product(product_id)
+
+    first = client.get('/products?limit=2')
+    last = client.get(f"/products?limit=2&after={first.headers['X-Next-Cursor']}")
+
+    assert [product['id'] for product in first.get_json()] == [1, 2]
+    assert [product['id'] for product in last.get_json()] == [3]
+    assert 'X-Next-Cursor' not in last.headers
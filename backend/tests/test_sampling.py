@@ -0,0 +1,119 @@
+"""Échantillonnage par endpoint et promotion des requêtes en erreur ou lentes"""
+import opentracing
+import pytest
+from jaeger_client import Tracer
+from jaeger_client.reporter import InMemoryReporter
+from jaeger_client.sampler import ConstSampler, ProbabilisticSampler, RateLimitingSampler
+from opentracing.ext import tags as ot_tags
+from sqlalchemy import create_engine, text
+
+from query_telemetry import instrument_queries
+from sampling import EndpointSampler, build_sampler, parse_rules, promotion_reason
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """Tracer global qui garde les spans envoyés en mémoire, sampler au choix"""
+    def make(sampler):
+        reporter = InMemoryReporter()
+        tracer = Tracer('backend-tests', reporter, sampler)
+        monkeypatch.setattr(opentracing, 'tracer', tracer)
+        return tracer, reporter
+    return make
+
+
+def test_build_sampler_types():
+    assert isinstance(build_sampler('probabilistic', '0.05'), ProbabilisticSampler)
+    assert isinstance(build_sampler('rate_limiting', '2'), RateLimitingSampler)
+    assert build_sampler('const', '0').is_sampled(1)[0] is False
+    with pytest.raises(ValueError):
+        build_sampler('remote', '1')
+
+
+def test_parse_rules_rejects_malformed_entries():
+    with pytest.raises(ValueError):
+        parse_rules('/health')
+    with pytest.raises(ValueError):
+        parse_rules('/health=const')
+
+
+def test_endpoint_rules_exact_then_prefix_then_default():
+    default = ConstSampler(True)
+    sampler = EndpointSampler(default, parse_rules(
+        '/health=const:0, /products*=probabilistic:0.2, /products/search=const:1'
+    ))
+    health, prefix, search = (rule[2] for rule in sampler.rules)
+
+    assert sampler.sampler_for('GET /health') is health
+    assert sampler.sampler_for('GET /products/search') is search
+    assert sampler.sampler_for('POST /products/bulk') is prefix
+    assert sampler.sampler_for('GET /slow') is default
+    assert sampler.is_sampled(1, 'GET /health')[0] is False
+
+
+@pytest.mark.parametrize('status_code, duration, expected', [
+    (200, 0.1, None),
+    (503, 0.1, 'error'),
+    (200, 2.0, 'slow'),
+    (503, 2.0, 'error'),
+])
+def test_promotion_reason(tracer, status_code, duration, expected):
+    tracer, _ = tracer(ConstSampler(False))
+    span = tracer.start_span('GET /products')
+
+    assert promotion_reason(span, status_code, duration, 1.0, True) == expected
+    assert promotion_reason(span, 503, 0.1, 0, False) is None
+
+
+def test_sampled_span_is_never_promoted(tracer):
+    tracer, _ = tracer(ConstSampler(True))
+
+    assert promotion_reason(tracer.start_span('GET /products'), 500, 10.0, 1.0, True) is None
+
+
+def test_promoted_request_span_is_reported(tracer):
+    tracer, reporter = tracer(ConstSampler(False))
+    dropped = tracer.start_span('GET /products')
+    promoted = tracer.start_span('GET /slow')
+
+    dropped.finish()
+    promoted.set_tag(ot_tags.SAMPLING_PRIORITY, 1)
+    promoted.finish()
+
+    assert [span.operation_name for span in reporter.get_spans()] == ['GET /slow']
+
+
+@pytest.mark.parametrize('sampled', [True, False])
+def test_sql_spans_only_under_sampled_requests(tracer, sampled):
+    tracer, _ = tracer(ConstSampler(sampled))
+    engine = create_engine('sqlite://')
+    instrument_queries(engine)
+    started = []
+    start_active_span = tracer.start_active_span
+    tracer.start_active_span = lambda name, **kwargs: started.append(name) or start_active_span(name, **kwargs)
+
+    with tracer.start_active_span('GET /products'):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+    assert started == (['GET /products', 'SELECT none'] if sampled else ['GET /products'])
+
+
+def test_sql_queries_run_under_the_noop_tracer(monkeypatch):
+    monkeypatch.setattr(opentracing, 'tracer', opentracing.Tracer())
+    engine = create_engine('sqlite://')
+    instrument_queries(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT 1')).scalar() == 1
+
+
+def test_tracer_uses_the_endpoint_sampler(backend):
+    from observability import init_jaeger_tracer
+
+    tracer = init_jaeger_tracer(dict(backend.app.config, TRACE_SAMPLING_RULES='/health=const:0'))
+    try:
+        assert isinstance(tracer.sampler, EndpointSampler)
+        assert tracer.max_tag_value_length == backend.app.config['JAEGER_MAX_TAG_VALUE_LENGTH']
+    finally:
+        tracer.close()
@@ -0,0 +1,145 @@
+"""Index de recherche en mémoire et repli SQL"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from models import Product
+from pagination import PRODUCT_COLUMNS
+from search import ProductSearchIndex, parse_search_query, register_fold_function, search_database, tokenize
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/search.db')
+    register_fold_function(engine)
+    Product.__table__.create(engine)
+    return engine
+
+
+def add_products(engine, *products):
+    with engine.begin() as connection:
+        connection.execute(insert(Product), [
+            {'id': product_id, 'name': name, 'price': price, 'category': category,
+             'created_at': datetime(2024, 1, 1)}
+            for product_id, name, price, category in products
+        ])
+
+
+def make_index(engine, max_documents=1000):
+    def loader(after_id):
+        with engine.connect() as connection:
+            return connection.execute(
+                select(*PRODUCT_COLUMNS).where(Product.id > after_id).order_by(Product.id)
+            ).all()
+    return ProductSearchIndex(loader, max_documents)
+
+
+def catalog(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(Product.id)).all()
+
+
+def search_ids(index, **args):
+    return sorted(product['id'] for product in index.search(parse_search_query(args, 50, 100))['items'])
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize('Écran  Studio-Pro') == ['ecran', 'studio', 'pro']
+    assert tokenize('Écran', fold_accents=False) == ['écran']
+
+
+def test_catch_up_indexes_lower_id_committed_after_a_higher_one(engine):
+    add_products(engine, (1, 'Mac Mini', 699, 'Ordinateurs'), (3, 'Mac Studio', 2299, 'Ordinateurs'))
+    index = make_index(engine)
+    assert index.catch_up()
+    assert search_ids(index, q='mac') == [1, 3]
+
+    # L'ID 2 est validé après l'ID 3 : max(id) ne bouge pas, count(*) si
+    add_products(engine, (2, 'MacBook Air', 1199, 'Ordinateurs'))
+    rows = catalog(engine)
+    assert index.catch_up(max(row.id for row in rows), len(rows))
+
+    assert search_ids(index, q='mac') == [1, 2, 3]
+    assert index.max_id == 3
+
+
+def test_catch_up_skips_reload_when_nothing_changed(engine):
+    add_products(engine, (1, 'Mac Mini', 699, 'Ordinateurs'))
+    calls = []
+    index = make_index(engine)
+    loader = index._loader
+    index._loader = lambda after_id: calls.append(after_id) or loader(after_id)
+    index.catch_up()
+
+    index.catch_up(1, 1)
+
+    assert calls == [0]
+
+
+def test_prefix_on_last_word_and_facets(engine):
+    add_products(
+        engine,
+        (1, 'Magic Mouse', 89, 'Accessoires'),
+        (2, 'Magic Keyboard', 129, 'Accessoires'),
+        (3, 'Mac Mini', 699, 'Ordinateurs'),
+    )
+    index = make_index(engine)
+    index.catch_up()
+
+    assert search_ids(index, q='magic k') == [2]
+    result = index.search(parse_search_query({'q': 'ma'}, 50, 100))
+    assert result['total'] == 3
+    assert result['facets']['category'] == {'Accessoires': 2, 'Ordinateurs': 1}
+
+
+def test_index_disabled_beyond_max_documents(engine):
+    add_products(engine, (1, 'a', 1, 'x'), (2, 'b', 1, 'x'))
+    index = make_index(engine, max_documents=1)
+
+    assert not index.catch_up()
+    assert index.disabled
+
+
+@pytest.mark.parametrize('q', ['ecran', 'ÉCRAN', 'mac', 'mac mini', 'stud', 'cafe_n'])
+def test_sql_fallback_matches_index(engine, q):
+    add_products(
+        engine,
+        (1, 'Écran Studio', 1599, 'Écrans'),
+        (2, 'ecrans bureau', 199, 'Écrans'),
+        (3, 'Café_Noir machine', 99, 'Cuisine'),
+        (4, 'Mac Mini', 699, 'Ordinateurs'),
+        (5, 'Hamac de jardin', 49, 'Jardin'),
+    )
+    index = make_index(engine)
+    index.catch_up()
+    params = parse_search_query({'q': q}, 50, 100)
+
+    with Session(engine) as session:
+        database = sorted(product['id'] for product in search_database(session, params)['items'])
+
+    assert database == search_ids(index, q=q)
+
+
+def test_created_product_is_indexed_without_refresh_select(client, backend, monkeypatch):
+    added = []
+    monkeypatch.setattr(backend, 'search_index', SimpleNamespace(add=added.append))
+    statements = []
+
+    def record(connection, cursor, statement, *args):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    with backend.app.app_context():
+        engine = backend.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.post('/products', json={'name': 'Casque sans fil', 'price': 59.0, 'category': 'Audio'})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 201
+    product = response.get_json()
+    assert [dict(values, created_at=values['created_at'].isoformat()) for values in added] == [product]
+    assert 'SELECT' not in statements[statements.index('INSERT'):]
@@ -0,0 +1,109 @@
+"""Reporter UDP des spans : tampon borné, lots, plafonds et paquets"""
+import socket
+
+import pytest
+from jaeger_client import Tracer
+from jaeger_client.sampler import ConstSampler
+from jaeger_client.thrift_gen.agent import Agent
+from prometheus_client import REGISTRY
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+from span_reporter import UDPSpanReporter
+
+
+@pytest.fixture
+def agent():
+    """Faux agent Jaeger : socket UDP local"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(5)
+    yield sock
+    sock.close()
+
+
+@pytest.fixture
+def make_reporter(agent):
+    reporters = []
+
+    def make(**kwargs):
+        reporter = UDPSpanReporter(*agent.getsockname(), **kwargs)
+        reporters.append(reporter)
+        return reporter, Tracer('backend-tests', reporter, ConstSampler(True))
+
+    yield make
+    for reporter in reporters:
+        reporter.close()
+
+
+def receive(agent, packets):
+    """Spans des paquets reçus, un lot emitBatch par paquet"""
+    batches = []
+    for _ in range(packets):
+        protocol = TCompactProtocol(TMemoryBuffer(agent.recv(65535)))
+        protocol.readMessageBegin()
+        args = Agent.emitBatch_args()
+        args.read(protocol)
+        batches.append(args.batch.spans)
+    return batches
+
+
+def counter(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_spans_are_sent_in_batches(agent, make_reporter):
+    reporter, tracer = make_reporter(batch_size=3, flush_interval=60)
+
+    for name in 'abc':
+        tracer.start_span(name).finish()
+
+    assert [[span.operationName for span in spans] for spans in receive(agent, 1)] == [['a', 'b', 'c']]
+
+
+def test_pending_spans_are_flushed_on_close(agent, make_reporter):
+    reporter, tracer = make_reporter(batch_size=10, flush_interval=60)
+    tracer.start_span('dernier').finish()
+
+    reporter.close()
+
+    assert [[span.operationName for span in spans] for spans in receive(agent, 1)] == [['dernier']]
+
+
+def test_full_queue_drops_and_counts(make_reporter):
+    dropped = counter('tracing_spans_dropped_total', reason='queue_full')
+    reporter, tracer = make_reporter(queue_size=2, batch_size=10, flush_interval=60)
+
+    for name in 'abc':
+        tracer.start_span(name).finish()
+
+    assert counter('tracing_spans_dropped_total', reason='queue_full') == dropped + 1
+
+
+def test_limits_are_applied_and_counted(agent, make_reporter):
+    truncated = counter('tracing_spans_truncated_total', reason='tag_value')
+    reporter, tracer = make_reporter(batch_size=1, max_tag_length=8, max_tags=2, max_logs=1)
+    span = tracer.start_span('SELECT products')
+    for number in range(3):
+        span.set_tag(f'tag.{number}', number)
+        span.log_kv({'event': f'erreur {number}: connexion refusée'})
+    span.finish()
+
+    [[sent]] = receive(agent, 1)
+
+    # Premiers tags, derniers logs, valeurs texte coupées à max_tag_length
+    assert len(sent.tags) == 2
+    assert [field.vStr for log in sent.logs for field in log.fields] == ['erreur 2']
+    assert counter('tracing_spans_truncated_total', reason='tag_value') == truncated + 1
+
+
+def test_batch_over_packet_size_is_split(agent, make_reporter):
+    reporter, tracer = make_reporter(batch_size=4, flush_interval=60, max_packet_size=400)
+
+    for number in range(4):
+        span = tracer.start_span(f'span {number}')
+        span.set_tag('payload', 'x' * 100)
+        span.finish()
+
+    batches = receive(agent, 4)
+    assert sorted(span.operationName for spans in batches for span in spans) == [f'span {n}' for n in range(4)]
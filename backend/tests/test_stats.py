@@ -0,0 +1,99 @@
+"""Agrégats du catalogue par catégorie"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from models import Product
+from stats import CatalogStats, percentile, stats_from_database
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/stats.db')
+    Product.__table__.create(engine)
+    return engine
+
+
+def add_products(engine, *products):
+    with engine.begin() as connection:
+        connection.execute(insert(Product), [
+            {'id': product_id, 'name': f'p{product_id}', 'price': price, 'category': category,
+             'created_at': datetime(2024, 1, 1)}
+            for product_id, category, price in products
+        ])
+
+
+def make_stats(engine, metric_categories=('Audio',)):
+    def loader(after_id):
+        with engine.connect() as connection:
+            return connection.execute(
+                select(Product.id, Product.category, Product.price)
+                .where(Product.id > after_id).order_by(Product.id)
+            ).all()
+
+    def version():
+        with engine.connect() as connection:
+            return tuple(connection.execute(select(func.max(Product.id), func.count(Product.id))).one())
+
+    return CatalogStats(loader, metric_categories, version=version)
+
+
+def assert_matches_database(engine, stats):
+    with Session(engine) as session:
+        categories, overall = stats_from_database(session)
+    snapshot = stats.snapshot()
+    assert sorted(snapshot) == sorted(categories)
+    for category, expected in categories.items():
+        for name in ('count', 'min', 'max', 'avg'):
+            assert snapshot[category][name] == expected[name]
+    assert stats.overall()['count'] == overall['count']
+
+
+def test_percentile_interpolates_like_percentile_cont():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert percentile([5.0], 0.95) == 5.0
+
+
+def test_interleaved_commits_match_sql_group_by(engine):
+    add_products(engine, (1, 'Audio', 10.0), (4, 'Montres', 40.0))
+    stats = make_stats(engine)
+    assert stats.catch_up()
+
+    # IDs 2 et 3 validés après l'ID 4, puis 5 créé par ce worker
+    add_products(engine, (3, 'Audio', 30.0))
+    add_products(engine, (5, 'Audio', 50.0))
+    stats.add(5, 'Audio', 50.0)
+    add_products(engine, (2, 'Montres', 20.0))
+    assert stats.catch_up(*stats._version())
+
+    assert_matches_database(engine, stats)
+    assert stats.snapshot(['Audio'])['Audio']['p50'] == 30.0
+
+
+def test_single_create_keeps_prices_sorted(engine):
+    add_products(engine, (1, 'Audio', 10.0), (2, 'Audio', 30.0))
+    stats = make_stats(engine)
+    stats.catch_up()
+
+    stats.add(3, 'Audio', 20.0)
+    stats.add(3, 'Audio', 20.0)
+
+    assert stats._prices['Audio'] == [10.0, 20.0, 30.0]
+    assert stats.overall()['count'] == 3
+
+
+def test_unlisted_categories_are_published_as_other(engine):
+    from observability import catalog_products
+
+    add_products(engine, (1, 'Audio', 10.0), (2, 'Cat-1', 20.0), (3, 'Cat-2', 30.0))
+    stats = make_stats(engine)
+    stats.catch_up()
+    stats.publish()
+
+    labels = {sample.labels['category'] for metric in catalog_products.collect() for sample in metric.samples}
+    assert {'Audio', 'other'} <= labels
+    assert not labels & {'Cat-1', 'Cat-2'}
+    assert catalog_products.labels(category='other')._value.get() == 2
+    assert sorted(stats.snapshot()) == ['Audio', 'Cat-1', 'Cat-2']
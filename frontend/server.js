@@ -13,6 +13,8 @@ const PORT = process.env.PORT || 3000;
 const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:5000';
 const JAEGER_AGENT_HOST = process.env.JAEGER_AGENT_HOST || 'jaeger';
 const JAEGER_AGENT_PORT = process.env.JAEGER_AGENT_PORT || 6831;
+// Taille des pages demandées au backend (plafonnée par PRODUCTS_MAX_PAGE_SIZE côté backend)
+const PRODUCTS_PAGE_SIZE = parseInt(process.env.PRODUCTS_PAGE_SIZE || '1000', 10);
 
 // ============================================================================
 // LOGGER (Winston) - Logs structurés JSON
@@ -201,6 +203,9 @@ app.get('/metrics', async (req, res) => {
   res.end(await register.metrics());
 });
 
+// Dernière liste reçue du backend, revalidée par ETag (If-None-Match -> 304)
+let productsCache = null;
+
 /**
  * GET /api/products - Appelle le backend pour récupérer les produits
  */
@@ -219,28 +224,57 @@ app.get('/api/products', async (req, res) => {
     // Préparer les headers avec propagation du contexte de trace
     const headers = {};
     tracer.inject(childSpan, opentracing.FORMAT_HTTP_HEADERS, headers);
+    if (productsCache) {
+      headers['If-None-Match'] = productsCache.etag;
+    }
 
     childSpan.setTag(opentracing.Tags.HTTP_METHOD, 'GET');
     childSpan.setTag(opentracing.Tags.HTTP_URL, `${BACKEND_URL}/products`);
     
-    // Appel au backend
+    // Appel au backend : première page, revalidée par ETag
     const response = await axios.get(`${BACKEND_URL}/products`, {
       headers,
+      params: { limit: PRODUCTS_PAGE_SIZE },
       timeout: 5000,
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
     });
 
+    // 304 : le catalogue n'a pas changé, la liste en mémoire est réutilisée
+    let products = response.data;
+    let pages = 1;
+    if (response.status === 304 && productsCache) {
+      products = productsCache.data;
+    } else {
+      // Pages suivantes tant que le backend renvoie un curseur (X-Next-Cursor)
+      let cursor = response.headers['x-next-cursor'];
+      while (cursor) {
+        const page = await axios.get(`${BACKEND_URL}/products`, {
+          headers,
+          params: { limit: PRODUCTS_PAGE_SIZE, after: cursor },
+          timeout: 5000,
+        });
+        products = products.concat(page.data);
+        cursor = page.headers['x-next-cursor'];
+        pages += 1;
+      }
+      if (response.headers.etag) {
+        productsCache = { etag: response.headers.etag, data: products };
+      }
+    }
+    childSpan.setTag('pagination.pages', pages);
+
     childSpan.setTag(opentracing.Tags.HTTP_STATUS_CODE, response.status);
     childSpan.finish();
 
     logger.info({
       message: 'Réponse backend reçue',
       status: response.status,
-      products_count: response.data?.length || 0,
+      products_count: products?.length || 0,
       request_id: req.requestId,
       trace_id: req.traceId,
     });
 
-    res.json(response.data);
+    res.json(products);
   } catch (error) {
     childSpan.setTag(opentracing.Tags.ERROR, true);
     childSpan.log({
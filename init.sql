@@ -15,6 +15,15 @@ CREATE TABLE IF NOT EXISTS products (
 -- Créer des index pour améliorer les performances
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
 CREATE INDEX IF NOT EXISTS idx_products_created_at ON products(created_at);
+-- Nom normalisé comme l'index de recherche en mémoire : minuscules, sans accents
+-- (unaccent est STABLE : enveloppé en fonction IMMUTABLE pour être indexable)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE OR REPLACE FUNCTION products_fold(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, lower($1)) $$;
+
+-- Recherche plein texte sur le nom (repli SQL de GET /products/search)
+CREATE INDEX IF NOT EXISTS idx_products_name_fts ON products USING GIN (to_tsvector('simple', products_fold(name)));
 
 -- Insérer 10 produits exemples (vérifier qu'ils n'existent pas déjà)
 INSERT INTO products (name, price, category) VALUES